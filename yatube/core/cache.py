@@ -0,0 +1,289 @@
+import pickle
+import random
+import threading
+import time
+from collections import OrderedDict
+
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+from .timing import count, timed
+
+SEQUENCE_KEY = 'near:sequence'
+LOG_KEY = 'near:log:{}'
+CLEAR_ALL = '*'
+
+_near_stores = {}
+_near_stores_lock = threading.Lock()
+
+
+class NearStore:
+    """Процессный LRU-кеш перед общим хранилищем.
+
+    Один на процесс для каждого LOCATION: потоки получают разные
+    экземпляры бэкенда, но делят этот объект, его счётчики и номер
+    последней прочитанной записи журнала инвалидаций.
+    """
+
+    def __init__(self, max_entries, timeout):
+        self.max_entries = max_entries
+        self.timeout = timeout
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+        self.last_sequence = None
+        self.last_sync = 0.0
+        self.counters = dict.fromkeys(
+            (
+                'near_hits',
+                'shared_hits',
+                'misses',
+                'evictions',
+                'invalidations',
+            ),
+            0,
+        )
+
+    def count(self, counter):
+        with self.lock:
+            self.counters[counter] += 1
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return False, None
+            pickled, expires = entry
+            if expires <= time.monotonic():
+                del self.entries[key]
+                return False, None
+            self.entries.move_to_end(key)
+            self.counters['near_hits'] += 1
+        return True, pickle.loads(pickled)
+
+    def set(self, key, value, timeout):
+        if timeout is not None and timeout <= 0:
+            self.discard((key,))
+            return
+        if timeout is None or timeout > self.timeout:
+            timeout = self.timeout
+        pickled = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        with self.lock:
+            self.entries[key] = (pickled, time.monotonic() + timeout)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                self.counters['evictions'] += 1
+
+    def discard(self, keys):
+        with self.lock:
+            for key in keys:
+                if self.entries.pop(key, None) is not None:
+                    self.counters['invalidations'] += 1
+
+    def clear(self):
+        with self.lock:
+            self.counters['invalidations'] += len(self.entries)
+            self.entries.clear()
+
+    def stats(self):
+        with self.lock:
+            return dict(self.counters, size=len(self.entries))
+
+
+class TwoTierCache(BaseCache):
+    """Двухуровневый кеш: процессный LRU перед общим бэкендом.
+
+    Общий бэкенд задаётся алиасом SHARED из settings.CACHES. Каждая запись
+    увеличивает общий счётчик и кладёт в журнал изменённые ключи; процессы
+    не чаще раза в SYNC_INTERVAL секунд читают журнал и выбрасывают из
+    своего LRU чужие изменения. NEAR_TIMEOUT ограничивает время жизни
+    записи в LRU на случай потери журнала.
+
+    Схема рассчитана на один сервер и работает по принципу «как
+    получится». У FileBasedCache add и incr — это чтение и запись без
+    блокировки, поэтому два процесса могут получить один номер журнала,
+    и одна из записей пропадёт. Тогда чужой LRU держит старое значение
+    не дольше NEAR_TIMEOUT. Если серверов несколько, SHARED должен
+    указывать на бэкенд с атомарными add и incr, например memcached.
+    """
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self._shared_alias = options.get('SHARED', 'shared')
+        self._sync_interval = options.get('SYNC_INTERVAL', 1)
+        self._log_timeout = options.get('LOG_TIMEOUT', 300)
+        self._max_log_gap = options.get('MAX_LOG_GAP', 1000)
+        with _near_stores_lock:
+            self._near = _near_stores.setdefault(
+                location,
+                NearStore(
+                    options.get('NEAR_MAX_ENTRIES', 1000),
+                    options.get('NEAR_TIMEOUT', 60),
+                ),
+            )
+
+    @property
+    def shared(self):
+        return caches[self._shared_alias]
+
+    def _sync(self):
+        """Применяет журнал инвалидаций общего хранилища к своему LRU."""
+        near = self._near
+        now = time.monotonic()
+        if now - near.last_sync < self._sync_interval:
+            return
+        near.last_sync = now
+        sequence = self.shared.get(SEQUENCE_KEY)
+        last = near.last_sequence
+        near.last_sequence = sequence
+        if sequence == last:
+            return
+        if (
+            last is None
+            or sequence is None
+            or sequence < last
+            or sequence - last > self._max_log_gap
+        ):
+            near.clear()
+            return
+        log_keys = [LOG_KEY.format(n) for n in range(last + 1, sequence + 1)]
+        logged = self.shared.get_many(log_keys)
+        if len(logged) < len(log_keys):
+            near.clear()
+            return
+        changed = [key for keys in logged.values() for key in keys]
+        if CLEAR_ALL in changed:
+            near.clear()
+        else:
+            near.discard(changed)
+
+    def _log(self, keys):
+        """Публикует изменённые ключи для LRU других процессов.
+
+        Пропавший счётчик начинается заново со случайного числа, чтобы
+        процесс с устаревшим номером не принял новый журнал за уже
+        прочитанный. Номер уникален, только если incr общего бэкенда
+        атомарен; см. docstring класса.
+        """
+        shared = self.shared
+        sequence = random.getrandbits(48)
+        previous = None
+        if not shared.add(SEQUENCE_KEY, sequence, None):
+            sequence = shared.incr(SEQUENCE_KEY)
+            previous = sequence - 1
+        shared.set(LOG_KEY.format(sequence), list(keys), self._log_timeout)
+        if self._near.last_sequence == previous:
+            # Между нашими записями никто не писал: свою не перечитываем.
+            self._near.last_sequence = sequence
+
+    def _near_timeout(self, timeout):
+        return self.default_timeout if timeout is DEFAULT_TIMEOUT else timeout
+
+    def get(self, key, default=None, version=None):
+        with timed('cache'):
+            self._sync()
+            near_key = self.make_key(key, version)
+            hit, value = self._near.get(near_key)
+            if hit:
+                count('cache_hits')
+                return value
+            missing = object()
+            value = self.shared.get(key, missing, version)
+            if value is missing:
+                self._near.count('misses')
+                count('cache_misses')
+                return default
+            self._near.count('shared_hits')
+            count('cache_hits')
+            self._near.set(near_key, value, self._near.timeout)
+            return value
+
+    def get_many(self, keys, version=None):
+        """Ключи, которых нет в LRU, читаются из общего кеша одним запросом."""
+        keys = list(keys)
+        with timed('cache'):
+            found = self._get_many(keys, version)
+        count('cache_hits', len(found))
+        count('cache_misses', len(keys) - len(found))
+        return found
+
+    def _get_many(self, keys, version):
+        self._sync()
+        found = {}
+        missed = []
+        for key in keys:
+            hit, value = self._near.get(self.make_key(key, version))
+            if hit:
+                found[key] = value
+            else:
+                missed.append(key)
+        if not missed:
+            return found
+        shared = self.shared.get_many(missed, version)
+        for key in missed:
+            if key in shared:
+                self._near.count('shared_hits')
+                near_key = self.make_key(key, version)
+                self._near.set(near_key, shared[key], self._near.timeout)
+            else:
+                self._near.count('misses')
+        found.update(shared)
+        return found
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        near_key = self.make_key(key, version)
+        self.shared.set(key, value, timeout, version)
+        self._near.set(near_key, value, self._near_timeout(timeout))
+        self._log((near_key,))
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        if not self.shared.add(key, value, timeout, version):
+            return False
+        near_key = self.make_key(key, version)
+        self._near.set(near_key, value, self._near_timeout(timeout))
+        self._log((near_key,))
+        return True
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        return self.shared.touch(key, timeout, version)
+
+    def delete(self, key, version=None):
+        near_key = self.make_key(key, version)
+        self.shared.delete(key, version)
+        self._near.discard((near_key,))
+        self._log((near_key,))
+
+    def incr(self, key, delta=1, version=None):
+        near_key = self.make_key(key, version)
+        value = self.shared.incr(key, delta, version)
+        self._near.discard((near_key,))
+        self._log((near_key,))
+        return value
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        failed = self.shared.set_many(data, timeout, version)
+        near_keys = []
+        for key, value in data.items():
+            near_key = self.make_key(key, version)
+            near_keys.append(near_key)
+            if key not in failed:
+                self._near.set(near_key, value, self._near_timeout(timeout))
+        self._log(near_keys)
+        return failed
+
+    def delete_many(self, keys, version=None):
+        keys = list(keys)
+        self.shared.delete_many(keys, version)
+        near_keys = [self.make_key(key, version) for key in keys]
+        self._near.discard(near_keys)
+        self._log(near_keys)
+
+    def clear(self):
+        self.shared.clear()
+        self._near.clear()
+        self._log((CLEAR_ALL,))
+
+    def stats(self):
+        """Счётчики попаданий, промахов и вытеснений этого процесса."""
+        return self._near.stats()
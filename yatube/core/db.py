@@ -0,0 +1,78 @@
+import functools
+import logging
+import random
+import time
+
+from django.conf import settings
+from django.db import OperationalError, connection, connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_MODES = ('PASSIVE', 'FULL', 'RESTART', 'TRUNCATE')
+LOCK_ERRORS = ('database is locked', 'database table is locked')
+
+
+@receiver(connection_created)
+def configure_sqlite(sender, connection, **kwargs):
+    """Включает SQLITE_PRAGMAS на каждом новом соединении с SQLite.
+
+    journal_mode = WAL сохраняется в файле базы, остальные прагмы
+    действуют только на соединение. Для базы в памяти, как в тестах,
+    SQLite оставляет свой журнал и молча игнорирует WAL.
+    """
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        for name, value in settings.SQLITE_PRAGMAS.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
+
+
+def is_locked(error):
+    return any(message in str(error) for message in LOCK_ERRORS)
+
+
+def retry_on_lock(view):
+    """Повторяет view, если SQLite занята другим писателем.
+
+    busy_timeout ждёт блокировку внутри SQLite, но транзакция, начатая
+    чтением, при попытке записи получает SQLITE_BUSY сразу. Такую
+    транзакцию можно только начать заново: декоратор ставится снаружи
+    transaction.atomic и делает до SQLITE_LOCK_RETRIES повторов с
+    экспоненциальной паузой и случайным разбросом, чтобы столкнувшиеся
+    запросы не повторялись в такт.
+    """
+
+    @functools.wraps(view)
+    def wrapper(request, *args, **kwargs):
+        delay = settings.SQLITE_LOCK_RETRY_DELAY
+        for attempt in range(settings.SQLITE_LOCK_RETRIES + 1):
+            try:
+                return view(request, *args, **kwargs)
+            except OperationalError as error:
+                if (
+                    not is_locked(error)
+                    or attempt == settings.SQLITE_LOCK_RETRIES
+                    or connection.in_atomic_block
+                ):
+                    raise
+                logger.warning(
+                    'База занята, повтор %s для %s', attempt + 1, request.path
+                )
+                time.sleep(random.uniform(0, delay * 2 ** attempt))
+
+    return wrapper
+
+
+def checkpoint(mode='PASSIVE', using='default'):
+    """Переносит WAL в файл базы; возвращает (busy, страниц в WAL, перенесено).
+
+    PASSIVE не ждёт читателей и писателей, TRUNCATE ещё и обрезает WAL,
+    но ждёт, пока все читатели закончат.
+    """
+    if mode not in CHECKPOINT_MODES:
+        raise ValueError(f'Неизвестный режим checkpoint: {mode}')
+    with connections[using].cursor() as cursor:
+        cursor.execute(f'PRAGMA wal_checkpoint({mode})')
+        return cursor.fetchone()
@@ -0,0 +1,131 @@
+import os
+import random
+import sqlite3
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+SCHEMA = (
+    'CREATE TABLE post ('
+    'id INTEGER PRIMARY KEY, author_id INTEGER, pub_date REAL, text TEXT)',
+    'CREATE INDEX post_pub_date ON post (pub_date)',
+)
+FEED_QUERY = (
+    'SELECT id, author_id, text FROM post ORDER BY pub_date DESC LIMIT 10'
+)
+INSERT = 'INSERT INTO post (author_id, pub_date, text) VALUES (?, ?, ?)'
+
+
+def connect(path, pragmas):
+    # Таймаут sqlite3 по умолчанию, как у Django; busy_timeout его заменяет.
+    db = sqlite3.connect(path, check_same_thread=False)
+    for name, value in pragmas.items():
+        db.execute(f'PRAGMA {name} = {value}')
+    return db
+
+
+class Workload:
+    """Читатели крутят запрос ленты, один писатель вставляет посты."""
+
+    def __init__(self, path, pragmas, duration, write_interval):
+        self.path = path
+        self.pragmas = pragmas
+        self.write_interval = write_interval
+        self.stop = time.monotonic() + duration
+        self.stats = {'reads': 0, 'writes': 0, 'locked': 0}
+        self.lock = threading.Lock()
+
+    def count(self, name):
+        with self.lock:
+            self.stats[name] += 1
+
+    def loop(self, step, counter, pause=0):
+        db = connect(self.path, self.pragmas)
+        while time.monotonic() < self.stop:
+            try:
+                step(db)
+                self.count(counter)
+            except sqlite3.OperationalError:
+                self.count('locked')
+            time.sleep(pause)
+        db.close()
+
+    def read(self, db):
+        db.execute(FEED_QUERY).fetchall()
+
+    def write(self, db):
+        with db:
+            db.execute(
+                INSERT, (random.randrange(100), time.time(), 'x' * 200)
+            )
+
+    def run(self, readers):
+        threads = [
+            threading.Thread(target=self.loop, args=(self.read, 'reads'))
+            for _ in range(readers)
+        ]
+        threads.append(
+            threading.Thread(
+                target=self.loop,
+                args=(self.write, 'writes', self.write_interval),
+            )
+        )
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return self.stats
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает чтение ленты под постоянной записью в SQLite '
+        'с настройками по умолчанию и с SQLITE_PRAGMAS'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--readers', type=int, default=4)
+        parser.add_argument('--duration', type=float, default=5)
+        parser.add_argument('--rows', type=int, default=10000)
+        parser.add_argument(
+            '--write-interval',
+            type=float,
+            default=0.001,
+            help='Пауза писателя между транзакциями, секунд',
+        )
+
+    def handle(self, *args, **options):
+        profiles = (
+            ('по умолчанию', {'journal_mode': 'delete'}),
+            ('SQLITE_PRAGMAS', settings.SQLITE_PRAGMAS),
+        )
+        for title, pragmas in profiles:
+            with tempfile.TemporaryDirectory() as directory:
+                path = os.path.join(directory, 'bench.sqlite3')
+                db = connect(path, pragmas)
+                for statement in SCHEMA:
+                    db.execute(statement)
+                with db:
+                    db.executemany(
+                        INSERT,
+                        (
+                            (n % 100, n, 'x' * 200)
+                            for n in range(options['rows'])
+                        ),
+                    )
+                db.close()
+                stats = Workload(
+                    path,
+                    pragmas,
+                    options['duration'],
+                    options['write_interval'],
+                ).run(options['readers'])
+            seconds = options['duration']
+            self.stdout.write(
+                f'{title}: чтений {stats["reads"] / seconds:.0f}/с, '
+                f'записей {stats["writes"] / seconds:.0f}/с, '
+                f'ошибок блокировки {stats["locked"]}'
+            )
@@ -0,0 +1,35 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.db import CHECKPOINT_MODES, checkpoint
+
+
+class Command(BaseCommand):
+    help = 'Переносит журнал WAL SQLite в файл базы, разово или по расписанию'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--mode',
+            choices=CHECKPOINT_MODES,
+            default='PASSIVE',
+            help='Режим wal_checkpoint; TRUNCATE ещё и обрезает файл WAL',
+        )
+        parser.add_argument(
+            '--interval',
+            type=int,
+            default=None,
+            help='Повторять каждые столько секунд, пока не прервут',
+        )
+        parser.add_argument('--database', default='default')
+
+    def handle(self, *args, mode='PASSIVE', interval=None, **options):
+        while True:
+            busy, logged, moved = checkpoint(mode, options['database'])
+            self.stdout.write(
+                f'{mode}: страниц в WAL {logged}, перенесено {moved}'
+                + (' (база занята)' if busy else '')
+            )
+            if not interval:
+                return
+            time.sleep(interval)
@@ -0,0 +1,34 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.replicas import copy_sqlite
+
+
+class Command(BaseCommand):
+    help = (
+        'Копирует основную базу SQLite в реплику, разово или по расписанию; '
+        'локальная замена репликации'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default='replica')
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=None,
+            help='Повторять каждые столько секунд, пока не прервут',
+        )
+
+    def handle(self, *args, database='replica', interval=None, **options):
+        while True:
+            started = time.monotonic()
+            copy_sqlite(target=database)
+            if options['verbosity'] > 1 or not interval:
+                self.stdout.write(
+                    f'Реплика {database} обновлена за '
+                    f'{time.monotonic() - started:.2f} с'
+                )
+            if not interval:
+                return
+            time.sleep(interval)
@@ -0,0 +1,119 @@
+import random
+import sqlite3
+import threading
+from contextlib import closing, contextmanager
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+PIN_COOKIE = 'primary_db'
+
+_state = threading.local()
+
+
+def used_replica():
+    """Читал ли текущий запрос хоть что-то с реплики."""
+    return getattr(_state, 'used_replica', False)
+
+
+@contextmanager
+def replica_reads(allowed=True):
+    """Разрешает чтение с реплик внутри блока, например на время запроса.
+
+    Вне такого блока — в командах, фоновых потоках и миграциях — всё
+    читается с основной базы: там чтение обычно ведёт к записи.
+    """
+    previous = dict(_state.__dict__)
+    _state.active = True
+    _state.allowed = allowed
+    _state.wrote = False
+    _state.used_replica = False
+    _state.replica = None
+    try:
+        yield _state
+    finally:
+        _state.__dict__.clear()
+        _state.__dict__.update(previous)
+
+
+class PrimaryReplicaRouter:
+    """Пишет в основную базу, читает со случайной из DATABASE_REPLICAS.
+
+    Реплика выбирается один раз на блок replica_reads: реплики отстают
+    по-разному, и запросы одной страницы должны видеть одно состояние.
+
+    Чтение остаётся на основной базе, если реплики не разрешены,
+    запрос уже что-то записал или идёт транзакция: внутри неё нужны
+    данные, согласованные с записью.
+    """
+
+    def db_for_read(self, model, **hints):
+        replicas = settings.DATABASE_REPLICAS
+        if (
+            not replicas
+            or not getattr(_state, 'allowed', False)
+            or _state.wrote
+            or connections[DEFAULT_DB_ALIAS].in_atomic_block
+        ):
+            return DEFAULT_DB_ALIAS
+        if _state.replica is None:
+            _state.replica = random.choice(replicas)
+        _state.used_replica = True
+        return _state.replica
+
+    def db_for_write(self, model, **hints):
+        if getattr(_state, 'active', False):
+            _state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Реплики — копии основной базы, связи между ними допустимы.
+        return True
+
+    def allow_migrate(self, db, app_label, **hints):
+        # Схему на реплики приносит репликация.
+        return db == DEFAULT_DB_ALIAS
+
+
+class ReplicaPinMiddleware:
+    """Читает со реплик, но показывает пользователю его же запись.
+
+    Ответ на запрос, который писал в базу, ставит cookie на
+    REPLICA_PIN_SECONDS: пока она жива, запросы этого браузера читают
+    основную базу, даже если реплика ещё не догнала её. Middleware стоит
+    снаружи SessionMiddleware, чтобы сохранение сессии тоже считалось
+    записью.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        pinned = PIN_COOKIE in request.COOKIES
+        with replica_reads(allowed=not pinned) as state:
+            response = self.get_response(request)
+            wrote = state.wrote
+        if wrote:
+            response.set_cookie(
+                PIN_COOKIE,
+                '1',
+                max_age=settings.REPLICA_PIN_SECONDS,
+                httponly=True,
+                samesite='Lax',
+            )
+        return response
+
+
+def copy_sqlite(source=DEFAULT_DB_ALIAS, target='replica', pages=1024):
+    """Копирует базу SQLite в реплику через backup API.
+
+    Замена настоящей репликации для локальной проверки: читатели реплики
+    видят либо старую, либо новую копию целиком. Копирование идёт
+    порциями по pages страниц, чтобы не держать блокировку долго.
+    """
+    source_path = connections[source].settings_dict['NAME']
+    target_path = connections[target].settings_dict['NAME']
+    with closing(sqlite3.connect(source_path)) as primary, closing(
+        sqlite3.connect(target_path)
+    ) as replica:
+        primary.backup(replica, pages=pages)
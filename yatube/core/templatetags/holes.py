@@ -0,0 +1,19 @@
+from django import template
+
+from core.holes import marker, render_hole
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def hole(context, name, **kwargs):
+    """Фрагмент, зависящий от пользователя.
+
+    Если страница собирается для общего кеша (request.punch_holes), на
+    месте фрагмента остаётся метка, которую fill_holes заполняет при
+    каждом ответе; иначе фрагмент рисуется сразу.
+    """
+    request = context.get('request')
+    if getattr(request, 'punch_holes', False):
+        return marker(name, kwargs)
+    return render_hole(request, name, kwargs)
@@ -0,0 +1,86 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from .cache import TwoTierCache
+
+User = get_user_model()
+
+
+def make_cache(location, **options):
+    return TwoTierCache(
+        location,
+        {'OPTIONS': dict({'SHARED': 'shared', 'SYNC_INTERVAL': 0}, **options)},
+    )
+
+
+class TwoTierCacheTests(TestCase):
+    """Два экземпляра с разными LOCATION изображают два процесса."""
+
+    def setUp(self):
+        caches['shared'].clear()
+        self.first = make_cache('first')
+        self.second = make_cache('second')
+        self.first.clear()
+
+    def test_reads_go_through_near_cache(self):
+        """Повторное чтение берётся из процессного LRU."""
+        self.first.set('key', 'value')
+        self.assertEqual(self.second.get('key'), 'value')
+        self.assertEqual(self.second.get('key'), 'value')
+        stats = self.second.stats()
+        self.assertGreaterEqual(stats['shared_hits'], 1)
+        self.assertGreaterEqual(stats['near_hits'], 1)
+
+    def test_writes_invalidate_other_processes(self):
+        """Запись в одном процессе сбрасывает LRU другого."""
+        self.first.set('key', 'old')
+        self.assertEqual(self.second.get('key'), 'old')
+        self.first.set('key', 'new')
+        self.assertEqual(self.second.get('key'), 'new')
+        self.first.delete('key')
+        self.assertIsNone(self.second.get('key'))
+        self.first.set('counter', 1)
+        self.assertEqual(self.second.get('counter'), 1)
+        self.first.incr('counter')
+        self.assertEqual(self.second.get('counter'), 2)
+
+    def test_clear_reaches_other_processes(self):
+        """clear() в одном процессе очищает LRU остальных."""
+        self.first.set('key', 'value')
+        self.assertEqual(self.second.get('key'), 'value')
+        self.first.clear()
+        self.assertIsNone(self.second.get('key'))
+
+    def test_get_many_fills_near_cache(self):
+        """get_many читает общий кеш только для ключей, которых нет в LRU."""
+        reader = make_cache('many')
+        self.first.set_many({'a': 1, 'b': 2})
+        self.assertEqual(reader.get('a'), 1)
+        self.assertEqual(reader.get_many(['a', 'b', 'c']), {'a': 1, 'b': 2})
+        stats = reader.stats()
+        self.assertEqual(stats['near_hits'], 1)
+        self.assertEqual(stats['shared_hits'], 2)
+        self.assertEqual(stats['misses'], 1)
+        self.assertEqual(reader.get_many(['a', 'b']), {'a': 1, 'b': 2})
+        self.assertEqual(reader.stats()['near_hits'], 3)
+
+    def test_near_cache_is_bounded(self):
+        """LRU вытесняет самые старые записи сверх NEAR_MAX_ENTRIES."""
+        small = make_cache('small', NEAR_MAX_ENTRIES=2)
+        for key in ('a', 'b', 'c'):
+            small.set(key, key)
+        self.assertEqual(small.stats()['evictions'], 1)
+        self.assertEqual(small.stats()['size'], 2)
+        self.assertEqual(small.get('a'), 'a')
+
+    def test_stats_view_for_staff_only(self):
+        """Счётчики кеша доступны только персоналу."""
+        url = reverse('cache_stats')
+        client = Client()
+        self.assertEqual(client.get(url).status_code, 302)
+        client.force_login(
+            User.objects.create_user(username='staff', is_staff=True)
+        )
+        self.assertIn('near_hits', client.get(url).json())
@@ -0,0 +1,61 @@
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.db import OperationalError, connection
+from django.test import RequestFactory, SimpleTestCase, TestCase
+
+from .db import checkpoint, retry_on_lock
+
+
+class SqlitePragmaTests(TestCase):
+    def pragma(self, name):
+        with connection.cursor() as cursor:
+            cursor.execute(f'PRAGMA {name}')
+            return cursor.fetchone()[0]
+
+    def test_connection_is_configured(self):
+        """Новое соединение получает прагмы из SQLITE_PRAGMAS."""
+        self.assertEqual(self.pragma('busy_timeout'), 5000)
+        self.assertEqual(self.pragma('synchronous'), 1)
+        self.assertEqual(self.pragma('cache_size'), -64000)
+
+    def test_checkpoint_command(self):
+        out = StringIO()
+        call_command('checkpoint_wal', mode='TRUNCATE', stdout=out)
+        self.assertIn('TRUNCATE', out.getvalue())
+        with self.assertRaises(ValueError):
+            checkpoint('SOMETIMES')
+
+
+@mock.patch('core.db.time.sleep')
+class RetryOnLockTests(SimpleTestCase):
+    def setUp(self):
+        self.request = RequestFactory().post('/create/')
+
+    def flaky_view(self, *errors):
+        view = mock.Mock(side_effect=[*errors, 'ok'])
+        return view, retry_on_lock(view)
+
+    def test_retries_locked_database(self, sleep):
+        view, wrapped = self.flaky_view(
+            OperationalError('database is locked'),
+            OperationalError('database is locked'),
+        )
+        self.assertEqual(wrapped(self.request), 'ok')
+        self.assertEqual(view.call_count, 3)
+        self.assertEqual(sleep.call_count, 2)
+
+    def test_gives_up_after_retries(self, sleep):
+        errors = [OperationalError('database is locked')] * 4
+        view, wrapped = self.flaky_view(*errors)
+        with self.assertRaises(OperationalError):
+            wrapped(self.request)
+        self.assertEqual(view.call_count, 4)
+
+    def test_other_errors_are_not_retried(self, sleep):
+        view, wrapped = self.flaky_view(OperationalError('no such table'))
+        with self.assertRaises(OperationalError):
+            wrapped(self.request)
+        self.assertEqual(view.call_count, 1)
+        sleep.assert_not_called()
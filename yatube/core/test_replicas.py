@@ -0,0 +1,104 @@
+import time
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connections
+from django.test import Client, TestCase, TransactionTestCase
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Post
+
+from .replicas import PIN_COOKIE, PrimaryReplicaRouter, replica_reads
+
+User = get_user_model()
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ReplicaRoutingTests(TransactionTestCase):
+    databases = {'default', 'replica'}
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='auth')
+        self.post = Post.objects.create(author=self.user, text='Тестовый пост')
+        self.client = Client()
+        self.client.force_login(self.user)
+        self.detail = reverse(
+            'posts:post_detail', kwargs={'post_id': self.post.pk}
+        )
+
+    def get(self, url):
+        with CaptureQueriesContext(connections['replica']) as replica:
+            with CaptureQueriesContext(connections['default']) as primary:
+                response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response, len(primary), len(replica)
+
+    def test_reads_go_to_replica(self):
+        response, primary, replica = self.get(self.detail)
+        self.assertEqual(primary, 0)
+        self.assertGreater(replica, 0)
+        self.assertNotIn(PIN_COOKIE, response.cookies)
+
+    def test_own_writes_pin_to_primary(self):
+        """После комментария пользователь читает основную базу."""
+        response = self.client.post(
+            reverse('posts:add_comment', kwargs={'post_id': self.post.pk}),
+            {'text': 'Комментарий'},
+        )
+        self.assertIn(PIN_COOKIE, response.cookies)
+        _, primary, replica = self.get(self.detail)
+        self.assertGreater(primary, 0)
+        self.assertEqual(replica, 0)
+        self.client.cookies.pop(PIN_COOKIE)
+        cache.clear()
+        _, primary, replica = self.get(self.detail)
+        self.assertGreater(replica, 0)
+
+    def test_writes_go_to_primary(self):
+        with CaptureQueriesContext(connections['replica']) as replica:
+            self.client.post(
+                reverse('posts:post_create'), {'text': 'Новый пост'}
+            )
+        self.assertTrue(Post.objects.filter(text='Новый пост').exists())
+        self.assertFalse(
+            any(
+                query['sql'].startswith(('INSERT', 'UPDATE', 'DELETE'))
+                for query in replica.captured_queries
+            )
+        )
+
+    @override_settings(DATABASE_REPLICAS=['replica', 'other'])
+    def test_replica_is_chosen_once_per_request(self):
+        """Все чтения запроса идут на одну реплику."""
+        router = PrimaryReplicaRouter()
+        with mock.patch(
+            'core.replicas.random.choice', side_effect=['other', 'replica']
+        ) as choice:
+            with replica_reads():
+                chosen = {router.db_for_read(Post) for _ in range(5)}
+            with replica_reads():
+                self.assertEqual(router.db_for_read(Post), 'replica')
+        self.assertEqual(chosen, {'other'})
+        self.assertEqual(choice.call_count, 2)
+
+
+@mock.patch('posts.caching.used_replica', return_value=True)
+class ReplicaPageCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_replica_page_is_rebuilt_once(self, used_replica):
+        """Страница с реплики пересобирается один раз после REPLICA_MAX_LAG."""
+        url = reverse('posts:index')
+        self.assertTemplateUsed(self.client.get(url), 'posts/index.html')
+        self.assertTemplateNotUsed(self.client.get(url), 'posts/index.html')
+        later = time.time() + 10
+        with mock.patch('posts.caching.time.time', return_value=later):
+            self.assertTemplateUsed(
+                self.client.get(url), 'posts/index.html'
+            )
+        self.assertTemplateNotUsed(self.client.get(url), 'posts/index.html')
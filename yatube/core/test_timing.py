@@ -0,0 +1,84 @@
+import json
+import re
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Post
+
+from .timing import RequestTimings, timed
+
+User = get_user_model()
+
+ENTRY = re.compile(r'(?P<name>[\w-]+)(?:;dur=(?P<dur>[\d.]+))?')
+
+
+def server_timing(response):
+    return {
+        match['name']: match['dur']
+        for match in map(ENTRY.match, response['Server-Timing'].split(', '))
+    }
+
+
+class ServerTimingTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        Post.objects.create(author=cls.user, text='Тестовый пост')
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+
+    def test_header_breaks_down_request(self):
+        """Холодная страница тратит время на SQL, шаблон и кеш."""
+        response = self.client.get(reverse('posts:index'))
+        timing = server_timing(response)
+        self.assertLessEqual(
+            {'db', 'template', 'cache', 'cache-hit', 'total'}, set(timing)
+        )
+        self.assertGreaterEqual(float(timing['total']), float(timing['db']))
+        self.assertIn('misses', response['Server-Timing'])
+
+    def test_header_only_for_staff_and_internal_ips(self):
+        """Посторонним заголовок не показывает устройство сайта."""
+        url = reverse('posts:index')
+        outside = {'REMOTE_ADDR': '203.0.113.1'}
+        self.assertNotIn('Server-Timing', self.client.get(url, **outside))
+        self.client.force_login(self.user)
+        self.assertNotIn('Server-Timing', self.client.get(url, **outside))
+        staff = User.objects.create_user(username='staff', is_staff=True)
+        self.client.force_login(staff)
+        self.assertIn('Server-Timing', self.client.get(url, **outside))
+
+    def test_cached_page_skips_database(self):
+        """Страница из кеша не ходит в базу; шаблоны — только дырки."""
+        url = reverse('posts:index')
+        cold = server_timing(self.client.get(url))
+        warm = server_timing(self.client.get(url))
+        self.assertNotIn('db', warm)
+        self.assertLess(float(warm['template']), float(cold['template']))
+
+    @override_settings(SERVER_TIMING_SAMPLE_RATE=1)
+    def test_sampled_request_is_logged(self):
+        with self.assertLogs('core.timing', 'INFO') as logs:
+            self.client.get(reverse('posts:index'))
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(record['path'], '/')
+        self.assertEqual(record['status'], 200)
+        self.assertGreater(record['metrics']['db']['count'], 0)
+        queries = [query['sql'] for query in record['slow_queries']]
+        self.assertTrue(any('posts_post' in sql for sql in queries))
+
+    def test_timed_without_request_is_noop(self):
+        with timed('db'):
+            pass
+        timings = RequestTimings()
+        timings.add('thumbnail', 0.0025)
+        self.assertEqual(
+            timings.header(0.01),
+            'thumbnail;dur=2.5;desc="1 calls", total;dur=10.0',
+        )
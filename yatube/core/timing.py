@@ -0,0 +1,202 @@
+"""Разбивка времени запроса: SQL, шаблоны, кеш и миниатюры.
+
+Пока запрос идёт через ServerTimingMiddleware, у потока есть объект
+RequestTimings; timed() и count() пишут в него, а без него ничего не
+делают. Итог уходит в заголовок Server-Timing — только сотрудникам и
+адресам из INTERNAL_IPS, — а доля
+SERVER_TIMING_SAMPLE_RATE запросов — целиком в журнал core.timing.
+Метрики могут пересекаться: кеш читается и во время рендеринга.
+"""
+import json
+import logging
+import random
+import threading
+import time
+from collections import defaultdict
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.template.backends import django as django_backend
+
+logger = logging.getLogger(__name__)
+
+# Имя в заголовке и подпись к числу событий.
+METRICS = (
+    ('db', 'queries'),
+    ('template', 'renders'),
+    ('cache', 'lookups'),
+    ('thumbnail', 'calls'),
+)
+SQL_PREVIEW = 200
+
+_state = threading.local()
+
+
+class RequestTimings:
+    """Время и число событий по метрикам одного запроса.
+
+    У запроса из выборки ещё копятся тексты SQL с их временем, чтобы в
+    журнал попали самые медленные.
+    """
+
+    def __init__(self, sampled=False):
+        self.sampled = sampled
+        self.durations = defaultdict(float)
+        self.counts = defaultdict(int)
+        self.queries = []
+
+    def add(self, metric, seconds):
+        self.durations[metric] += seconds
+        self.counts[metric] += 1
+
+    def execute(self, execute, sql, params, many, context):
+        """Обёртка connection.execute_wrapper для метрики db."""
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - start
+            self.add('db', elapsed)
+            if self.sampled:
+                self.queries.append((elapsed, sql[:SQL_PREVIEW]))
+
+    def header(self, total):
+        """Значение Server-Timing; время в миллисекундах."""
+        parts = []
+        for metric, unit in METRICS:
+            if metric in self.counts:
+                parts.append(
+                    f'{metric};dur={self.durations[metric] * 1000:.1f};'
+                    f'desc="{self.counts[metric]} {unit}"'
+                )
+        if 'cache_hits' in self.counts or 'cache_misses' in self.counts:
+            parts.append(
+                f'cache-hit;desc="{self.counts["cache_hits"]} hits '
+                f'{self.counts["cache_misses"]} misses"'
+            )
+        parts.append(f'total;dur={total * 1000:.1f}')
+        return ', '.join(parts)
+
+    def record(self, request, response, total):
+        """Разбивка для журнала: метрики и самые медленные запросы SQL."""
+        slowest = sorted(self.queries, reverse=True)
+        return {
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'total_ms': round(total * 1000, 2),
+            'metrics': {
+                metric: {
+                    'ms': round(self.durations[metric] * 1000, 2),
+                    'count': self.counts[metric],
+                }
+                for metric, _ in METRICS
+                if metric in self.counts
+            },
+            'cache_hits': self.counts['cache_hits'],
+            'cache_misses': self.counts['cache_misses'],
+            'slow_queries': [
+                {'ms': round(elapsed * 1000, 2), 'sql': sql}
+                for elapsed, sql in slowest[
+                    : settings.SERVER_TIMING_SLOW_QUERIES
+                ]
+            ],
+        }
+
+
+def current():
+    return getattr(_state, 'timings', None)
+
+
+@contextmanager
+def timed(metric):
+    """Добавляет время блока к метрике текущего запроса, если она пишется."""
+    timings = current()
+    if timings is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.add(metric, time.perf_counter() - start)
+
+
+def count(name, amount=1):
+    timings = current()
+    if timings is not None:
+        timings.counts[name] += amount
+
+
+class Template(django_backend.Template):
+    def render(self, context=None, request=None):
+        with timed('template'):
+            return super().render(context, request)
+
+
+class DjangoTemplates(django_backend.DjangoTemplates):
+    """Шаблонный бэкенд Django, который считает время рендеринга.
+
+    Меряются только шаблоны, отданные бэкендом: include внутри них
+    рендерится в их же времени и второй раз не считается.
+    """
+
+    def from_string(self, template_code):
+        return Template(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        return Template(super().get_template(template_name).template, self)
+
+
+class ServerTimingMiddleware:
+    """Ставит Server-Timing и выборочно пишет разбивку запроса в журнал.
+
+    Заголовок раскрывает устройство сайта и нагрузку на него, поэтому его
+    получают только сотрудники и адреса из INTERNAL_IPS.
+    Стоит первым в MIDDLEWARE, чтобы total включал всю обработку.
+    Запросы SQL считаются на всех соединениях потока, включая реплики.
+    При SERVER_TIMING = False middleware отключается целиком.
+    """
+
+    def __init__(self, get_response):
+        if not settings.SERVER_TIMING:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    @staticmethod
+    def shows_timing(request):
+        user = getattr(request, 'user', None)
+        return (
+            request.META.get('REMOTE_ADDR') in settings.INTERNAL_IPS
+            or getattr(user, 'is_staff', False)
+        )
+
+    def __call__(self, request):
+        timings = RequestTimings(
+            sampled=random.random() < settings.SERVER_TIMING_SAMPLE_RATE
+        )
+        previous = current()
+        _state.timings = timings
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for alias in connections:
+                    stack.enter_context(
+                        connections[alias].execute_wrapper(timings.execute)
+                    )
+                response = self.get_response(request)
+        finally:
+            _state.timings = previous
+        total = time.perf_counter() - start
+        if self.shows_timing(request):
+            response['Server-Timing'] = timings.header(total)
+        if timings.sampled:
+            logger.info(
+                json.dumps(
+                    timings.record(request, response, total),
+                    ensure_ascii=False,
+                )
+            )
+        return response
@@ -1,3 +1,6 @@
+from django.contrib.admin.views.decorators import staff_member_required
+from django.core.cache import cache
+from django.http import JsonResponse
 from django.shortcuts import render
 
 
@@ -15,3 +18,10 @@ def server_error(request):
 
 def permission_denied(request, exception):
     return render(request, 'core/403.html', status=403)
+
+
+@staff_member_required
+def cache_stats(request):
+    """Счётчики уровней кеша текущего процесса для мониторинга."""
+    stats = getattr(cache, 'stats', dict)()
+    return JsonResponse(stats)
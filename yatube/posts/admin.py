@@ -1,7 +1,8 @@
 from django.conf import settings
 from django.contrib import admin
 
-from .models import Comment, Follow, Group, Post
+from .models import Comment, Follow, Group, Post, StoredImage
+from .search import match_expression, matching_posts
 
 
 class PostAdmin(admin.ModelAdmin):
@@ -17,6 +18,12 @@ class PostAdmin(admin.ModelAdmin):
     list_filter = ('pub_date',)
     empty_value_display = settings.EMPTY_VALUE
 
+    def get_search_results(self, request, queryset, search_term):
+        """Ищет по полнотекстовому индексу вместо LIKE по всей таблице."""
+        if not match_expression(search_term):
+            return queryset, False
+        return queryset.filter(pk__in=matching_posts(search_term)), False
+
 
 class GroupAdmin(admin.ModelAdmin):
     list_display = (
@@ -53,7 +60,19 @@ class FollowAdmin(admin.ModelAdmin):
     empty_value_display = settings.EMPTY_VALUE
 
 
+class StoredImageAdmin(admin.ModelAdmin):
+    list_display = (
+        'pk',
+        'name',
+        'references',
+    )
+    readonly_fields = ('name', 'references')
+    search_fields = ('name',)
+    empty_value_display = settings.EMPTY_VALUE
+
+
 admin.site.register(Post, PostAdmin)
 admin.site.register(Group, GroupAdmin)
 admin.site.register(Comment, CommentAdmin)
 admin.site.register(Follow, FollowAdmin)
+admin.site.register(StoredImage, StoredImageAdmin)
@@ -0,0 +1,244 @@
+from functools import wraps
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.http import Http404, JsonResponse
+from django.shortcuts import get_object_or_404
+from django.views.decorators.http import condition, require_GET
+
+from .caching import (ALL_FEEDS, COMMENT_COUNTS, cache_feed, group_scope,
+                      post_page_scopes)
+from .freshness import feed_etag, post_etag, post_state
+from .models import Comment, Group, Post
+from .timeline import FollowFeedPaginator
+from .utils import CursorPaginator
+
+User = get_user_model()
+
+# Поле ответа -> (поля модели для only(), связь для select_related).
+POST_FIELDS = {
+    'id': (('id',), None),
+    'text': (('text',), None),
+    'pub_date': (('pub_date',), None),
+    'modified': (('modified',), None),
+    'author': (('author__username',), 'author'),
+    'group': (('group__slug',), 'group'),
+    'image': (('image', 'image_width', 'image_height'), None),
+    'comments_count': (('comments_count',), None),
+}
+COMMENT_FIELDS = {
+    'id': (('id',), None),
+    'text': (('text',), None),
+    'created': (('created',), None),
+    'author': (('author__username',), 'author'),
+}
+
+
+class FieldsError(ValueError):
+    pass
+
+
+class CommentPaginator(CursorPaginator):
+    date_field = 'created'
+
+
+def api_view(view):
+    """GET-view API: 404 и ошибки параметров отдаются в JSON."""
+
+    @require_GET
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        try:
+            return view(request, *args, **kwargs)
+        except Http404:
+            return JsonResponse({'detail': 'Не найдено'}, status=404)
+        except FieldsError as error:
+            return JsonResponse({'detail': str(error)}, status=400)
+
+    return wrapper
+
+
+def api_login_required(view):
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if not request.user.is_authenticated:
+            return JsonResponse(
+                {'detail': 'Нужна авторизация'}, status=401
+            )
+        return view(request, *args, **kwargs)
+
+    return wrapper
+
+
+def requested_fields(request, spec):
+    """Поля из ?fields=a,b; без параметра — все.
+
+    Возвращает (поля ответа, поля для only(), связи для select_related).
+    Ключ курсора нужен пагинатору всегда, поэтому он загружается, даже
+    если не запрошен.
+    """
+    raw = request.GET.get('fields')
+    names = [name for name in raw.split(',') if name] if raw else list(spec)
+    unknown = sorted(set(names) - set(spec))
+    if unknown:
+        raise FieldsError(f'Неизвестные поля: {", ".join(unknown)}')
+    only = {'id', 'created' if 'created' in spec else 'pub_date'}
+    related = []
+    for name in names:
+        model_fields, relation = spec[name]
+        only.update(model_fields)
+        if relation:
+            related.append(relation)
+    return names, sorted(only), related
+
+
+def serialize_post(post, names):
+    data = {}
+    for name in names:
+        if name == 'author':
+            data[name] = post.author.username
+        elif name == 'group':
+            data[name] = post.group.slug if post.group_id else None
+        elif name == 'image':
+            data[name] = (
+                {
+                    'url': post.image.url,
+                    'width': post.image_width,
+                    'height': post.image_height,
+                }
+                if post.image
+                else None
+            )
+        else:
+            data[name] = getattr(post, name)
+    return data
+
+
+def serialize_comment(comment, names):
+    return {
+        name: (
+            comment.author.username
+            if name == 'author'
+            else getattr(comment, name)
+        )
+        for name in names
+    }
+
+
+def page_url(request, cursor):
+    if cursor is None:
+        return None
+    query = request.GET.copy()
+    query.pop('page', None)
+    query['cursor'] = cursor
+    return f'{request.path}?{query.urlencode()}'
+
+
+def page_response(request, page, serialize, names):
+    return JsonResponse(
+        {
+            'results': [serialize(item, names) for item in page],
+            'next': page_url(request, page.next_cursor),
+            'previous': page_url(request, page.previous_cursor),
+        },
+        json_dumps_params={'ensure_ascii': False},
+    )
+
+
+def select(queryset, only, related):
+    # select_related() без аргументов тянет все внешние ключи.
+    if related:
+        queryset = queryset.select_related(*related)
+    return queryset.only(*only)
+
+
+def counted(scope=None):
+    """Области ленты API: её посты ещё и показывают comments_count."""
+
+    def scopes(**kwargs):
+        return (scope(**kwargs) if scope else ALL_FEEDS, COMMENT_COUNTS)
+
+    return scopes
+
+
+def cursor_page(queryset, request, paginator_class, **kwargs):
+    """Страница по курсору; ?page= у API нет и игнорируется."""
+    paginator = paginator_class(queryset, settings.NUMBER_OF_PAGES, **kwargs)
+    return paginator.get_cursor_page(request.GET.get('cursor'))
+
+
+def post_feed(request, posts):
+    names, only, related = requested_fields(request, POST_FIELDS)
+    posts = select(posts, only, related)
+    page = cursor_page(posts, request, CursorPaginator)
+    return page_response(request, page, serialize_post, names)
+
+
+@api_view
+@condition(etag_func=feed_etag(counted()))
+@cache_feed(counted())
+def index(request):
+    return post_feed(request, Post.objects.all())
+
+
+@api_view
+@condition(etag_func=feed_etag(counted(group_scope)))
+@cache_feed(counted(group_scope))
+def group_posts(request, slug):
+    group = get_object_or_404(Group.objects.only('pk'), slug=slug)
+    return post_feed(request, Post.objects.filter(group=group))
+
+
+@api_view
+@condition(etag_func=feed_etag(counted()))
+@cache_feed(counted())
+def profile(request, username):
+    author = get_object_or_404(User.objects.only('pk'), username=username)
+    return post_feed(request, Post.objects.filter(author=author))
+
+
+@api_view
+@api_login_required
+@condition(etag_func=feed_etag(counted(), per_user=True))
+@cache_feed(counted(), per_user=True)
+def follow_index(request):
+    names, only, related = requested_fields(request, POST_FIELDS)
+    page = cursor_page(
+        select(
+            Post.objects.filter(author__following__user=request.user),
+            only,
+            related,
+        ),
+        request,
+        FollowFeedPaginator,
+        user=request.user,
+        related=related,
+        fields=only,
+    )
+    return page_response(request, page, serialize_post, names)
+
+
+@api_view
+@condition(etag_func=post_etag)
+@cache_feed(post_page_scopes)
+def post_detail(request, post_id):
+    names, only, related = requested_fields(request, POST_FIELDS)
+    post = get_object_or_404(
+        select(Post.objects.all(), only, related), pk=post_id
+    )
+    return JsonResponse(
+        serialize_post(post, names), json_dumps_params={'ensure_ascii': False}
+    )
+
+
+@api_view
+@condition(etag_func=post_etag)
+@cache_feed(post_page_scopes)
+def post_comments(request, post_id):
+    names, only, related = requested_fields(request, COMMENT_FIELDS)
+    # Существование поста уже проверил запрос состояния для ETag.
+    if post_state(request, post_id) is None:
+        raise Http404
+    comments = select(Comment.objects.filter(post_id=post_id), only, related)
+    page = cursor_page(comments, request, CommentPaginator)
+    return page_response(request, page, serialize_comment, names)
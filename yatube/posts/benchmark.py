@@ -0,0 +1,249 @@
+"""Замеры горячих страниц через тестовый клиент Django.
+
+Запросы проходят весь стек middleware, как в работе, но без сети.
+Время, число запросов к базе и пик выделенной памяти считаются для
+каждой страницы отдельно; результаты сохраняются в JSON и сравниваются
+с базовым прогоном.
+"""
+import math
+import platform
+import time
+import tracemalloc
+from contextlib import contextmanager
+from itertools import count
+
+import django
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Max
+from django.test import Client, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from .models import Comment, Group, Post
+
+User = get_user_model()
+
+PERCENTILES = (50, 95, 99)
+LATENCIES = tuple(f'p{percent}_ms' for percent in PERCENTILES)
+MEMORY_SAMPLES = 5
+
+
+class BenchmarkError(Exception):
+    pass
+
+
+def percentile(values, percent):
+    """Процентиль по ближайшему рангу: значение из самой выборки."""
+    ordered = sorted(values)
+    rank = max(math.ceil(percent / 100 * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+class QueryCounter:
+    """Обёртка execute_wrapper: считает запросы без журнала DEBUG."""
+
+    def __init__(self):
+        self.queries = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.queries += 1
+        return execute(sql, params, many, context)
+
+
+def targets():
+    """Самые тяжёлые объекты базы: на них страницы медленнее всего."""
+    reader = (
+        User.objects.filter(profile__isnull=False)
+        .order_by('-profile__following_count', 'pk')
+        .first()
+    )
+    author = (
+        User.objects.filter(profile__isnull=False)
+        .order_by('-profile__posts_count', 'pk')
+        .first()
+    )
+    group = Group.objects.order_by('-posts_count', 'pk').first()
+    post = Post.objects.order_by('-comments_count', 'pk').first()
+    if None in (reader, author, group, post):
+        raise BenchmarkError(
+            'В базе нет постов, групп или профилей: сначала manage.py seed.'
+        )
+    return reader, author, group, post
+
+
+def scenarios():
+    """Читатель и сценарии (имя, метод, адрес, данные формы).
+
+    Данные — функция: тексты новых постов и комментариев различаются,
+    чтобы каждая запись была настоящей.
+    """
+    reader, author, group, post = targets()
+    numbers = count()
+
+    def text():
+        return {'text': f'Замер {next(numbers)}', 'group': group.pk}
+
+    return reader, [
+        ('index', 'get', reverse('posts:index'), None),
+        (
+            'group_posts',
+            'get',
+            reverse('posts:group_list', kwargs={'slug': group.slug}),
+            None,
+        ),
+        (
+            'profile',
+            'get',
+            reverse('posts:profile', kwargs={'username': author.username}),
+            None,
+        ),
+        (
+            'post_detail',
+            'get',
+            reverse('posts:post_detail', kwargs={'post_id': post.pk}),
+            None,
+        ),
+        ('follow_index', 'get', reverse('posts:follow_index'), None),
+        ('post_create', 'post', reverse('posts:post_create'), text),
+        (
+            'add_comment',
+            'post',
+            reverse('posts:add_comment', kwargs={'post_id': post.pk}),
+            text,
+        ),
+    ]
+
+
+@contextmanager
+def discard_writes(author):
+    """Удаляет посты и комментарии автора, созданные внутри блока.
+
+    Замер пишет по-настоящему: с коммитом, on_commit и повторами при
+    блокировке, как в работе, и не держит блокировку записи всё время.
+    Удаление идёт через ORM, поэтому сигналы возвращают счётчики, ленты
+    и поисковый индекс.
+    """
+    last_post = Post.objects.aggregate(last=Max('pk'))['last'] or 0
+    last_comment = Comment.objects.aggregate(last=Max('pk'))['last'] or 0
+    try:
+        yield
+    finally:
+        Comment.objects.filter(author=author, pk__gt=last_comment).delete()
+        Post.objects.filter(author=author, pk__gt=last_post).delete()
+
+
+class Benchmark:
+    """Гоняет сценарии и собирает метрики по каждому.
+
+    С cold=True кеш очищается перед каждым запросом: так видна цена
+    страницы без кеша. Без него первые warmup запросов не считаются.
+    """
+
+    def __init__(self, iterations=100, warmup=10, cold=False):
+        if iterations < 1:
+            raise BenchmarkError('Нужна хотя бы одна итерация.')
+        self.iterations = iterations
+        self.warmup = warmup
+        self.cold = cold
+
+    def request(self, client, name, method, url, data):
+        if self.cold:
+            cache.clear()
+        response = getattr(client, method)(url, data() if data else None)
+        if response.status_code >= 400:
+            raise BenchmarkError(
+                f'{name} {url}: ответ {response.status_code}'
+            )
+
+    def measure(self, client, *scenario):
+        for _ in range(self.warmup):
+            self.request(client, *scenario)
+        timings, queries = [], []
+        counter = QueryCounter()
+        with connection.execute_wrapper(counter):
+            for _ in range(self.iterations):
+                counter.queries = 0
+                start = time.perf_counter()
+                self.request(client, *scenario)
+                timings.append((time.perf_counter() - start) * 1000)
+                queries.append(counter.queries)
+        # tracemalloc замедляет Python в разы, поэтому память меряется
+        # отдельными запросами, а не во время замера времени.
+        peaks = []
+        for _ in range(MEMORY_SAMPLES):
+            tracemalloc.start()
+            try:
+                self.request(client, *scenario)
+                peaks.append(tracemalloc.get_traced_memory()[1])
+            finally:
+                tracemalloc.stop()
+        metrics = {
+            metric: round(percentile(timings, percent), 3)
+            for metric, percent in zip(LATENCIES, PERCENTILES)
+        }
+        metrics['queries'] = max(queries)
+        metrics['memory_kb'] = round(percentile(peaks, 50) / 1024, 1)
+        return metrics
+
+    def run(self, only=None):
+        """Результаты для JSON: условия прогона и метрики страниц.
+
+        DEBUG выключается: иначе в ответы встраивается debug_toolbar,
+        а каждый запрос к базе пишется в журнал.
+        """
+        posts = Post.objects.count()
+        with override_settings(DEBUG=False):
+            reader, cases = scenarios()
+            client = Client()
+            client.force_login(reader)
+            with discard_writes(reader):
+                views = {
+                    scenario[0]: self.measure(client, *scenario)
+                    for scenario in cases
+                    if not only or scenario[0] in only
+                }
+            client.logout()
+        return {
+            'meta': {
+                'created': timezone.now().isoformat(),
+                'iterations': self.iterations,
+                'warmup': self.warmup,
+                'cold': self.cold,
+                'posts': posts,
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'database': connection.vendor,
+            },
+            'views': views,
+        }
+
+
+def compare(results, baseline, tolerance=0.2, min_delta_ms=0.5):
+    """Регрессии относительно базового прогона, по строке на метрику.
+
+    Время и память могут вырасти на долю tolerance, время — ещё и на
+    min_delta_ms, чтобы шум доли миллисекунды не ронял проверку. Число
+    запросов к базе расти не может вовсе.
+    """
+    regressions = []
+    for view, before in baseline['views'].items():
+        after = results['views'].get(view)
+        if after is None:
+            continue
+        for metric in LATENCIES + ('memory_kb',):
+            limit = before[metric] * (1 + tolerance)
+            if metric in LATENCIES:
+                limit = max(limit, before[metric] + min_delta_ms)
+            if after[metric] > limit:
+                regressions.append(
+                    f'{view}.{metric}: {after[metric]} '
+                    f'при базовом {before[metric]}'
+                )
+        if after['queries'] > before['queries']:
+            regressions.append(
+                f'{view}.queries: {after["queries"]} '
+                f'при базовом {before["queries"]}'
+            )
+    return regressions
@@ -0,0 +1,208 @@
+import random
+import time
+from functools import wraps
+from hashlib import md5
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+
+from core.holes import fill_holes
+from core.replicas import used_replica
+
+POST_CARD_FRAGMENT = 'post_card'
+FEED_GENERATION_KEY = 'feed:generation'
+ALL_FEEDS = 'all'
+# Число комментариев постов: его показывают ленты API.
+COMMENT_COUNTS = 'comments'
+# Тексты комментариев в поисковом индексе: от них зависят результаты.
+SEARCH_RESULTS = 'search'
+# Меняется вместе с форматом записи cache_feed: старые записи в общем
+# кеше переживают выкладку, и их нельзя читать новым кодом.
+FEED_CACHE_VERSION = 2
+
+
+def post_card_version(post):
+    """Всё, что показывает карточка, кроме миниатюры.
+
+    Правка поста, имени автора или группы даёт карточке новый ключ,
+    поэтому старый сбрасывать не нужно: он истечёт по POST_CARD_TIMEOUT.
+    """
+    author, group = post.author, post.group
+    return ':'.join(
+        map(
+            str,
+            (
+                post.modified.timestamp(),
+                post.image.name,
+                author.username,
+                author.get_full_name(),
+                group.slug if group else '',
+                group.title if group else '',
+            ),
+        )
+    )
+
+
+def post_card_key(post):
+    """Ключ фрагмента includes/ul.html для поста."""
+    return make_template_fragment_key(
+        POST_CARD_FRAGMENT, [post.pk, post_card_version(post)]
+    )
+
+
+def invalidate_post_cards(posts):
+    """Сбрасывает карточки постов пачками.
+
+    Нужно, когда меняется то, чего нет в версии карточки: миниатюра.
+    Посты должны прийти с автором и группой.
+    """
+    keys = []
+    for post in posts:
+        keys.append(post_card_key(post))
+        if len(keys) >= settings.POST_CARD_INVALIDATE_BATCH:
+            cache.delete_many(keys)
+            keys = []
+    if keys:
+        cache.delete_many(keys)
+
+
+def generation_key(scope):
+    return f'{FEED_GENERATION_KEY}:{scope}'
+
+
+def group_scope(slug):
+    """Область поколения страниц одной группы."""
+    return f'group:{slug}'
+
+
+def post_scope(post_id):
+    """Область страницы поста: её комментарии и миниатюра."""
+    return f'post:{post_id}'
+
+
+def user_scope(user_id):
+    """Область страниц, собранных для пользователя: его подписки."""
+    return f'user:{user_id}'
+
+
+def post_page_scopes(post_id):
+    """Страница поста зависит от общих лент: там правки поста, группы и
+    счётчики автора, — и от своей области."""
+    return (ALL_FEEDS, post_scope(post_id))
+
+
+def search_scopes():
+    """Результаты поиска зависят от постов и от комментариев к ним."""
+    return (ALL_FEEDS, SEARCH_RESULTS)
+
+
+def feed_generation(scope=ALL_FEEDS):
+    """Текущее поколение области лент; меняется при изменении контента.
+
+    Пропавший счётчик начинается со случайного числа, чтобы не совпасть
+    с поколением, записанным в старых страницах.
+    """
+    key = generation_key(scope)
+    cache.add(key, random.getrandbits(48), None)
+    return cache.get(key)
+
+
+def page_generation(request, kwargs, scope=None, per_user=False):
+    """Поколения всех областей, от которых зависит страница.
+
+    scope получает именованные аргументы view и возвращает область или
+    кортеж областей; без него страница зависит от общего поколения лент.
+    Страница per_user зависит ещё и от области своего пользователя.
+    """
+    scopes = scope(**kwargs) if scope else ALL_FEEDS
+    if isinstance(scopes, str):
+        scopes = (scopes,)
+    if per_user:
+        scopes += (user_scope(request.user.pk),)
+    return tuple(map(feed_generation, scopes))
+
+
+def bump_generation(*scopes):
+    """Делает устаревшими страницы только указанных областей."""
+    for scope in scopes:
+        try:
+            cache.incr(generation_key(scope))
+        except ValueError:
+            cache.add(generation_key(scope), random.getrandbits(48), None)
+
+
+def bump_feed_generation(*scopes):
+    """Делает устаревшими общие ленты и страницы указанных областей."""
+    bump_generation(ALL_FEEDS, *scopes)
+
+
+def feed_cache_key(request, per_user=False):
+    path = md5(request.get_full_path().encode()).hexdigest()
+    owner = request.user.pk or 0 if per_user else 'shared'
+    return f'feed:v{FEED_CACHE_VERSION}:{owner}:{path}'
+
+
+def cache_feed(scope=None, per_user=False):
+    """Кеширует страницу ленты до смены поколения её области.
+
+    Области страницы задают scope и per_user, см. page_generation.
+    Страница собирается с метками на месте {% hole %} и одна на всех
+    пользователей; фрагменты для пользователя подставляются при каждом
+    ответе. per_user нужен страницам, где от пользователя зависит сам
+    список постов.
+    Запись хранит поколение, на котором была собрана. Устаревшую страницу
+    пересобирает только запрос, захвативший блокировку через cache.add,
+    остальные в это время получают предыдущую версию. Без записи в кеше
+    отдать нечего, поэтому такой запрос собирает страницу без блокировки
+    и чужую блокировку не снимает. Блокировка исключительна, только если
+    add общего кеша атомарен. На FileBasedCache два процесса изредка
+    собирают страницу оба: это лишняя работа, но не ошибка.
+    Страница, прочитанная с реплики, могла не застать запись, которая
+    сменила поколение, поэтому через REPLICA_MAX_LAG секунд её один раз
+    собирают заново: к этому времени реплика её догнала.
+    """
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method != 'GET':
+                return view(request, *args, **kwargs)
+            request.punch_holes = True
+            key = feed_cache_key(request, per_user)
+            lock_key = f'{key}:lock'
+            generation = page_generation(request, kwargs, scope, per_user)
+            cached = cache.get(key)
+            rechecking = locked = False
+            if cached is not None:
+                cached_generation, response, recheck_at = cached
+                if cached_generation == generation:
+                    if recheck_at is None or recheck_at > time.time():
+                        return fill_holes(request, response)
+                    rechecking = True
+                if not cache.add(
+                    lock_key, True, settings.FEED_CACHE_LOCK_TIMEOUT
+                ):
+                    return fill_holes(request, response)
+                locked = True
+            try:
+                response = view(request, *args, **kwargs)
+                if response.status_code == 200:
+                    recheck_at = (
+                        time.time() + settings.REPLICA_MAX_LAG
+                        if used_replica() and not rechecking
+                        else None
+                    )
+                    cache.set(
+                        key,
+                        (generation, response, recheck_at),
+                        settings.FEED_CACHE_TIMEOUT,
+                    )
+            finally:
+                if locked:
+                    cache.delete(lock_key)
+            return fill_holes(request, response)
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,97 @@
+from django.conf import settings
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+# (модель со счётчиком, поле счётчика, считаемая модель, её FK, ключ связи)
+COUNTERS = (
+    ('users.Profile', 'posts_count', 'posts.Post', 'author', 'user'),
+    ('users.Profile', 'followers_count', 'posts.Follow', 'author', 'user'),
+    ('users.Profile', 'following_count', 'posts.Follow', 'user', 'user'),
+    ('posts.Group', 'posts_count', 'posts.Post', 'group', 'pk'),
+    ('posts.Post', 'comments_count', 'posts.Comment', 'post', 'pk'),
+    ('posts.StoredImage', 'references', 'posts.Post', 'image', 'name'),
+)
+BATCH_SIZE = 500
+
+
+def actual_count(source, fk, outer):
+    return Coalesce(
+        Subquery(
+            source.objects.filter(**{fk: OuterRef(outer)})
+            .order_by()
+            .values(fk)
+            .annotate(total=Count('pk'))
+            .values('total')
+        ),
+        0,
+    )
+
+
+def create_missing_profiles(apps):
+    """Создаёт профили пользователям, у которых их нет."""
+    User = apps.get_model(settings.AUTH_USER_MODEL)
+    Profile = apps.get_model('users', 'Profile')
+    missing = User.objects.filter(profile__isnull=True).values_list(
+        'pk', flat=True
+    )
+    return len(
+        Profile.objects.bulk_create(
+            (Profile(user_id=pk) for pk in missing.iterator()),
+            batch_size=BATCH_SIZE,
+        )
+    )
+
+
+def create_missing_stored_images(apps):
+    """Заводит StoredImage для картинок постов, у которых его нет."""
+    Post = apps.get_model('posts', 'Post')
+    StoredImage = apps.get_model('posts', 'StoredImage')
+    missing = (
+        Post.objects.exclude(image='')
+        .exclude(image__in=StoredImage.objects.values('name'))
+        .order_by()
+        .values_list('image', flat=True)
+        .distinct()
+    )
+    return len(
+        StoredImage.objects.bulk_create(
+            (StoredImage(name=name) for name in missing.iterator()),
+            batch_size=BATCH_SIZE,
+        )
+    )
+
+
+def repair_counters(apps, dry_run=False):
+    """Пересчитывает счётчики и возвращает число исправленных строк.
+
+    Возвращает список троек (модель, поле, число расхождений).
+    """
+    report = []
+    for label, field, source_label, fk, outer in COUNTERS:
+        try:
+            model = apps.get_model(label)
+            source = apps.get_model(source_label)
+        except LookupError:
+            # В старых миграциях этой модели ещё нет.
+            continue
+        actual = actual_count(source, fk, outer)
+        drifted = list(
+            model.objects.annotate(actual=actual)
+            .exclude(**{field: F('actual')})
+            .values_list('pk', flat=True)
+        )
+        report.append((label, field, len(drifted)))
+        if dry_run:
+            continue
+        for start in range(0, len(drifted), BATCH_SIZE):
+            model.objects.filter(
+                pk__in=drifted[start:start + BATCH_SIZE]
+            ).update(**{field: actual})
+    return report
+
+
+def shift(queryset, field, delta):
+    """Сдвигает счётчик одним UPDATE через F(), не уходя ниже нуля."""
+    if delta < 0:
+        queryset = queryset.filter(**{f'{field}__gte': -delta})
+    queryset.update(**{field: F(field) + delta})
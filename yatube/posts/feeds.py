@@ -0,0 +1,130 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.syndication.views import Feed
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils.feedgenerator import Atom1Feed
+from django.utils.text import Truncator
+from django.views.decorators.http import conditional_page
+
+from .caching import cache_feed, group_scope
+from .models import Group, Post
+
+User = get_user_model()
+
+
+class LatestPostsFeed(Feed):
+    """RSS последних постов сайта.
+
+    В ленту попадают только SYNDICATION_ITEMS свежих постов, поэтому она
+    собирается одним запросом по индексу pub_date.
+    """
+
+    title = 'Последние обновления на сайте Yatube'
+    description = 'Новые посты всех авторов'
+
+    def link(self, obj):
+        return reverse('posts:index')
+
+    def get_posts(self, obj):
+        return Post.objects.all()
+
+    def items(self, obj):
+        return self.get_posts(obj).select_related('author', 'group')[
+            : settings.SYNDICATION_ITEMS
+        ]
+
+    def item_title(self, item):
+        return Truncator(item.text).words(10)
+
+    def item_description(self, item):
+        return item.text
+
+    def item_link(self, item):
+        return reverse('posts:post_detail', kwargs={'post_id': item.pk})
+
+    def item_author_name(self, item):
+        return item.author.get_full_name() or item.author.username
+
+    def item_categories(self, item):
+        return (item.group.title,) if item.group_id else ()
+
+    def item_pubdate(self, item):
+        return item.pub_date
+
+    def item_updateddate(self, item):
+        return item.modified
+
+
+class GroupPostsFeed(LatestPostsFeed):
+    def get_object(self, request, slug):
+        return get_object_or_404(Group, slug=slug)
+
+    def title(self, obj):
+        return f'{obj.title} — Yatube'
+
+    def description(self, obj):
+        return obj.description
+
+    def link(self, obj):
+        return reverse('posts:group_list', kwargs={'slug': obj.slug})
+
+    def get_posts(self, obj):
+        return obj.posts.all()
+
+
+class AuthorPostsFeed(LatestPostsFeed):
+    def get_object(self, request, username):
+        return get_object_or_404(User, username=username)
+
+    def title(self, obj):
+        return f'Посты {obj.get_full_name() or obj.username} — Yatube'
+
+    def description(self, obj):
+        return f'Новые посты пользователя {obj.username}'
+
+    def link(self, obj):
+        return reverse('posts:profile', kwargs={'username': obj.username})
+
+    def get_posts(self, obj):
+        return obj.posts.all()
+
+
+class AtomFeedMixin:
+    feed_type = Atom1Feed
+
+    def subtitle(self, obj):
+        return self._get_dynamic_attr('description', obj)
+
+
+class LatestPostsAtomFeed(AtomFeedMixin, LatestPostsFeed):
+    pass
+
+
+class GroupPostsAtomFeed(AtomFeedMixin, GroupPostsFeed):
+    pass
+
+
+class AuthorPostsAtomFeed(AtomFeedMixin, AuthorPostsFeed):
+    pass
+
+
+def syndication_view(feed, scope=None):
+    """Ленту собирает cache_feed до смены поколения её области. Его
+    меняют сохранение и удаление поста, правка группы и готовая миниатюра.
+
+    conditional_page ставит ETag по содержимому рядом с Last-Modified от
+    Feed и отвечает 304 на If-None-Match или If-Modified-Since. Опрос
+    неизменной ленты обходится чтением кеша без запросов к базе. Если
+    поколение сменилось, а содержимое ленты нет, например после поста
+    другого автора, лента пересобирается, но ETag остаётся тем же.
+    """
+    return conditional_page(cache_feed(scope)(feed))
+
+
+index_rss = syndication_view(LatestPostsFeed())
+index_atom = syndication_view(LatestPostsAtomFeed())
+group_rss = syndication_view(GroupPostsFeed(), group_scope)
+group_atom = syndication_view(GroupPostsAtomFeed(), group_scope)
+author_rss = syndication_view(AuthorPostsFeed())
+author_atom = syndication_view(AuthorPostsAtomFeed())
@@ -1,5 +1,7 @@
 from django import forms
+from django.core.files.uploadedfile import UploadedFile
 
+from .images import EMPTY_IMAGE_METADATA, image_metadata, normalize_image
 from .models import Comment, Post
 
 
@@ -10,6 +12,21 @@ class PostForm(forms.ModelForm):
         model = Post
         fields = ('text', 'group', 'image')
 
+    def clean_image(self):
+        """Приводит загруженную картинку к нужному виду и запоминает
+        её размеры, вес и хеш."""
+        image = self.cleaned_data.get('image')
+        if isinstance(image, UploadedFile):
+            image = normalize_image(image)
+            metadata = image_metadata(image)
+        elif not image:
+            metadata = EMPTY_IMAGE_METADATA
+        else:
+            return image
+        for field, value in metadata.items():
+            setattr(self.instance, field, value)
+        return image
+
 
 class CommentForm(forms.ModelForm):
     """Форма для добавления комментария."""
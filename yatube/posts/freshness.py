@@ -0,0 +1,63 @@
+from hashlib import md5
+
+from .caching import page_generation, post_page_scopes
+from .models import Post
+
+
+def make_etag(*parts):
+    return md5(':'.join(map(str, parts)).encode()).hexdigest()
+
+
+def feed_etag(scope=None, per_user=False):
+    """etag_func для condition(): версия страницы ленты без запросов к БД.
+
+    Это поколения областей ленты, по которым живёт и cache_feed, поэтому
+    ETag меняется и при удалении поста, которое не сдвинуло бы
+    максимальную дату. Шапка и кнопки зависят от пользователя.
+    """
+
+    def etag(request, *args, **kwargs):
+        generation = page_generation(request, kwargs, scope, per_user)
+        return make_etag(request.user.pk, request.get_full_path(), generation)
+
+    return etag
+
+
+def post_state(request, post_id):
+    """Поля поста, от которых зависит его страница, одним запросом.
+
+    Результат запоминается в запросе: его читает и ETag, и API
+    комментариев, чтобы проверить, что пост существует.
+    """
+    if not hasattr(request, 'post_state'):
+        request.post_state = (
+            Post.objects.filter(pk=post_id)
+            .order_by()
+            .values_list(
+                'modified',
+                'comments_count',
+                'author__profile__posts_count',
+                'group__title',
+            )
+            .first()
+        )
+    return request.post_state
+
+
+def post_etag(request, post_id):
+    """etag_func страницы поста: её поля и поколения, по которым она живёт
+    в cache_feed.
+
+    Готовая миниатюра и правка комментария не меняют полей поста, но
+    меняют поколения. Last-Modified у страницы нет: по датам этого тоже
+    не видно.
+    """
+    state = post_state(request, post_id)
+    if state is None:
+        return None
+    generation = page_generation(
+        request, {'post_id': post_id}, post_page_scopes
+    )
+    return make_etag(
+        request.user.pk, request.get_full_path(), generation, *state
+    )
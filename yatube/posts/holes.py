@@ -0,0 +1,53 @@
+from django.template.loader import render_to_string
+
+from core.holes import register
+
+from .forms import CommentForm
+from .models import Follow
+
+
+@register('switcher')
+def switcher(request, **context):
+    return render_to_string(
+        'posts/includes/switcher.html', context, request=request
+    )
+
+
+@register('follow_button')
+def follow_button(request, username):
+    user = request.user
+    if user.username == username:
+        return ''
+    following = (
+        user.is_authenticated
+        and Follow.objects.filter(
+            user=user, author__username=username
+        ).exists()
+    )
+    return render_to_string(
+        'posts/includes/follow_button.html',
+        {'username': username, 'following': following},
+        request=request,
+    )
+
+
+@register('post_edit_link')
+def post_edit_link(request, post_id, author_id):
+    if request.user.pk != author_id:
+        return ''
+    return render_to_string(
+        'posts/includes/post_edit_link.html',
+        {'post_id': post_id},
+        request=request,
+    )
+
+
+@register('comment_form')
+def comment_form(request, post_id):
+    if not request.user.is_authenticated:
+        return ''
+    return render_to_string(
+        'posts/includes/comment_form.html',
+        {'post_id': post_id, 'form': CommentForm()},
+        request=request,
+    )
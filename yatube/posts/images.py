@@ -0,0 +1,112 @@
+import hashlib
+import os
+from io import BytesIO
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files.base import ContentFile
+from django.core.files.images import get_image_dimensions
+from PIL import Image, ImageOps, features
+
+EXTENSIONS = {'JPEG': '.jpg', 'WEBP': '.webp'}
+
+
+def file_digest(file):
+    """SHA-256 содержимого файла, читаемого кусками."""
+    digest = hashlib.sha256()
+    file.seek(0)
+    for chunk in file.chunks():
+        digest.update(chunk)
+    file.seek(0)
+    return digest.hexdigest()
+
+
+def image_metadata(file):
+    """Размеры, вес и хеш картинки; размеры берутся из заголовка файла."""
+    width, height = get_image_dimensions(file)
+    return {
+        'image_width': width,
+        'image_height': height,
+        'image_size': file.size,
+        'image_sha256': file_digest(file),
+    }
+
+
+EMPTY_IMAGE_METADATA = {
+    'image_width': None,
+    'image_height': None,
+    'image_size': None,
+    'image_sha256': '',
+}
+
+
+def output_format():
+    """POST_IMAGE_FORMAT; без поддержки WebP в Pillow — JPEG."""
+    image_format = settings.POST_IMAGE_FORMAT.upper()
+    if image_format == 'WEBP' and not features.check('webp'):
+        return 'JPEG'
+    return image_format
+
+
+def normalize_image(upload):
+    """Уменьшает картинку, убирает EXIF и перекодирует её.
+
+    Размеры проверяются по заголовку, до декодирования пикселей. JPEG
+    декодируется сразу в уменьшенном масштабе через draft(). Поворот из
+    EXIF применяется к пикселям, сами метаданные не сохраняются. Если
+    уменьшать и чистить нечего, а перекодированный файл не меньше
+    исходного, возвращается исходный.
+    """
+    upload.seek(0)
+    image = Image.open(upload)
+    width, height = image.size
+    if width * height > settings.POST_IMAGE_MAX_PIXELS:
+        raise ValidationError(
+            'Картинка слишком большая: не больше %(limit)s пикселей.',
+            code='too_many_pixels',
+            params={'limit': settings.POST_IMAGE_MAX_PIXELS},
+        )
+    has_exif = 'exif' in image.info
+    max_side = settings.POST_IMAGE_MAX_SIDE
+    image.draft('RGB', (max_side, max_side))
+    image = ImageOps.exif_transpose(image)
+    image.thumbnail((max_side, max_side), Image.LANCZOS)
+    image_format = output_format()
+    has_alpha = image.mode in ('RGBA', 'LA', 'PA') or (
+        'transparency' in image.info
+    )
+    if has_alpha:
+        image = image.convert('RGBA')
+        if image_format == 'JPEG':
+            background = Image.new('RGB', image.size, 'white')
+            background.paste(image, mask=image.getchannel('A'))
+            image = background
+    else:
+        image = image.convert('RGB')
+    output = BytesIO()
+    if image_format == 'JPEG':
+        image.save(
+            output,
+            image_format,
+            quality=settings.POST_IMAGE_QUALITY,
+            optimize=True,
+            progressive=True,
+        )
+    else:
+        image.save(
+            output,
+            image_format,
+            quality=settings.POST_IMAGE_QUALITY,
+            method=6,
+        )
+    if (
+        not has_exif
+        and image.size == (width, height)
+        and output.tell() >= upload.size
+    ):
+        upload.seek(0)
+        return upload
+    name = os.path.splitext(os.path.basename(upload.name))[0]
+    return ContentFile(
+        output.getvalue(), name=f'{name}{EXTENSIONS[image_format]}'
+    )
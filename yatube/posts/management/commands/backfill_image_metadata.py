@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand
+
+from posts.images import image_metadata
+from posts.models import Post
+from posts.storage import post_image_storage
+
+
+class Command(BaseCommand):
+    help = 'Заполняет размеры, вес и хеш картинок у старых постов'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Сколько строк читать из базы за раз',
+        )
+
+    def handle(self, *args, batch_size=500, **options):
+        # values_list, а не модели: при загрузке поста без размеров
+        # ImageField сам открыл бы файл.
+        rows = (
+            Post.objects.exclude(image='')
+            .filter(image_width__isnull=True)
+            .values_list('pk', 'image')
+            .iterator(chunk_size=batch_size)
+        )
+        updated = missing = 0
+        for pk, name in rows:
+            try:
+                with post_image_storage.open(name) as image:
+                    metadata = image_metadata(image)
+            except (OSError, ValueError):
+                missing += 1
+                self.stderr.write(f'Пост {pk}: не удалось прочитать {name}')
+                continue
+            Post.objects.filter(pk=pk).update(**metadata)
+            updated += 1
+        self.stdout.write(f'Обновлено постов: {updated}, пропущено: {missing}')
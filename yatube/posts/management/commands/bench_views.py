@@ -0,0 +1,98 @@
+import json
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.benchmark import LATENCIES, Benchmark, BenchmarkError, compare
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет время, число запросов и память горячих страниц на '
+        'текущей базе и сравнивает с базовым прогоном. Посты и '
+        'комментарии, созданные замером, удаляются, кеш очищается.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=100)
+        parser.add_argument(
+            '--warmup',
+            type=int,
+            default=10,
+            help='Сколько запросов каждой страницы не считать',
+        )
+        parser.add_argument(
+            '--cold',
+            action='store_true',
+            help='Очищать кеш перед каждым запросом',
+        )
+        parser.add_argument(
+            '--view',
+            action='append',
+            dest='views',
+            help='Замерить только эту страницу; можно повторять',
+        )
+        parser.add_argument('--output', help='Куда сохранить результаты JSON')
+        parser.add_argument(
+            '--baseline', help='JSON базового прогона для сравнения'
+        )
+        parser.add_argument(
+            '--tolerance',
+            type=float,
+            default=0.2,
+            help='Допустимый рост времени и памяти, доля от базового',
+        )
+        parser.add_argument(
+            '--min-delta',
+            type=float,
+            default=0.5,
+            help='Рост времени, который всегда считается шумом, мс',
+        )
+
+    def measure(self, options):
+        benchmark = Benchmark(
+            options['iterations'], options['warmup'], options['cold']
+        )
+        try:
+            return benchmark.run(options['views'])
+        finally:
+            # В кеше остались страницы с удалёнными постами.
+            cache.clear()
+
+    def handle(self, *args, **options):
+        baseline = None
+        if options['baseline']:
+            with open(options['baseline'], encoding='utf-8') as file:
+                baseline = json.load(file)
+        try:
+            results = self.measure(options)
+        except BenchmarkError as error:
+            raise CommandError(error)
+        for view, metrics in results['views'].items():
+            latencies = ', '.join(
+                f'{metric[:3]} {metrics[metric]:.1f}' for metric in LATENCIES
+            )
+            self.stdout.write(
+                f'{view:<14} {latencies} мс, запросов {metrics["queries"]}, '
+                f'память {metrics["memory_kb"]:.0f} КБ'
+            )
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                json.dump(results, file, ensure_ascii=False, indent=2)
+        if baseline is None:
+            return
+        for key in ('cold', 'posts'):
+            if baseline['meta'].get(key) != results['meta'][key]:
+                self.stderr.write(
+                    f'Условия отличаются от базовых: {key} '
+                    f'{baseline["meta"].get(key)} -> {results["meta"][key]}'
+                )
+        regressions = compare(
+            results, baseline, options['tolerance'], options['min_delta']
+        )
+        if regressions:
+            raise CommandError(
+                'Регрессии относительно базового прогона:\n'
+                + '\n'.join(regressions)
+            )
+        self.stdout.write('Регрессий нет.')
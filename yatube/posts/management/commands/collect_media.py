@@ -0,0 +1,66 @@
+from collections import Counter
+
+from django.core.management.base import BaseCommand
+
+from posts.media_gc import collect
+
+
+class Command(BaseCommand):
+    help = (
+        'Удаляет картинки без постов, миниатюры без записей sorl '
+        'и недописанные загрузки'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Только показать, что будет удалено',
+        )
+        parser.add_argument(
+            '--rate',
+            type=float,
+            default=None,
+            help='Не больше стольких удалений в секунду (0 — без ограничения)',
+        )
+        parser.add_argument(
+            '--min-age',
+            type=int,
+            default=None,
+            help='Не трогать файлы моложе стольких секунд',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=None,
+            help='Сколько файлов сверять с базой за один запрос',
+        )
+
+    def handle(
+        self,
+        *args,
+        dry_run=False,
+        rate=None,
+        min_age=None,
+        chunk_size=None,
+        **options,
+    ):
+        files = Counter()
+        sizes = Counter()
+        for kind, (name, _, size) in collect(
+            dry_run=dry_run,
+            rate=rate,
+            min_age=min_age,
+            chunk_size=chunk_size,
+        ):
+            files[kind] += 1
+            sizes[kind] += size
+            if dry_run or options['verbosity'] > 1:
+                self.stdout.write(f'{kind}: {name} ({size} байт)')
+        verb = 'Будет удалено' if dry_run else 'Удалено'
+        for kind in sorted(files):
+            self.stdout.write(
+                f'{verb} {kind}: {files[kind]} файлов, {sizes[kind]} байт'
+            )
+        if not files:
+            self.stdout.write('Удалять нечего')
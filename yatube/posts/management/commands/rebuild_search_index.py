@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from posts.search import rebuild_index
+
+
+class Command(BaseCommand):
+    help = 'Заново заполняет полнотекстовый индекс постов и комментариев'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Сколько постов индексировать за один проход',
+        )
+
+    def handle(self, *args, batch_size=500, **options):
+        total = rebuild_index(batch_size=batch_size)
+        self.stdout.write(f'Проиндексировано постов: {total}')
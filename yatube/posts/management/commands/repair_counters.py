@@ -0,0 +1,25 @@
+from django.apps import apps
+from django.core.management.base import BaseCommand
+
+from posts.counters import (create_missing_profiles,
+                            create_missing_stored_images, repair_counters)
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает денормализованные счётчики и исправляет расхождения'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Только показать расхождения, ничего не меняя',
+        )
+
+    def handle(self, *args, dry_run=False, **options):
+        if not dry_run:
+            created = create_missing_profiles(apps)
+            self.stdout.write(f'Создано профилей: {created}')
+            created = create_missing_stored_images(apps)
+            self.stdout.write(f'Заведено файлов картинок: {created}')
+        for label, field, drifted in repair_counters(apps, dry_run):
+            self.stdout.write(f'{label}.{field}: расхождений {drifted}')
@@ -0,0 +1,89 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from posts.seed import Seeder
+
+
+class Command(BaseCommand):
+    help = (
+        'Заполняет базу синтетическими пользователями, группами, постами, '
+        'комментариями и подписками для замеров производительности'
+    )
+
+    def add_arguments(self, parser):
+        for name, default, help_text in (
+            ('users', 10_000, 'Сколько пользователей создать'),
+            ('groups', 200, 'Сколько групп создать'),
+            ('posts', 100_000, 'Сколько постов создать'),
+            ('comments', 300_000, 'Сколько комментариев создать'),
+            ('follows', 200_000, 'Сколько подписок создать, примерно'),
+            ('images', 0, 'Сколько разных картинок сгенерировать'),
+        ):
+            parser.add_argument(
+                f'--{name}', type=int, default=default, help=help_text
+            )
+        parser.add_argument(
+            '--image-ratio',
+            type=float,
+            default=0.2,
+            help='Доля постов с картинкой, если картинки есть',
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=1,
+            help='Зерно генератора: одинаковое зерно даёт одинаковые данные',
+        )
+        parser.add_argument(
+            '--exponent',
+            type=float,
+            default=1.1,
+            help='Показатель закона Ципфа: чем больше, тем сильнее перекос',
+        )
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=365,
+            help='За сколько дней до --end распределить посты',
+        )
+        parser.add_argument(
+            '--end',
+            help='Дата последнего поста в ISO 8601, по умолчанию сейчас',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Сколько строк писать одним INSERT',
+        )
+
+    def handle(self, *args, **options):
+        if options['users'] < 2 and (options['posts'] or options['follows']):
+            raise CommandError('Для постов и подписок нужно два автора.')
+        end = timezone.now()
+        if options['end']:
+            end = parse_datetime(options['end'])
+            if end is None:
+                raise CommandError(f'Не дата: {options["end"]}')
+            if timezone.is_naive(end):
+                end = timezone.make_aware(end)
+        seeder = Seeder(
+            end,
+            seed=options['seed'],
+            days=options['days'],
+            exponent=options['exponent'],
+            batch_size=options['batch_size'],
+            log=self.stdout.write if options['verbosity'] > 1 else None,
+        )
+        created = seeder.run(
+            users=options['users'],
+            groups=options['groups'],
+            posts=options['posts'],
+            comments=options['comments'],
+            follows=options['follows'],
+            images=options['images'],
+            image_ratio=options['image_ratio'],
+        )
+        for name, count in created.items():
+            self.stdout.write(f'{name}: {count}')
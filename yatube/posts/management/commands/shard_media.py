@@ -0,0 +1,86 @@
+import posixpath
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts.caching import bump_feed_generation, group_scope
+from posts.counters import shift
+from posts.models import Post, StoredImage
+from posts.storage import CONTENT_NAME, post_image_storage
+
+
+class Command(BaseCommand):
+    help = 'Переносит картинки постов в раскладку по хешу содержимого'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=100,
+            help='Сколько файлов переносить за одну транзакцию',
+        )
+        parser.add_argument(
+            '--limit',
+            type=int,
+            default=None,
+            help='Остановиться после этого числа файлов',
+        )
+
+    def handle(self, *args, batch_size=100, limit=None, **options):
+        # Перенесённые файлы уже не подходят под выборку, поэтому прерванный
+        # запуск можно просто повторить.
+        pending = (
+            Post.objects.exclude(image='')
+            .exclude(image__regex=CONTENT_NAME.pattern)
+            .order_by('image')
+            .values_list('image', flat=True)
+            .distinct()
+        )
+        moved = failed = 0
+        last = ''
+        while limit is None or moved + failed < limit:
+            size = batch_size
+            if limit is not None:
+                size = min(size, limit - moved - failed)
+            names = list(pending.filter(image__gt=last)[:size])
+            if not names:
+                break
+            last = names[-1]
+            for name in names:
+                if self.move(name):
+                    moved += 1
+                else:
+                    failed += 1
+        self.stdout.write(f'Перенесено файлов: {moved}, ошибок: {failed}')
+
+    def move(self, name):
+        storage = post_image_storage
+        try:
+            with storage.open(name) as source:
+                new_name = storage.save(name, source)
+        except OSError as error:
+            self.stderr.write(f'{name}: {error}')
+            return False
+        digest = posixpath.splitext(posixpath.basename(new_name))[0]
+        with transaction.atomic():
+            posts = list(
+                Post.objects.filter(image=name).values_list(
+                    'pk', 'group__slug'
+                )
+            )
+            pks = [pk for pk, _ in posts]
+            Post.objects.filter(pk__in=pks).update(image=new_name)
+            Post.objects.filter(pk__in=pks, image_sha256='').update(
+                image_sha256=digest
+            )
+            StoredImage.objects.filter(name=name).delete()
+            stored, _ = StoredImage.objects.get_or_create(name=new_name)
+            shift(
+                StoredImage.objects.filter(pk=stored.pk),
+                'references',
+                len(pks),
+            )
+        storage.delete(name)
+        # Имя картинки входит в версию карточки: старые карточки не нужны.
+        bump_feed_generation(*{group_scope(slug) for _, slug in posts if slug})
+        return True
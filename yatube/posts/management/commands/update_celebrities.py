@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from posts.timeline import demote, promote
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает знаменитостей по числу подписчиков и достраивает '
+        'ленты подписчиков тех, кто перестал ими быть. Запускается по cron.'
+    )
+
+    def handle(self, *args, **options):
+        self.stdout.write(f'Новых знаменитостей: {promote()}')
+        demoted = demote()
+        self.stdout.write(f'Перестали быть знаменитостями: {len(demoted)}')
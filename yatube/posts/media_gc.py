@@ -0,0 +1,164 @@
+import os
+import time
+from itertools import islice
+
+from django.conf import settings
+from sorl.thumbnail import default
+from sorl.thumbnail.conf import settings as thumbnail_settings
+from sorl.thumbnail.images import ImageFile
+from sorl.thumbnail.kvstores.base import add_prefix
+from sorl.thumbnail.models import KVStore as KVStoreModel
+
+from .models import Post, StoredImage
+from .storage import TEMP_DIR, post_image_storage
+
+IMAGES = 'image'
+THUMBNAILS = 'thumbnail'
+INCOMING = 'incoming'
+
+
+def walk(storage, directory):
+    """Обходит каталог хранилища, не собирая список файлов в память.
+
+    Возвращает тройки (имя в хранилище, время изменения, размер).
+    """
+    root = storage.path(directory)
+    stack = [root]
+    while stack:
+        try:
+            entries = os.scandir(stack.pop())
+        except FileNotFoundError:
+            continue
+        with entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.is_file(follow_symlinks=False):
+                    stat = entry.stat()
+                    name = os.path.relpath(entry.path, storage.location)
+                    yield (
+                        name.replace(os.sep, '/'),
+                        stat.st_mtime,
+                        stat.st_size,
+                    )
+
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    chunk = list(islice(iterator, size))
+    while chunk:
+        yield chunk
+        chunk = list(islice(iterator, size))
+
+
+def old_enough(files, min_age):
+    deadline = time.time() - min_age
+    return (file for file in files if file[1] < deadline)
+
+
+def orphaned_images(min_age, chunk_size):
+    """Картинки постов, на которые не ссылается ни один пост."""
+    directory = Post._meta.get_field('image').upload_to
+    files = old_enough(walk(post_image_storage, directory), min_age)
+    for chunk in chunked(files, chunk_size):
+        referenced = set(
+            Post.objects.filter(
+                image__in=[name for name, _, _ in chunk]
+            ).values_list('image', flat=True)
+        )
+        for file in chunk:
+            if file[0] not in referenced:
+                yield file
+
+
+def stale_thumbnails(min_age, chunk_size):
+    """Миниатюры, о которых не помнит хранилище ключей sorl."""
+    storage = default.storage
+    files = old_enough(
+        walk(storage, thumbnail_settings.THUMBNAIL_PREFIX), min_age
+    )
+    for chunk in chunked(files, chunk_size):
+        keys = {
+            add_prefix(ImageFile(name, storage).key): (name, mtime, size)
+            for name, mtime, size in chunk
+        }
+        known = set(
+            KVStoreModel.objects.filter(key__in=keys).values_list(
+                'key', flat=True
+            )
+        )
+        for key, file in keys.items():
+            if key not in known:
+                yield file
+
+
+def modified_since(storage, name, mtime):
+    try:
+        return os.stat(storage.path(name)).st_mtime != mtime
+    except FileNotFoundError:
+        return True
+
+
+def delete_image(name, mtime):
+    """Удаляет картинку вместе с её миниатюрами и записями sorl."""
+    # Перепроверка: пока шёл обход, картинку могли загрузить снова.
+    if modified_since(post_image_storage, name, mtime):
+        return False
+    if Post.objects.filter(image=name).exists():
+        return False
+    default.kvstore.delete(ImageFile(name, post_image_storage))
+    post_image_storage.delete(name)
+    StoredImage.objects.filter(name=name, references=0).delete()
+    return True
+
+
+def delete_thumbnail(name, mtime):
+    if modified_since(default.storage, name, mtime):
+        return False
+    default.storage.delete(name)
+    return True
+
+
+def delete_incoming(name, mtime):
+    if modified_since(post_image_storage, name, mtime):
+        return False
+    post_image_storage.delete(name)
+    return True
+
+
+def collect(
+    dry_run=False,
+    rate=None,
+    min_age=None,
+    chunk_size=None,
+):
+    """Находит и удаляет осиротевшие картинки, миниатюры и недописанные
+    загрузки старше min_age секунд.
+
+    Возвращает пары (вид, (имя, время изменения, размер)) по мере обхода.
+    rate ограничивает число удалений в секунду, чтобы не забивать диск.
+    """
+    min_age = settings.MEDIA_GC_MIN_AGE if min_age is None else min_age
+    chunk_size = chunk_size or settings.MEDIA_GC_CHUNK_SIZE
+    rate = settings.MEDIA_GC_RATE if rate is None else rate
+    sources = (
+        (IMAGES, orphaned_images(min_age, chunk_size), delete_image),
+        (
+            INCOMING,
+            old_enough(walk(post_image_storage, TEMP_DIR), min_age),
+            delete_incoming,
+        ),
+        (THUMBNAILS, stale_thumbnails(min_age, chunk_size), delete_thumbnail),
+    )
+    for kind, files, delete in sources:
+        for file in files:
+            if dry_run:
+                yield kind, file
+                continue
+            name, mtime, _ = file
+            started = time.monotonic()
+            if not delete(name, mtime):
+                continue
+            yield kind, file
+            if rate:
+                time.sleep(max(0, 1 / rate - (time.monotonic() - started)))
@@ -0,0 +1,77 @@
+# Generated by Django 2.2.16 on 2026-10-18 20:21
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+# Копия posts.counters на момент миграции: миграция не должна меняться
+# вместе с кодом приложения.
+# (модель со счётчиком, поле счётчика, считаемая модель, её FK, ключ связи)
+COUNTERS = (
+    ('users.Profile', 'posts_count', 'posts.Post', 'author', 'user'),
+    ('users.Profile', 'followers_count', 'posts.Follow', 'author', 'user'),
+    ('users.Profile', 'following_count', 'posts.Follow', 'user', 'user'),
+    ('posts.Group', 'posts_count', 'posts.Post', 'group', 'pk'),
+    ('posts.Post', 'comments_count', 'posts.Comment', 'post', 'pk'),
+)
+BATCH_SIZE = 500
+
+
+def actual_count(source, fk, outer):
+    return Coalesce(
+        Subquery(
+            source.objects.filter(**{fk: OuterRef(outer)})
+            .order_by()
+            .values(fk)
+            .annotate(total=Count('pk'))
+            .values('total')
+        ),
+        0,
+    )
+
+
+def fill_counters(apps, schema_editor):
+    User = apps.get_model(settings.AUTH_USER_MODEL)
+    Profile = apps.get_model('users', 'Profile')
+    missing = User.objects.filter(profile__isnull=True).values_list(
+        'pk', flat=True
+    )
+    Profile.objects.bulk_create(
+        (Profile(user_id=pk) for pk in missing.iterator()),
+        batch_size=BATCH_SIZE,
+    )
+    for label, field, source_label, fk, outer in COUNTERS:
+        model = apps.get_model(label)
+        actual = actual_count(apps.get_model(source_label), fk, outer)
+        drifted = list(
+            model.objects.annotate(actual=actual)
+            .exclude(**{field: F('actual')})
+            .values_list('pk', flat=True)
+        )
+        for start in range(0, len(drifted), BATCH_SIZE):
+            model.objects.filter(
+                pk__in=drifted[start:start + BATCH_SIZE]
+            ).update(**{field: actual})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0015_timelineentry'),
+        ('users', '0001_profile'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='group',
+            name='posts_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Постов'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='comments_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Комментариев'),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,68 @@
+# Generated by Django 2.2.16 on 2026-10-18 20:33
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+import posts.storage
+
+BATCH_SIZE = 500
+
+
+def count_references(apps, schema_editor):
+    """Заводит StoredImage для картинок постов и считает ссылки на них.
+
+    Копия posts.counters на момент миграции: миграция не должна меняться
+    вместе с кодом приложения.
+    """
+    Post = apps.get_model('posts', 'Post')
+    StoredImage = apps.get_model('posts', 'StoredImage')
+    names = (
+        Post.objects.exclude(image='')
+        .order_by()
+        .values_list('image', flat=True)
+        .distinct()
+    )
+    StoredImage.objects.bulk_create(
+        (StoredImage(name=name) for name in names.iterator()),
+        batch_size=BATCH_SIZE,
+    )
+    StoredImage.objects.update(
+        references=Coalesce(
+            Subquery(
+                Post.objects.filter(image=OuterRef('name'))
+                .order_by()
+                .values('image')
+                .annotate(total=Count('pk'))
+                .values('total')
+            ),
+            0,
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0017_image_metadata'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StoredImage',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, unique=True, verbose_name='Файл')),
+                ('references', models.PositiveIntegerField(default=0, verbose_name='Ссылок')),
+            ],
+            options={
+                'verbose_name': 'файл картинки',
+                'verbose_name_plural': 'Файлы картинок',
+            },
+        ),
+        migrations.AlterField(
+            model_name='post',
+            name='image',
+            field=models.ImageField(blank=True, help_text='Добавьте каринку к посту', storage=posts.storage.ContentAddressedStorage(), upload_to='posts/', verbose_name='Картинка к посту'),
+        ),
+        migrations.RunPython(count_references, migrations.RunPython.noop),
+    ]
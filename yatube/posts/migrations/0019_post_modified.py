@@ -0,0 +1,25 @@
+# Generated by Django 2.2.16 on 2026-10-18 20:39
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def modified_from_pub_date(apps, schema_editor):
+    Post = apps.get_model('posts', 'Post')
+    Post.objects.update(modified=F('pub_date'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0018_stored_images'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='modified',
+            field=models.DateTimeField(auto_now=True, verbose_name='Дата изменения'),
+        ),
+        migrations.RunPython(modified_from_pub_date, migrations.RunPython.noop),
+    ]
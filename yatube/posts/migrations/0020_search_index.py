@@ -0,0 +1,71 @@
+from collections import defaultdict
+from itertools import islice
+
+from django.db import migrations
+
+# Стемминг должен совпадать с тем, которым ищет код приложения, поэтому
+# он берётся из posts.stemmer: модуль не зависит от моделей. SQL таблицы
+# скопирован из posts.search на момент миграции.
+from posts.stemmer import stem_text
+
+SEARCH_TABLE = 'posts_search'
+BATCH_SIZE = 500
+
+
+def build_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(
+        f'CREATE VIRTUAL TABLE {SEARCH_TABLE} USING fts5('
+        "text, comments, tokenize = 'unicode61 remove_diacritics 2')"
+    )
+    # Совпадение в тексте поста весит вдвое больше, чем в комментариях.
+    schema_editor.execute(
+        f'INSERT INTO {SEARCH_TABLE} ({SEARCH_TABLE}, rank) '
+        "VALUES ('rank', 'bm25(2.0, 1.0)')"
+    )
+    Post = apps.get_model('posts', 'Post')
+    Comment = apps.get_model('posts', 'Comment')
+    using = schema_editor.connection.alias
+    posts = (
+        Post.objects.using(using)
+        .order_by('pk')
+        .values_list('pk', 'text')
+        .iterator(chunk_size=BATCH_SIZE)
+    )
+    with schema_editor.connection.cursor() as cursor:
+        batch = list(islice(posts, BATCH_SIZE))
+        while batch:
+            comments = defaultdict(list)
+            for post_id, text in (
+                Comment.objects.using(using)
+                .filter(post_id__in=[pk for pk, _ in batch])
+                .order_by()
+                .values_list('post_id', 'text')
+            ):
+                comments[post_id].append(stem_text(text))
+            cursor.executemany(
+                f'INSERT INTO {SEARCH_TABLE} (rowid, text, comments) '
+                'VALUES (%s, %s, %s)',
+                [
+                    (pk, stem_text(text), ' '.join(comments[pk]))
+                    for pk, text in batch
+                ],
+            )
+            batch = list(islice(posts, BATCH_SIZE))
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute(f'DROP TABLE IF EXISTS {SEARCH_TABLE}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0019_post_modified'),
+    ]
+
+    operations = [
+        migrations.RunPython(build_search_index, drop_search_index),
+    ]
@@ -3,6 +3,8 @@ from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.db import models
 
+from .storage import post_image_storage
+
 User = get_user_model()
 
 
@@ -21,6 +23,11 @@ class Group(models.Model):
         verbose_name='Описание',
         help_text='Укажите описание группы',
     )
+    posts_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Постов',
+    )
 
     class Meta:
         verbose_name = 'группу'
@@ -39,6 +46,10 @@ class Post(models.Model):
         verbose_name='Дата публикации',
         auto_now_add=True,
     )
+    modified = models.DateTimeField(
+        verbose_name='Дата изменения',
+        auto_now=True,
+    )
     author = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
@@ -56,19 +67,99 @@ class Post(models.Model):
     )
     image = models.ImageField(
         upload_to='posts/',
+        storage=post_image_storage,
         blank=True,
         verbose_name='Картинка к посту',
         help_text='Добавьте каринку к посту',
     )
+    image_width = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        editable=False,
+        verbose_name='Ширина картинки',
+    )
+    image_height = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        editable=False,
+        verbose_name='Высота картинки',
+    )
+    image_size = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        editable=False,
+        verbose_name='Размер картинки, байт',
+    )
+    image_sha256 = models.CharField(
+        max_length=64,
+        blank=True,
+        editable=False,
+        verbose_name='SHA-256 картинки',
+    )
+    comments_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Комментариев',
+    )
 
     class Meta:
         ordering = ('-pub_date',)
+        indexes = (
+            models.Index(fields=('pub_date',), name='post_pub_date_idx'),
+            models.Index(
+                fields=('author', 'pub_date'), name='post_author_pub_date_idx'
+            ),
+            models.Index(
+                fields=('group', 'pub_date'), name='post_group_pub_date_idx'
+            ),
+        )
         verbose_name = 'пост'
         verbose_name_plural = 'Посты'
 
     def __str__(self):
         return self.text[: settings.LEN_TEXT_STR]
 
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self.remember_saved()
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance.remember_saved()
+        return instance
+
+    def remember_saved(self):
+        """Запоминает сохранённые группу и картинку, чтобы заметить смену."""
+        self.saved_group_id = self.__dict__.get('group_id')
+        if 'image' in self.__dict__:
+            self.saved_image = self.image.name or ''
+
+
+class StoredImage(models.Model):
+    """Файл в хранилище картинок и число постов, которые на него ссылаются.
+
+    Одинаковые картинки хранятся одним файлом, поэтому удалять его можно
+    только когда references дошёл до нуля.
+    """
+
+    name = models.CharField(
+        max_length=255,
+        unique=True,
+        verbose_name='Файл',
+    )
+    references = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Ссылок',
+    )
+
+    class Meta:
+        verbose_name = 'файл картинки'
+        verbose_name_plural = 'Файлы картинок'
+
+    def __str__(self):
+        return self.name
+
 
 class Comment(CreatedModel):
     post = models.ForeignKey(
@@ -91,6 +182,11 @@ class Comment(CreatedModel):
 
     class Meta:
         ordering = ('-created',)
+        indexes = (
+            models.Index(
+                fields=('post', 'created'), name='comment_post_created_idx'
+            ),
+        )
         verbose_name = 'комментарий'
         verbose_name_plural = 'Комментарии'
 
@@ -111,11 +207,68 @@ class Follow(models.Model):
         related_name='following',
         verbose_name='Автор',
     )
-    models.UniqueConstraint(fields=['user', 'author'], name='unique_follow')
 
     class Meta:
+        constraints = (
+            models.UniqueConstraint(
+                fields=('user', 'author'), name='unique_follow'
+            ),
+            models.CheckConstraint(
+                check=~models.Q(user=models.F('author')),
+                name='prevent_self_follow',
+            ),
+        )
         verbose_name = 'подписчика'
         verbose_name_plural = 'Подписки'
 
     def __str__(self):
         return self.user
+
+
+class TimelineEntry(models.Model):
+    """Строка материализованной ленты подписок пользователя.
+
+    Заполняется при публикации поста и при подписке, поэтому лента
+    читается одним диапазоном по индексу (user, pub_date, post).
+    """
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='timeline',
+        verbose_name='Читатель',
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='timeline_entries',
+        verbose_name='Пост',
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Автор',
+    )
+    pub_date = models.DateTimeField(verbose_name='Дата публикации')
+
+    class Meta:
+        constraints = (
+            models.UniqueConstraint(
+                fields=('user', 'post'), name='unique_timeline_entry'
+            ),
+        )
+        indexes = (
+            models.Index(
+                fields=('user', 'pub_date', 'post'),
+                name='timeline_user_pub_date_idx',
+            ),
+            models.Index(
+                fields=('user', 'author'), name='timeline_user_author_idx'
+            ),
+        )
+        verbose_name = 'запись ленты'
+        verbose_name_plural = 'Ленты подписок'
+
+    def __str__(self):
+        return f'{self.user} <- {self.post_id}'
@@ -0,0 +1,211 @@
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from binascii import Error as BinasciiError
+from collections import defaultdict
+from itertools import islice
+
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models.expressions import RawSQL
+
+from .models import Comment, Post
+from .stemmer import WORD, stem, stem_text
+from .utils import BACKWARD, FORWARD
+
+SEARCH_TABLE = 'posts_search'
+MAX_QUERY_WORDS = 10
+
+
+def index_post(post_id, text, using='default'):
+    """Обновляет текст поста в индексе; новый пост добавляет без запросов."""
+    with connections[using].cursor() as cursor:
+        cursor.execute(
+            f'UPDATE {SEARCH_TABLE} SET text = %s WHERE rowid = %s',
+            (stem_text(text), post_id),
+        )
+        if not cursor.rowcount:
+            cursor.execute(
+                f'INSERT INTO {SEARCH_TABLE} (rowid, text, comments) '
+                'VALUES (%s, %s, %s)',
+                (post_id, stem_text(text), ''),
+            )
+
+
+def unindex_post(post_id, using='default'):
+    with connections[using].cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {SEARCH_TABLE} WHERE rowid = %s', (post_id,)
+        )
+
+
+def add_comment(post_id, text, using='default'):
+    """Дописывает основы нового комментария к колонке комментариев поста.
+
+    Старые комментарии не перечитываются и не стеммятся заново.
+    """
+    with connections[using].cursor() as cursor:
+        cursor.execute(
+            f"UPDATE {SEARCH_TABLE} SET comments = comments || ' ' || %s "
+            'WHERE rowid = %s',
+            (stem_text(text), post_id),
+        )
+
+
+def index_comments(post_id, using='default'):
+    """Пересобирает колонку комментариев поста одним чтением.
+
+    Нужна после правки и удаления комментария: вычесть его основы из
+    колонки нельзя.
+    """
+    texts = (
+        Comment.objects.using(using)
+        .filter(post_id=post_id)
+        .order_by()
+        .values_list('text', flat=True)
+    )
+    comments = ' '.join(map(stem_text, texts))
+    with connections[using].cursor() as cursor:
+        cursor.execute(
+            f'UPDATE {SEARCH_TABLE} SET comments = %s WHERE rowid = %s',
+            (comments, post_id),
+        )
+
+
+def rebuild_index(using='default', batch_size=500):
+    """Заново заполняет индекс пачками постов; возвращает их число."""
+    posts = (
+        Post.objects.using(using)
+        .order_by('pk')
+        .values_list('pk', 'text')
+        .iterator(chunk_size=batch_size)
+    )
+    total = 0
+    with connections[using].cursor() as cursor:
+        cursor.execute(f'DELETE FROM {SEARCH_TABLE}')
+        batch = list(islice(posts, batch_size))
+        while batch:
+            comments = defaultdict(list)
+            for post_id, text in (
+                Comment.objects.using(using)
+                .filter(post_id__in=[pk for pk, _ in batch])
+                .order_by()
+                .values_list('post_id', 'text')
+            ):
+                comments[post_id].append(stem_text(text))
+            cursor.executemany(
+                f'INSERT INTO {SEARCH_TABLE} (rowid, text, comments) '
+                'VALUES (%s, %s, %s)',
+                [
+                    (pk, stem_text(text), ' '.join(comments[pk]))
+                    for pk, text in batch
+                ],
+            )
+            total += len(batch)
+            batch = list(islice(posts, batch_size))
+    return total
+
+
+def match_expression(query):
+    """Запрос FTS5: все основы слов запроса, каждая в кавычках.
+
+    В кавычках только буквы и цифры, поэтому синтаксис FTS5 из запроса
+    пользователя не проходит. Пустая строка — искать нечего.
+    """
+    words = WORD.findall(query.lower())[:MAX_QUERY_WORDS]
+    return ' '.join(f'"{stem(word)}"' for word in words)
+
+
+def matching_posts(query):
+    """Условие для pk__in: id постов, подходящих под запрос."""
+    return RawSQL(
+        f'SELECT rowid FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH %s',
+        (match_expression(query),),
+    )
+
+
+def encode_cursor(direction, row):
+    post_id, rank = row
+    raw = f'{direction}|{rank!r}|{post_id}'
+    return urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        direction, rank, post_id = (
+            urlsafe_b64decode(padded.encode()).decode().split('|')
+        )
+        rank, post_id = float(rank), int(post_id)
+    except (BinasciiError, UnicodeDecodeError, ValueError):
+        return None
+    if direction not in (FORWARD, BACKWARD):
+        return None
+    return direction, rank, post_id
+
+
+class SearchPaginator(Paginator):
+    """Страницы результатов поиска по ключу (релевантность, id).
+
+    Как и CursorPaginator, отдаёт Page с next_cursor и previous_cursor.
+    Релевантность bm25 зависит от всего индекса, так что при листании
+    во время публикаций граница страницы может немного сдвинуться.
+    """
+
+    def __init__(self, query, per_page, using='default', **kwargs):
+        super().__init__(Post.objects.none(), per_page, **kwargs)
+        self.match = match_expression(query)
+        self.using = using
+
+    def fetch(self, decoded):
+        """Пары (id, релевантность) следующих per_page + 1 результатов."""
+        sql = (
+            f'SELECT rowid, rank FROM {SEARCH_TABLE} '
+            f'WHERE {SEARCH_TABLE} MATCH %s'
+        )
+        params = [self.match]
+        order = 'ASC'
+        if decoded is not None:
+            direction, rank, post_id = decoded
+            sign = '>' if direction == FORWARD else '<'
+            if direction == BACKWARD:
+                order = 'DESC'
+            sql += f' AND (rank {sign} %s OR (rank = %s AND rowid {sign} %s))'
+            params += [rank, rank, post_id]
+        sql += f' ORDER BY rank {order}, rowid {order} LIMIT %s'
+        params.append(self.per_page + 1)
+        with connections[self.using].cursor() as cursor:
+            cursor.execute(sql, params)
+            return cursor.fetchall()
+
+    def get_cursor_page(self, cursor=None):
+        decoded = decode_cursor(cursor) if cursor else None
+        direction = decoded[0] if decoded is not None else FORWARD
+        rows = self.fetch(decoded) if self.match else []
+        has_more = len(rows) > self.per_page
+        rows = rows[: self.per_page]
+        if direction == BACKWARD:
+            rows.reverse()
+            has_next, has_previous = True, has_more
+        else:
+            has_next, has_previous = has_more, decoded is not None
+        posts = (
+            Post.objects.using(self.using)
+            .select_related('author', 'group')
+            .in_bulk([post_id for post_id, _ in rows])
+            if rows
+            else {}
+        )
+        rows = [(post_id, rank) for post_id, rank in rows if post_id in posts]
+        page = self._get_page(
+            [posts[post_id] for post_id, _ in rows], None, self
+        )
+        page.next_cursor = (
+            encode_cursor(FORWARD, rows[-1])
+            if has_next and rows
+            else None
+        )
+        page.previous_cursor = (
+            encode_cursor(BACKWARD, rows[0])
+            if has_previous and rows
+            else None
+        )
+        return page
@@ -0,0 +1,335 @@
+"""Генератор синтетических данных для замеров производительности.
+
+Распределения близки к живым: число постов у автора, подписчиков
+у пользователя, постов в группе и комментариев к посту подчиняются
+закону Ципфа — несколько знаменитостей и длинный хвост. Один и тот же
+seed даёт те же данные. Строки пишутся пачками bulk_create, а ранги
+выбираются без таблиц весов, поэтому память не растёт с числом строк.
+"""
+import io
+import random
+from contextlib import contextmanager
+from datetime import timedelta
+from itertools import islice
+from math import gcd
+
+from django.apps import apps
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.db import connection, reset_queries
+from django.db.models import Max
+from faker import Faker
+from PIL import Image
+
+from . import search
+from .counters import (create_missing_profiles, create_missing_stored_images,
+                       repair_counters)
+from .images import image_metadata
+from .models import Comment, Follow, Group, Post, TimelineEntry
+from .storage import post_image_storage
+from .timeline import celebrity_ids, promote
+
+User = get_user_model()
+
+PASSWORD = 'password'
+SENTENCES = 5000
+GROUPLESS = 0.3
+COMMENT_DELAY_HOURS = 12
+
+
+def batches(iterable, size):
+    iterator = iter(iterable)
+    batch = list(islice(iterator, size))
+    while batch:
+        yield batch
+        batch = list(islice(iterator, size))
+
+
+@contextmanager
+def explicit_dates(*fields):
+    """Отключает auto_now и auto_now_add, чтобы сохранить заданные даты."""
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def next_pk(model):
+    return (model.objects.aggregate(last=Max('pk'))['last'] or 0) + 1
+
+
+class Population:
+    """count объектов с pk подряд, популярность которых распределена по
+    Ципфу.
+
+    Ранг выбирается обратной функцией непрерывного приближения, а ранг
+    переводится в pk случайной перестановкой rank * step + shift по
+    модулю count: популярные объекты разбросаны по pk, и ни то ни
+    другое не хранит таблиц.
+    """
+
+    def __init__(self, rng, first_pk, count, exponent):
+        self.random = rng
+        self.first_pk = first_pk
+        self.count = count
+        self.exponent = exponent
+        self.step = rng.randrange(count) if count else 1
+        while gcd(self.step, count) != 1:
+            self.step += 1
+        self.shift = rng.randrange(count) if count else 0
+
+    def __len__(self):
+        return self.count
+
+    def pk(self, rank):
+        return self.first_pk + (rank * self.step + self.shift) % self.count
+
+    def rank(self):
+        u = self.random.random()
+        if self.exponent == 1:
+            value = self.count ** u
+        else:
+            power = 1 - self.exponent
+            value = (1 + u * (self.count ** power - 1)) ** (1 / power)
+        return min(int(value), self.count) - 1
+
+    def popular(self):
+        return self.pk(self.rank())
+
+    def uniform(self):
+        return self.first_pk + self.random.randrange(self.count)
+
+
+class Seeder:
+    """Дописывает в базу новое сообщество; старые строки не трогает.
+
+    Первичные ключи пользователей, групп и постов задаются явно: так
+    комментарии и подписки ссылаются на них без чтения из базы, а дата
+    поста вычисляется по его номеру.
+    """
+
+    def __init__(
+        self,
+        end,
+        seed=1,
+        days=365,
+        exponent=1.1,
+        batch_size=1000,
+        log=None,
+    ):
+        self.random = random.Random(seed)
+        self.fake = Faker('ru_RU')
+        self.fake.seed_instance(seed)
+        self.end = end
+        self.span = timedelta(days=days)
+        self.exponent = exponent
+        self.batch_size = batch_size
+        self.log = log or (lambda message: None)
+        self.sentences = [
+            self.fake.sentence(nb_words=12) for _ in range(SENTENCES)
+        ]
+
+    def population(self, model, count):
+        return Population(self.random, next_pk(model), count, self.exponent)
+
+    def text(self, sentences):
+        return ' '.join(self.random.choices(self.sentences, k=sentences))
+
+    def insert(self, model, rows, total):
+        created = 0
+        for batch in batches(rows, self.batch_size):
+            model.objects.bulk_create(batch)
+            # При DEBUG каждый INSERT на тысячу строк оседал бы в журнале.
+            reset_queries()
+            created += len(batch)
+            self.log(f'{model._meta.verbose_name_plural}: {created}/{total}')
+        return created
+
+    def create_users(self, count):
+        self.users = self.population(User, count)
+        # Активность и известность — разные перестановки тех же
+        # пользователей: иначе самые плодовитые авторы были бы и самыми
+        # читаемыми, и ленты росли бы квадратично от числа постов.
+        self.authors = Population(
+            self.random, self.users.first_pk, count, self.exponent
+        )
+        password = make_password(PASSWORD)
+        rows = (
+            User(
+                pk=pk,
+                username=f'user{pk}',
+                first_name=self.fake.first_name(),
+                last_name=self.fake.last_name(),
+                password=password,
+                date_joined=self.end - self.span,
+            )
+            for pk in range(self.users.first_pk, self.users.first_pk + count)
+        )
+        return self.insert(User, rows, count)
+
+    def create_groups(self, count):
+        self.groups = self.population(Group, count)
+        rows = (
+            Group(
+                pk=pk,
+                title=self.fake.catch_phrase()[:200],
+                slug=f'group-{pk}',
+                description=self.text(2),
+            )
+            for pk in range(self.groups.first_pk, self.groups.first_pk + count)
+        )
+        return self.insert(Group, rows, count)
+
+    def create_images(self, count):
+        """Кладёт в хранилище count разных картинок; вернёт поля постов."""
+        directory = Post._meta.get_field('image').upload_to
+        images = []
+        for number in range(count):
+            color = tuple(self.random.randrange(256) for _ in range(3))
+            buffer = io.BytesIO()
+            Image.new('RGB', (960, 540), color).save(buffer, 'JPEG')
+            upload = ContentFile(buffer.getvalue(), name=f'seed{number}.jpg')
+            metadata = image_metadata(upload)
+            name = post_image_storage.save(directory + upload.name, upload)
+            images.append(dict(metadata, image=name))
+        return images
+
+    def post_date(self, pk):
+        """Посты идут по pk равномерно через весь период."""
+        index = pk - self.posts.first_pk
+        return self.end - self.span * (1 - (index + 0.5) / len(self.posts))
+
+    def create_posts(self, count, images=(), image_ratio=0):
+        self.posts = self.population(Post, count)
+
+        def rows():
+            for pk in range(self.posts.first_pk, self.posts.first_pk + count):
+                post = Post(
+                    pk=pk,
+                    author_id=self.authors.popular(),
+                    text=self.text(self.random.randint(1, 6)),
+                    pub_date=self.post_date(pk),
+                    modified=self.post_date(pk),
+                )
+                if self.groups and self.random.random() > GROUPLESS:
+                    post.group_id = self.groups.popular()
+                if images and self.random.random() < image_ratio:
+                    for field, value in self.random.choice(images).items():
+                        setattr(post, field, value)
+                yield post
+
+        with explicit_dates(
+            Post._meta.get_field('pub_date'), Post._meta.get_field('modified')
+        ):
+            return self.insert(Post, rows(), count)
+
+    def create_comments(self, count):
+        def rows():
+            for _ in range(count):
+                post = self.posts.popular()
+                delay = timedelta(
+                    hours=self.random.expovariate(1 / COMMENT_DELAY_HOURS)
+                )
+                yield Comment(
+                    post_id=post,
+                    author_id=self.users.uniform(),
+                    text=self.text(1),
+                    created=min(self.post_date(post) + delay, self.end),
+                )
+
+        with explicit_dates(Comment._meta.get_field('created')):
+            return self.insert(Comment, rows(), count)
+
+    def create_follows(self, count):
+        """Каждый подписан в среднем на count / users авторов; авторы
+        выбираются по Ципфу, так что у первых рангов тысячи подписчиков."""
+        mean = count / len(self.users)
+        limit = len(self.users) - 1
+
+        def rows():
+            for user in range(
+                self.users.first_pk, self.users.first_pk + len(self.users)
+            ):
+                wanted = min(limit, round(self.random.expovariate(1 / mean)))
+                followed = set()
+                for _ in range(wanted * 10):
+                    if len(followed) == wanted:
+                        break
+                    author = self.users.popular()
+                    if author != user:
+                        followed.add(author)
+                for author in sorted(followed):
+                    yield Follow(user_id=user, author_id=author)
+
+        return self.insert(Follow, rows(), count)
+
+    def create_timelines(self):
+        """Раскладывает посты по лентам подписчиков, как fan_out.
+
+        Знаменитости отмечаются по новым подпискам: их посты
+        подмешиваются при чтении и в ленты не пишутся.
+        """
+        promote()
+        entries = (
+            Post.objects.filter(
+                pk__gte=self.posts.first_pk,
+                author__following__user_id__gte=self.users.first_pk,
+            )
+            .exclude(author_id__in=celebrity_ids())
+            .order_by()
+            .values_list(
+                'author__following__user_id', 'pk', 'author_id', 'pub_date'
+            )
+        )
+        # Строк здесь на порядки больше, чем постов, поэтому они не
+        # проходят через Python: INSERT ... SELECT внутри базы. Новые
+        # посты ещё ни в чьих лентах, так что конфликтов не бывает.
+        sql, params = entries.query.sql_with_params()
+        table = TimelineEntry._meta.db_table
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'INSERT INTO {table} (user_id, post_id, author_id, pub_date) '
+                + sql,
+                params,
+            )
+            created = cursor.rowcount
+        self.log(f'{TimelineEntry._meta.verbose_name_plural}: {created}')
+        return created
+
+    def repair(self):
+        """Профили, счётчики и учёт картинок, как их ведут сигналы.
+
+        Идёт до лент: знаменитостей отмечают по числу подписчиков.
+        """
+        create_missing_profiles(apps)
+        create_missing_stored_images(apps)
+        for label, field, drifted in repair_counters(apps):
+            self.log(f'{label}.{field}: исправлено {drifted}')
+
+    def finish(self):
+        """Поисковый индекс и кеш страниц, как после обычной записи."""
+        self.log(f'Проиндексировано постов: {search.rebuild_index()}')
+        cache.clear()
+
+    def run(
+        self, users, groups, posts, comments, follows, images=0, image_ratio=0
+    ):
+        """Создаёт всё по порядку и возвращает число строк каждой модели."""
+        created = {
+            'users': self.create_users(users),
+            'groups': self.create_groups(groups),
+        }
+        images = self.create_images(images) if posts else ()
+        created['posts'] = self.create_posts(posts, images, image_ratio)
+        created['comments'] = self.create_comments(comments) if posts else 0
+        created['follows'] = self.create_follows(follows) if users else 0
+        self.repair()
+        created['timeline'] = self.create_timelines() if posts else 0
+        self.finish()
+        return created
@@ -0,0 +1,192 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from users.models import Profile
+
+from . import search, thumbnails, timeline
+from .caching import (COMMENT_COUNTS, SEARCH_RESULTS, bump_feed_generation,
+                      bump_generation, group_scope, post_scope, user_scope)
+from .counters import shift
+from .models import Comment, Follow, Group, Post, StoredImage
+
+
+@receiver(post_save, sender=Post)
+def fan_out_post(sender, instance, created, **kwargs):
+    if created:
+        timeline.fan_out(instance)
+
+
+@receiver(post_save, sender=Follow)
+def backfill_timeline(sender, instance, created, **kwargs):
+    if created:
+        timeline.backfill(instance.user_id, instance.author_id)
+
+
+@receiver(post_delete, sender=Follow)
+def prune_timeline(sender, instance, **kwargs):
+    timeline.prune(instance.user_id, instance.author_id)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def invalidate_post_feeds(sender, instance, **kwargs):
+    group_ids = {instance.group_id, getattr(instance, 'saved_group_id', None)}
+    bump_feed_generation(
+        *map(
+            group_scope,
+            Group.objects.filter(pk__in=group_ids - {None}).values_list(
+                'slug', flat=True
+            ),
+        )
+    )
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def invalidate_group_feeds(sender, instance, **kwargs):
+    bump_feed_generation(group_scope(instance.slug))
+
+
+@receiver(post_save, sender=Comment)
+def invalidate_comment_pages(sender, instance, created, **kwargs):
+    """Правка комментария меняет страницу поста и результаты поиска,
+    новый комментарий — ещё и comments_count в лентах API."""
+    scopes = (COMMENT_COUNTS,) if created else ()
+    bump_generation(post_scope(instance.post_id), SEARCH_RESULTS, *scopes)
+
+
+@receiver(post_delete, sender=Comment)
+def invalidate_deleted_comment_pages(sender, instance, **kwargs):
+    bump_generation(
+        post_scope(instance.post_id), SEARCH_RESULTS, COMMENT_COUNTS
+    )
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def invalidate_follow_feed(sender, instance, **kwargs):
+    bump_generation(user_scope(instance.user_id))
+
+
+@receiver(post_save, sender=Post)
+def count_post(sender, instance, created, **kwargs):
+    if created:
+        shift(
+            Profile.objects.filter(user_id=instance.author_id),
+            'posts_count',
+            1,
+        )
+        shift(Group.objects.filter(pk=instance.group_id), 'posts_count', 1)
+    elif hasattr(instance, 'saved_group_id'):
+        if instance.saved_group_id != instance.group_id:
+            shift(
+                Group.objects.filter(pk=instance.saved_group_id),
+                'posts_count',
+                -1,
+            )
+            shift(
+                Group.objects.filter(pk=instance.group_id), 'posts_count', 1
+            )
+
+
+@receiver(post_delete, sender=Post)
+def uncount_post(sender, instance, **kwargs):
+    shift(
+        Profile.objects.filter(user_id=instance.author_id), 'posts_count', -1
+    )
+    shift(Group.objects.filter(pk=instance.group_id), 'posts_count', -1)
+
+
+@receiver(post_save, sender=Comment)
+def count_comment(sender, instance, created, **kwargs):
+    if created:
+        shift(
+            Post.objects.filter(pk=instance.post_id), 'comments_count', 1
+        )
+
+
+@receiver(post_delete, sender=Comment)
+def uncount_comment(sender, instance, **kwargs):
+    shift(Post.objects.filter(pk=instance.post_id), 'comments_count', -1)
+
+
+@receiver(post_save, sender=Follow)
+def count_follow(sender, instance, created, **kwargs):
+    if created:
+        shift(
+            Profile.objects.filter(user_id=instance.author_id),
+            'followers_count',
+            1,
+        )
+        shift(
+            Profile.objects.filter(user_id=instance.user_id),
+            'following_count',
+            1,
+        )
+        timeline.promote((instance.author_id,))
+
+
+@receiver(post_delete, sender=Follow)
+def uncount_follow(sender, instance, **kwargs):
+    shift(
+        Profile.objects.filter(user_id=instance.author_id),
+        'followers_count',
+        -1,
+    )
+    shift(
+        Profile.objects.filter(user_id=instance.user_id),
+        'following_count',
+        -1,
+    )
+
+
+def reference_image(name, delta):
+    if not name:
+        return
+    if delta > 0:
+        StoredImage.objects.get_or_create(name=name)
+    shift(StoredImage.objects.filter(name=name), 'references', delta)
+
+
+@receiver(post_save, sender=Post)
+def count_image_reference(sender, instance, created, **kwargs):
+    saved_image = getattr(instance, 'saved_image', '')
+    if created or saved_image != instance.image.name:
+        reference_image(instance.image.name, 1)
+        if not created:
+            reference_image(saved_image, -1)
+
+
+@receiver(post_delete, sender=Post)
+def uncount_image_reference(sender, instance, **kwargs):
+    reference_image(instance.image.name, -1)
+
+
+@receiver(post_save, sender=Post)
+def pregenerate_thumbnails(sender, instance, created, **kwargs):
+    if created or getattr(instance, 'saved_image', '') != instance.image.name:
+        thumbnails.pregenerate(instance.image)
+
+
+@receiver(post_save, sender=Post)
+def index_post(sender, instance, update_fields=None, **kwargs):
+    if update_fields is None or 'text' in update_fields:
+        search.index_post(instance.pk, instance.text)
+
+
+@receiver(post_delete, sender=Post)
+def unindex_post(sender, instance, **kwargs):
+    search.unindex_post(instance.pk)
+
+
+@receiver(post_save, sender=Comment)
+def index_comment(sender, instance, created, **kwargs):
+    if created:
+        search.add_comment(instance.post_id, instance.text)
+    else:
+        search.index_comments(instance.post_id)
+
+
+@receiver(post_delete, sender=Comment)
+def unindex_comment(sender, instance, **kwargs):
+    search.index_comments(instance.post_id)
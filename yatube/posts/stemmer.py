@@ -0,0 +1,154 @@
+"""Стеммер Snowball для русского языка.
+
+Перенос алгоритма https://snowballstem.org/algorithms/russian/stemmer.html:
+FTS5 умеет только английский porter, а слова в индексе и в запросе
+должны сводиться к одной основе.
+"""
+import re
+from functools import lru_cache
+
+VOWELS = 'аеиоуыэюя'
+WORD = re.compile(r'\w+')
+
+
+def _by_length(*endings):
+    return tuple(sorted(endings, key=len, reverse=True))
+
+
+def _grouped(first, second):
+    """Окончания первой группы требуют а или я перед собой, второй — нет."""
+    return _by_length(*first, *second), frozenset(second)
+
+
+PERFECTIVE_GERUND = _grouped(
+    ('в', 'вши', 'вшись'),
+    ('ив', 'ивши', 'ившись', 'ыв', 'ывши', 'ывшись'),
+)
+ADJECTIVE = _by_length(
+    'ее', 'ие', 'ые', 'ое', 'ими', 'ыми', 'ей', 'ий', 'ый', 'ой', 'ем',
+    'им', 'ым', 'ом', 'его', 'ого', 'ему', 'ому', 'их', 'ых', 'ую', 'юю',
+    'ая', 'яя', 'ою', 'ею',
+)
+PARTICIPLE = _grouped(
+    ('ем', 'нн', 'вш', 'ющ', 'щ'),
+    ('ивш', 'ывш', 'ующ'),
+)
+REFLEXIVE = _by_length('ся', 'сь')
+VERB = _grouped(
+    (
+        'ла', 'на', 'ете', 'йте', 'ли', 'й', 'л', 'ем', 'н', 'ло', 'но',
+        'ет', 'ют', 'ны', 'ть', 'ешь', 'нно',
+    ),
+    (
+        'ила', 'ыла', 'ена', 'ейте', 'уйте', 'ите', 'или', 'ыли', 'ей',
+        'уй', 'ил', 'ыл', 'им', 'ым', 'ен', 'ило', 'ыло', 'ено', 'ят',
+        'ует', 'уют', 'ит', 'ыт', 'ены', 'ить', 'ыть', 'ишь', 'ую', 'ю',
+    ),
+)
+NOUN = _by_length(
+    'а', 'ев', 'ов', 'ие', 'ье', 'е', 'иями', 'ями', 'ами', 'еи', 'ии',
+    'и', 'ией', 'ей', 'ой', 'ий', 'й', 'иям', 'ям', 'ием', 'ем', 'ам',
+    'ом', 'о', 'у', 'ах', 'иях', 'ях', 'ы', 'ь', 'ию', 'ью', 'ю', 'ия',
+    'ья', 'я',
+)
+DERIVATIONAL = _by_length('ост', 'ость')
+SUPERLATIVE = _by_length('ейш', 'ейше')
+
+
+def _regions(word):
+    """Начала областей RV и R2 по правилам Snowball."""
+    rv = r1 = r2 = len(word)
+    for index, char in enumerate(word):
+        if char in VOWELS:
+            rv = index + 1
+            break
+    for index in range(1, len(word)):
+        if word[index - 1] in VOWELS and word[index] not in VOWELS:
+            r1 = index + 1
+            break
+    for index in range(r1 + 1, len(word)):
+        if word[index - 1] in VOWELS and word[index] not in VOWELS:
+            r2 = index + 1
+            break
+    return rv, r2
+
+
+def _longest(word, endings):
+    for ending in endings:
+        if word.endswith(ending):
+            return ending
+    return None
+
+
+def _strip(word, endings):
+    ending = _longest(word, endings)
+    return word[: -len(ending)] if ending else None
+
+
+def _strip_grouped(word, groups):
+    """Снимает окончание; окончания первой группы — только после а или я.
+
+    Как и в Snowball, проверяется только самое длинное подходящее
+    окончание: если перед ним нет а или я, слово не меняется.
+    """
+    endings, second = groups
+    ending = _longest(word, endings)
+    if ending is None:
+        return None
+    rest = word[: -len(ending)]
+    if ending in second:
+        return rest
+    return rest if rest[-1:] in ('а', 'я') else None
+
+
+def _strip_adjectival(word):
+    stripped = _strip(word, ADJECTIVE)
+    if stripped is None:
+        return None
+    participle = _strip_grouped(stripped, PARTICIPLE)
+    return stripped if participle is None else participle
+
+
+def _strip_inflection(word):
+    """Шаг 1 Snowball: деепричастие или возвратность, затем
+    прилагательное, глагол или существительное."""
+    stripped = _strip_grouped(word, PERFECTIVE_GERUND)
+    if stripped is not None:
+        return stripped
+    reflexive = _strip(word, REFLEXIVE)
+    if reflexive is not None:
+        word = reflexive
+    for strip in (
+        _strip_adjectival,
+        lambda rest: _strip_grouped(rest, VERB),
+        lambda rest: _strip(rest, NOUN),
+    ):
+        stripped = strip(word)
+        if stripped is not None:
+            return stripped
+    return word
+
+
+@lru_cache(maxsize=100_000)
+def stem(word):
+    word = word.lower().replace('ё', 'е')
+    rv, r2 = _regions(word)
+    prefix, rest = word[:rv], _strip_inflection(word[rv:])
+    if rest.endswith('и'):
+        rest = rest[:-1]
+    ending = _longest(rest, DERIVATIONAL)
+    if ending and len(prefix) + len(rest) - len(ending) >= r2:
+        rest = rest[: -len(ending)]
+    superlative = _strip(rest, SUPERLATIVE)
+    if superlative is not None:
+        rest = superlative
+    if rest.endswith('нн'):
+        rest = rest[:-1]
+    elif superlative is None and rest.endswith('ь'):
+        rest = rest[:-1]
+    return prefix + rest
+
+
+def stem_text(text):
+    """Слова текста, сведённые к основам, через пробел."""
+    return ' '.join(stem(word) for word in WORD.findall(text.lower()))
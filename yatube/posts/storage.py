@@ -0,0 +1,73 @@
+import hashlib
+import os
+import posixpath
+import re
+import tempfile
+
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+TEMP_DIR = '.incoming'
+CONTENT_NAME = re.compile(
+    r'(?:^|/)[0-9a-f]{2}/[0-9a-f]{2}/[0-9a-f]{64}(\.\w+)?$'
+)
+
+
+def content_name(directory, digest, extension):
+    """posts/ab/cd/abcd…ef.gif: две ступени каталогов по префиксу хеша."""
+    return posixpath.join(
+        directory, digest[:2], digest[2:4], f'{digest}{extension}'
+    )
+
+
+def is_content_name(name):
+    """Лежит ли файл уже в раскладке по содержимому."""
+    return bool(CONTENT_NAME.search(name))
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    """Файловое хранилище, где имя файла — SHA-256 его содержимого.
+
+    Загрузка пишется во временный файл рядом с MEDIA_ROOT и по ходу
+    хешируется, затем атомарно переименовывается на место. Одинаковые
+    картинки получают одно имя и хранятся один раз; сколько постов
+    ссылается на файл, считает модель StoredImage.
+    """
+
+    def get_available_name(self, name, max_length=None):
+        # Имя определяется содержимым: совпадение означает тот же файл.
+        return name
+
+    def _save(self, name, content):
+        directory, basename = posixpath.split(name.replace('\\', '/'))
+        extension = os.path.splitext(basename)[1].lower()
+        temp_dir = self.path(TEMP_DIR)
+        os.makedirs(temp_dir, exist_ok=True)
+        descriptor, temp_path = tempfile.mkstemp(dir=temp_dir, suffix='.part')
+        try:
+            digest = hashlib.sha256()
+            with os.fdopen(descriptor, 'wb') as temp:
+                if hasattr(content, 'seek'):
+                    content.seek(0)
+                for chunk in content.chunks():
+                    digest.update(chunk)
+                    temp.write(chunk)
+                temp.flush()
+                os.fsync(temp.fileno())
+            if self.file_permissions_mode is not None:
+                os.chmod(temp_path, self.file_permissions_mode)
+            name = content_name(directory, digest.hexdigest(), extension)
+            full_path = self.path(name)
+            os.makedirs(os.path.dirname(full_path), exist_ok=True)
+            # Замена существующего файла тем же содержимым безопасна и
+            # восстанавливает его, если он пропал между проверкой и записью.
+            os.replace(temp_path, full_path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        return name
+
+
+post_image_storage = ContentAddressedStorage()
@@ -0,0 +1,16 @@
+from django import template
+from django.conf import settings
+
+from ..caching import post_card_version
+
+register = template.Library()
+
+
+@register.simple_tag
+def post_card_timeout():
+    return settings.POST_CARD_TIMEOUT
+
+
+@register.filter
+def card_version(post):
+    return post_card_version(post)
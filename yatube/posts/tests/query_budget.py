@@ -0,0 +1,32 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+class QueryBudgetMixin:
+    """Проверка числа SQL-запросов страницы при холодном кеше.
+
+    Бюджет задаётся на страницу и не должен зависеть от числа постов и
+    комментариев на ней: превышение означает N+1. Точки сохранения
+    transaction.atomic не учитываются.
+    """
+
+    def count_queries(self, client, url, method='get', data=None):
+        cache.clear()
+        with CaptureQueriesContext(connection) as context:
+            getattr(client, method)(url, data)
+        return [
+            query['sql']
+            for query in context.captured_queries
+            if not query['sql'].startswith(('SAVEPOINT', 'RELEASE SAVEPOINT'))
+        ]
+
+    def assert_query_budget(self, client, url, budget, **kwargs):
+        queries = self.count_queries(client, url, **kwargs)
+        self.assertLessEqual(
+            len(queries),
+            budget,
+            f'{url}: {len(queries)} запросов при бюджете {budget}:\n'
+            + '\n'.join(queries),
+        )
+        return len(queries)
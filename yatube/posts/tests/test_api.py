@@ -0,0 +1,150 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+@override_settings(NUMBER_OF_PAGES=2)
+class ApiTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='reader')
+        cls.author = User.objects.create_user(username='auth')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.posts = [
+            Post.objects.create(
+                author=cls.author, group=cls.group, text=f'Пост {number}'
+            )
+            for number in range(3)
+        ]
+        for number in range(3):
+            Comment.objects.create(
+                post=cls.posts[0], author=cls.user, text=f'Коммент {number}'
+            )
+        Follow.objects.create(user=cls.user, author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def get(self, url, **params):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        queries = [
+            query['sql']
+            for query in context.captured_queries
+            if 'posts_' in query['sql']
+        ]
+        return response.json(), queries
+
+    def test_feeds_page_through_with_cursor(self):
+        """Ленты листаются курсором и стоят не больше двух запросов."""
+        urls = (
+            reverse('posts:api_index'),
+            reverse('posts:api_group_list', kwargs={'slug': 'test-slug'}),
+            reverse('posts:api_profile', kwargs={'username': 'auth'}),
+            reverse('posts:api_follow_index'),
+        )
+        texts = [post.text for post in reversed(self.posts)]
+        for url in urls:
+            with self.subTest(url=url):
+                first, queries = self.get(url)
+                self.assertLessEqual(len(queries), 2, queries)
+                cache.clear()
+                second, queries = self.get(first['next'])
+                self.assertLessEqual(len(queries), 2, queries)
+                self.assertEqual(
+                    [post['text'] for post in first['results']]
+                    + [post['text'] for post in second['results']],
+                    texts,
+                )
+                self.assertIsNone(second['next'])
+                self.assertIsNotNone(second['previous'])
+
+    def test_page_parameter_is_ignored(self):
+        """?page= не ломает API: ответ — первая страница по курсору."""
+        post = self.posts[0]
+        urls = (
+            reverse('posts:api_index'),
+            reverse('posts:api_follow_index'),
+            reverse('posts:api_post_comments', kwargs={'post_id': post.pk}),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                data, _ = self.get(url, page=2)
+                self.assertEqual(len(data['results']), 2)
+                self.assertIsNone(data['previous'])
+                self.assertNotIn('page=', data['next'])
+
+    def test_fields_limit_columns(self):
+        """fields= отдаёт только нужные поля и не читает лишних колонок."""
+        data, queries = self.get(
+            reverse('posts:api_index'), fields='id,author'
+        )
+        self.assertEqual(
+            data['results'][0], {'id': self.posts[-1].pk, 'author': 'auth'}
+        )
+        select = queries[-1]
+        self.assertIn('"auth_user"."username"', select)
+        self.assertNotIn('"posts_post"."text"', select)
+        self.assertNotIn('posts_group', select)
+
+    def test_unknown_field_is_rejected(self):
+        response = self.client.get(
+            reverse('posts:api_index'), {'fields': 'id,password'}
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('password', response.json()['detail'])
+
+    def test_post_detail_and_comments(self):
+        post = self.posts[0]
+        data, _ = self.get(
+            reverse('posts:api_post_detail', kwargs={'post_id': post.pk}),
+            fields='text,group,comments_count',
+        )
+        self.assertEqual(
+            data,
+            {'text': post.text, 'group': 'test-slug', 'comments_count': 3},
+        )
+        url = reverse('posts:api_post_comments', kwargs={'post_id': post.pk})
+        first, queries = self.get(url, fields='text')
+        self.assertLessEqual(len(queries), 2, queries)
+        second, _ = self.get(first['next'])
+        self.assertEqual(
+            [comment['text'] for comment in first['results']]
+            + [comment['text'] for comment in second['results']],
+            ['Коммент 2', 'Коммент 1', 'Коммент 0'],
+        )
+
+    def test_missing_post_and_anonymous_follow(self):
+        response = self.client.get(
+            reverse('posts:api_post_detail', kwargs={'post_id': 10 ** 6})
+        )
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        response = Client().get(reverse('posts:api_follow_index'))
+        self.assertEqual(response.status_code, 401)
+
+    def test_etag_revalidation(self):
+        """Неизменная лента отвечает 304, новый пост меняет ETag."""
+        url = reverse('posts:api_index')
+        response = self.client.get(url)
+        revalidated = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(revalidated.status_code, 304)
+        Post.objects.create(author=self.author, text='Новый пост')
+        changed = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(changed.status_code, 200)
+        self.assertEqual(changed.json()['results'][0]['text'], 'Новый пост')
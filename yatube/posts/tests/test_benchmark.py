@@ -0,0 +1,132 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.test import SimpleTestCase, TestCase
+
+from users.models import Profile
+
+from ..benchmark import compare, percentile
+from ..models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+VIEWS = (
+    'index',
+    'group_posts',
+    'profile',
+    'post_detail',
+    'follow_index',
+    'post_create',
+    'add_comment',
+)
+
+
+def metrics(p50=10.0, queries=3, memory_kb=100.0):
+    return {
+        'p50_ms': p50,
+        'p95_ms': p50,
+        'p99_ms': p50,
+        'queries': queries,
+        'memory_kb': memory_kb,
+    }
+
+
+class CompareTests(SimpleTestCase):
+    def test_percentile(self):
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 50), 50)
+        self.assertEqual(percentile(values, 99), 99)
+        self.assertEqual(percentile([7], 95), 7)
+
+    def test_regressions(self):
+        """Рост сверх допуска и любой лишний запрос — регрессия."""
+        baseline = {'views': {'index': metrics(), 'profile': metrics()}}
+        results = {
+            'views': {
+                'index': metrics(p50=11.9, memory_kb=119),
+                'profile': metrics(p50=13, queries=4),
+            }
+        }
+        self.assertEqual(
+            compare(results, baseline, tolerance=0.2),
+            [
+                'profile.p50_ms: 13 при базовом 10.0',
+                'profile.p95_ms: 13 при базовом 10.0',
+                'profile.p99_ms: 13 при базовом 10.0',
+                'profile.queries: 4 при базовом 3',
+            ],
+        )
+
+    def test_min_delta_absorbs_noise(self):
+        baseline = {'views': {'index': metrics(p50=0.5)}}
+        results = {'views': {'index': metrics(p50=0.9)}}
+        self.assertEqual(compare(results, baseline, min_delta_ms=0.5), [])
+        self.assertTrue(compare(results, baseline, min_delta_ms=0.1))
+
+
+class BenchViewsCommandTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='reader')
+        cls.author = User.objects.create_user(username='auth')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        Follow.objects.create(user=cls.user, author=cls.author)
+        cls.post = Post.objects.create(
+            author=cls.author, group=cls.group, text='Тестовый пост'
+        )
+        Comment.objects.create(
+            post=cls.post, author=cls.user, text='Тестовый коммент'
+        )
+
+    def tearDown(self):
+        cache.clear()
+
+    def bench(self, **options):
+        out = StringIO()
+        call_command(
+            'bench_views', iterations=3, warmup=1, stdout=out, **options
+        )
+        return out.getvalue()
+
+    def test_writes_results_and_cleans_up(self):
+        """Все страницы замерены, а записи замера удалены вместе со
+        следами в счётчиках."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'bench.json')
+            self.bench(output=path)
+            with open(path, encoding='utf-8') as file:
+                results = json.load(file)
+        self.assertEqual(tuple(results['views']), VIEWS)
+        self.assertEqual(results['meta']['posts'], 1)
+        self.assertGreater(results['views']['post_create']['queries'], 0)
+        self.assertEqual(Post.objects.count(), 1)
+        self.assertEqual(Comment.objects.count(), 1)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comments_count, 1)
+        self.assertEqual(Profile.objects.get(user=self.user).posts_count, 0)
+
+    def test_regression_fails(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'baseline.json')
+            self.bench(output=path, views=['index'])
+            self.assertIn(
+                'Регрессий нет',
+                self.bench(baseline=path, views=['index'], tolerance=100),
+            )
+            with open(path, encoding='utf-8') as file:
+                baseline = json.load(file)
+            baseline['views']['index']['queries'] = 0
+            with open(path, 'w', encoding='utf-8') as file:
+                json.dump(baseline, file)
+            with self.assertRaisesMessage(CommandError, 'index.queries'):
+                self.bench(baseline=path, views=['index'], tolerance=100)
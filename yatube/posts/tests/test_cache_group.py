@@ -0,0 +1,88 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Group, Post
+
+User = get_user_model()
+
+
+class GroupFeedCacheTests(TestCase):
+    """Страницы групп кешируются и сбрасываются по своей группе."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(
+            username='auth', is_staff=True, is_superuser=True
+        )
+        cls.cats = Group.objects.create(
+            title='Коты', slug='cats', description='Про котов'
+        )
+        cls.dogs = Group.objects.create(
+            title='Собаки', slug='dogs', description='Про собак'
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.user)
+        self.post = Post.objects.create(
+            author=self.user, group=self.cats, text='Пост про котов'
+        )
+        self.cats_url = reverse('posts:group_list', kwargs={'slug': 'cats'})
+        self.dogs_url = reverse('posts:group_list', kwargs={'slug': 'dogs'})
+
+    def tearDown(self):
+        cache.clear()
+
+    def group_posts(self, url):
+        return [post.pk for post in self.client.get(url).context['page_obj']]
+
+    def test_group_page_lists_only_group_posts(self):
+        """Страница группы показывает только посты этой группы."""
+        Post.objects.create(author=self.user, text='Пост без группы')
+        self.assertEqual(self.group_posts(self.cats_url), [self.post.pk])
+        self.assertEqual(self.group_posts(self.dogs_url), [])
+
+    def test_other_group_stays_cached(self):
+        """Новый пост в одной группе не сбрасывает страницу другой."""
+        self.client.get(self.cats_url)
+        self.client.get(self.dogs_url)
+        Post.objects.create(author=self.user, group=self.dogs, text='Пёс')
+        self.assertTemplateNotUsed(
+            self.client.get(self.cats_url), 'posts/group_list.html'
+        )
+        self.assertTemplateUsed(
+            self.client.get(self.dogs_url), 'posts/group_list.html'
+        )
+
+    def test_post_edit_moves_post_between_groups(self):
+        """post_edit с новой группой обновляет страницы обеих групп."""
+        self.client.get(self.cats_url)
+        self.client.get(self.dogs_url)
+        self.client.post(
+            reverse('posts:post_edit', kwargs={'post_id': self.post.pk}),
+            {'text': self.post.text, 'group': self.dogs.pk},
+        )
+        self.assertEqual(self.group_posts(self.cats_url), [])
+        self.assertEqual(self.group_posts(self.dogs_url), [self.post.pk])
+
+    def test_admin_list_editable_moves_post(self):
+        """Перенос поста в списке админки обновляет страницы групп."""
+        self.client.get(self.cats_url)
+        self.client.get(self.dogs_url)
+        self.client.post(
+            reverse('admin:posts_post_changelist'),
+            {
+                'form-TOTAL_FORMS': '1',
+                'form-INITIAL_FORMS': '1',
+                'form-0-id': self.post.pk,
+                'form-0-group': self.dogs.pk,
+                '_save': 'Сохранить',
+            },
+        )
+        self.assertEqual(Group.objects.get(pk=self.dogs.pk).posts_count, 1)
+        self.assertEqual(self.group_posts(self.cats_url), [])
+        self.assertEqual(self.group_posts(self.dogs_url), [self.post.pk])
@@ -1,9 +1,15 @@
+from hashlib import md5
+from unittest import mock
+
 from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
 from django.core.cache import cache
-from django.test import Client, TestCase
+from django.http import HttpResponse
+from django.test import Client, RequestFactory, TestCase
 from django.urls import reverse
 
-from ..models import Post
+from ..caching import bump_feed_generation, cache_feed, feed_cache_key
+from ..models import Comment, Follow, Post
 
 User = get_user_model()
 
@@ -26,19 +32,82 @@ class CachePageTests(TestCase):
         cache.clear()
 
     def test_index_cache(self):
-        """Проверка работы cache, три запроса response.content."""
+        """Страница берётся из cache, пока контент не изменился."""
+        first_response = self.authorized_client.get(reverse('posts:index'))
+        second_response = self.authorized_client.get(reverse('posts:index'))
+        self.assertTemplateUsed(first_response, 'posts/index.html')
+        self.assertTemplateNotUsed(second_response, 'posts/index.html')
+        self.assertEqual(first_response.content, second_response.content)
+
+    def test_index_cache_invalidated_on_change(self):
+        """Удаление поста сразу меняет закешированную страницу."""
         Post.objects.create(
-            text='Новый пост',
+            text='Пост для удаления',
             author=self.user,
         )
         first_response = self.authorized_client.get(reverse('posts:index'))
-        content_first = first_response.content
-        post = Post.objects.get(id=1)
-        post.delete()
+        Post.objects.get(text='Пост для удаления').delete()
         second_response = self.authorized_client.get(reverse('posts:index'))
-        content_second = second_response.content
-        self.assertEqual(content_first, content_second)
-        cache.clear()
-        third_response = self.authorized_client.get(reverse('posts:index'))
-        content_third = third_response.content
-        self.assertNotEqual(content_second, content_third)
+        self.assertNotEqual(first_response.content, second_response.content)
+        self.assertNotContains(second_response, 'Пост для удаления')
+
+    def test_stale_page_served_during_regeneration(self):
+        """Пока страницу пересобирает другой процесс, отдаётся старая."""
+        first_response = self.authorized_client.get(reverse('posts:index'))
+        request = first_response.wsgi_request
+        bump_feed_generation()
+        cache.add(f'{feed_cache_key(request)}:lock', True)
+        second_response = self.authorized_client.get(reverse('posts:index'))
+        self.assertTemplateNotUsed(second_response, 'posts/index.html')
+        self.assertEqual(first_response.content, second_response.content)
+
+    def test_lock_is_released_when_view_fails(self):
+        """Упавшая сборка не оставляет блокировку до её таймаута."""
+
+        view = cache_feed()(
+            mock.Mock(side_effect=[HttpResponse(), ValueError])
+        )
+        request = RequestFactory().get('/broken/')
+        request.user = AnonymousUser()
+        view(request)
+        bump_feed_generation()
+        with self.assertRaises(ValueError):
+            view(request)
+        lock_key = f'{feed_cache_key(request)}:lock'
+        self.assertTrue(cache.add(lock_key, True))
+
+    def test_cold_miss_keeps_lock_of_other_request(self):
+        """Запрос без записи в кеше не снимает чужую блокировку."""
+        view = cache_feed()(mock.Mock(return_value=HttpResponse()))
+        request = RequestFactory().get('/cold/')
+        request.user = AnonymousUser()
+        lock_key = f'{feed_cache_key(request)}:lock'
+        cache.add(lock_key, True)
+        view(request)
+        self.assertFalse(cache.add(lock_key, True))
+
+    def test_entries_of_old_format_are_not_read(self):
+        """Записи прежнего формата после выкладки не ломают страницу."""
+        path = md5(reverse('posts:index').encode()).hexdigest()
+        cache.set(f'feed:shared:{path}', (0, None))
+        response = self.authorized_client.get(reverse('posts:index'))
+        self.assertEqual(response.status_code, 200)
+
+    def test_comment_and_follow_invalidate_only_their_pages(self):
+        """Комментарий сбрасывает страницу поста, подписка — ленту
+        подписчика; общие ленты остаются в кеше."""
+        reader = User.objects.create_user(username='reader')
+        client = Client()
+        client.force_login(reader)
+        index = reverse('posts:index')
+        detail = reverse('posts:post_detail', kwargs={'post_id': self.post.pk})
+        follow = reverse('posts:follow_index')
+        for url in (index, detail, follow):
+            client.get(url)
+        Comment.objects.create(
+            post=self.post, author=reader, text='Комментарий'
+        )
+        Follow.objects.create(user=reader, author=self.user)
+        self.assertTemplateNotUsed(client.get(index), 'posts/index.html')
+        self.assertContains(client.get(detail), 'Комментарий')
+        self.assertContains(client.get(follow), 'Тестовый пост')
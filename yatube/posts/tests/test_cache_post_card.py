@@ -0,0 +1,82 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from ..caching import bump_feed_generation, post_card_key
+from ..models import Group, Post
+
+User = get_user_model()
+
+
+class PostCardCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        self.post = Post.objects.create(
+            author=self.user,
+            group=self.group,
+            text='Тестовый пост',
+        )
+        self.url = reverse('posts:profile', kwargs={'username': self.user})
+
+    def tearDown(self):
+        cache.clear()
+
+    def card(self):
+        post = Post.objects.select_related('author', 'group').get(
+            pk=self.post.pk
+        )
+        return cache.get(post_card_key(post))
+
+    def test_card_is_cached(self):
+        """Карточка поста рендерится один раз и берётся из кеша."""
+        self.guest_client.get(self.url)
+        self.assertIn('Тестовый пост', self.card())
+
+    @override_settings(POST_CARD_TIMEOUT=0)
+    def test_timeout_comes_from_settings(self):
+        self.guest_client.get(self.url)
+        self.assertIsNone(self.card())
+
+    def test_post_edit_changes_card_key(self):
+        """Изменённый пост получает новую карточку."""
+        self.guest_client.get(self.url)
+        self.post.text = 'Изменённый пост'
+        self.post.save()
+        self.assertIsNone(self.card())
+        response = self.guest_client.get(self.url)
+        self.assertContains(response, 'Изменённый пост')
+
+    def test_author_rename_changes_card_key(self):
+        """Новое имя автора видно без сброса карточек."""
+        self.guest_client.get(self.url)
+        self.user.first_name = 'Лев'
+        self.user.last_name = 'Толстой'
+        self.user.save()
+        self.assertIsNone(self.card())
+        # Страницу целиком держит cache_feed до смены поколения.
+        bump_feed_generation()
+        response = self.guest_client.get(self.url)
+        self.assertContains(response, 'Лев Толстой')
+
+    def test_group_edit_changes_card_key(self):
+        """Изменение группы меняет карточки её постов."""
+        self.guest_client.get(self.url)
+        self.group.title = 'Новое название'
+        self.group.save()
+        response = self.guest_client.get(self.url)
+        self.assertContains(response, 'Новое название')
+        self.group.delete()
+        response = self.guest_client.get(self.url)
+        self.assertNotContains(response, 'Новое название')
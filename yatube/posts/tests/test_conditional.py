@@ -0,0 +1,105 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..caching import bump_feed_generation
+from ..models import Comment, Group, Post
+
+User = get_user_model()
+
+
+class ConditionalGetTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.post = Post.objects.create(
+            author=cls.user, group=cls.group, text='Тестовый пост'
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+        self.feeds = (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': self.group.slug}),
+            reverse('posts:profile', kwargs={'username': self.user}),
+            reverse('posts:follow_index'),
+        )
+        self.detail = reverse(
+            'posts:post_detail', kwargs={'post_id': self.post.pk}
+        )
+
+    def revalidate(self, url, response):
+        with CaptureQueriesContext(connection) as context:
+            revalidated = self.authorized_client.get(
+                url, HTTP_IF_NONE_MATCH=response['ETag']
+            )
+        post_queries = [
+            query['sql']
+            for query in context.captured_queries
+            if 'posts_' in query['sql']
+        ]
+        return revalidated, post_queries
+
+    def test_unchanged_feed_returns_304_without_queries(self):
+        """Неизменная лента отвечает 304, не трогая таблицы постов."""
+        for url in self.feeds:
+            with self.subTest(url=url):
+                response = self.authorized_client.get(url)
+                revalidated, queries = self.revalidate(url, response)
+                self.assertEqual(revalidated.status_code, 304)
+                self.assertEqual(queries, [])
+
+    def test_feed_etag_changes_with_content_and_user(self):
+        """ETag ленты меняется при новом посте и у другого пользователя."""
+        url = reverse('posts:index')
+        etag = self.authorized_client.get(url)['ETag']
+        self.assertNotEqual(Client().get(url)['ETag'], etag)
+        Post.objects.create(author=self.user, text='Новый пост')
+        revalidated, _ = self.revalidate(url, {'ETag': etag})
+        self.assertEqual(revalidated.status_code, 200)
+
+    def test_post_detail_validators(self):
+        """ETag страницы поста меняется с комментариями, правкой поста,
+        правкой комментария и готовой миниатюрой."""
+        response = self.authorized_client.get(self.detail)
+        self.assertNotIn('Last-Modified', response)
+        revalidated, queries = self.revalidate(self.detail, response)
+        self.assertEqual(revalidated.status_code, 304)
+        self.assertEqual(len(queries), 1)
+        comment = Comment.objects.create(
+            post=self.post, author=self.user, text='Комментарий'
+        )
+        changes = (
+            lambda: self.post.save(),
+            lambda: comment.save(),
+            # Так сообщает о себе готовая миниатюра, см. thumbnails.generate.
+            lambda: bump_feed_generation(),
+        )
+        for change in changes:
+            response = self.authorized_client.get(self.detail)
+            change()
+            revalidated, _ = self.revalidate(self.detail, response)
+            self.assertEqual(revalidated.status_code, 200)
+
+    def test_follow_changes_profile_etag(self):
+        """После подписки профиль не отвечает 304 со старой кнопкой."""
+        author = User.objects.create_user(username='author')
+        url = reverse('posts:profile', kwargs={'username': author})
+        response = self.authorized_client.get(url)
+        self.authorized_client.get(
+            reverse('posts:profile_follow', kwargs={'username': author})
+        )
+        revalidated, _ = self.revalidate(url, response)
+        self.assertEqual(revalidated.status_code, 200)
+        self.assertContains(revalidated, 'Отписаться')
@@ -0,0 +1,106 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class CountersTests(TestCase):
+    """Проверяют денормализованные счётчики постов, подписок и комментариев."""
+
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='auth')
+        self.reader = User.objects.create_user(username='reader')
+        self.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        self.other_group = Group.objects.create(
+            title='Другая группа',
+            slug='other-slug',
+            description='Тестовое описание',
+        )
+        self.post = Post.objects.create(
+            author=self.author, group=self.group, text='Тестовый пост'
+        )
+
+    def assert_counters(self, **expected):
+        actual = {
+            'posts': User.objects.get(pk=self.author.pk).profile.posts_count,
+            'followers': (
+                User.objects.get(pk=self.author.pk).profile.followers_count
+            ),
+            'following': (
+                User.objects.get(pk=self.reader.pk).profile.following_count
+            ),
+            'group': Group.objects.get(pk=self.group.pk).posts_count,
+            'other_group': (
+                Group.objects.get(pk=self.other_group.pk).posts_count
+            ),
+            'comments': (
+                Post.objects.filter(pk=self.post.pk)
+                .values_list('comments_count', flat=True)
+                .first()
+            ),
+        }
+        self.assertEqual(actual, dict(actual, **expected))
+
+    def test_post_counters(self):
+        """Создание, перенос в другую группу и удаление поста."""
+        self.assert_counters(posts=1, group=1)
+        post = Post.objects.get(pk=self.post.pk)
+        post.group = self.other_group
+        post.save()
+        self.assert_counters(posts=1, group=0, other_group=1)
+        post.delete()
+        self.assert_counters(posts=0, group=0, other_group=0, comments=None)
+
+    def test_follow_and_comment_counters(self):
+        """Подписка, отписка и комментарии."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        Comment.objects.create(
+            post=self.post, author=self.reader, text='Комментарий'
+        )
+        self.assert_counters(followers=1, following=1, comments=1)
+        Follow.objects.filter(user=self.reader).delete()
+        Comment.objects.all().delete()
+        self.assert_counters(followers=0, following=0, comments=0)
+
+    def test_repair_counters_command(self):
+        """Команда repair_counters исправляет расхождения после bulk_create."""
+        Post.objects.bulk_create(
+            Post(author=self.author, group=self.group, text=str(n))
+            for n in range(3)
+        )
+        out = StringIO()
+        call_command('repair_counters', '--dry-run', stdout=out)
+        self.assertIn(
+            'users.Profile.posts_count: расхождений 1', out.getvalue()
+        )
+        self.assert_counters(posts=1, group=1)
+        call_command('repair_counters', stdout=StringIO())
+        self.assert_counters(posts=4, group=4)
+
+    def test_pages_render_without_aggregates(self):
+        """Профиль и пост отображаются без COUNT(*) по постам."""
+        urls = (
+            reverse('posts:profile', kwargs={'username': self.author}),
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk}),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                with CaptureQueriesContext(connection) as context:
+                    response = Client().get(url)
+                self.assertContains(response, '1')
+                for query in context.captured_queries:
+                    self.assertNotIn('COUNT(', query['sql'])
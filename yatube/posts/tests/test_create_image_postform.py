@@ -1,3 +1,4 @@
+import hashlib
 import shutil
 import tempfile
 
@@ -8,6 +9,7 @@ from django.test import Client, TestCase, override_settings
 from django.urls import reverse
 
 from ..models import Group, Post
+from ..storage import content_name
 
 User = get_user_model()
 
@@ -50,6 +52,9 @@ class PostFormTests(TestCase):
             b'\x02\x00\x01\x00\x00\x02\x02\x0C'
             b'\x0A\x00\x3B'
         )
+        self.image_name = content_name(
+            'posts', hashlib.sha256(small_gif).hexdigest(), '.gif'
+        )
         uploaded = SimpleUploadedFile(
             name='small.gif', content=small_gif, content_type='image/gif'
         )
@@ -83,7 +88,7 @@ class PostFormTests(TestCase):
             Post.objects.filter(
                 text='Тестовый новый пост',
                 group=self.group,
-                image='posts/small.gif',
+                image=self.image_name,
             ).exists()
         )
         last_post = Post.objects.first()
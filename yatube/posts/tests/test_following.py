@@ -1,9 +1,12 @@
+from io import StringIO
+
 from django.contrib.auth import get_user_model
 from django.core.cache import cache
-from django.test import Client, TestCase
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
 from django.urls import reverse
 
-from ..models import Follow, Post
+from ..models import Follow, Post, TimelineEntry
 
 User = get_user_model()
 
@@ -78,3 +81,84 @@ class PostFollowTests(TestCase):
         self.assertNotEqual(response.context.get('post'), self.post)
         # Проверяем число постов
         self.assertEqual(Follow.objects.count(), follow_count)
+
+
+class TimelineTests(TestCase):
+    """Проверяют материализованную ленту подписок."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = User.objects.create_user(username='reader')
+        cls.author = User.objects.create_user(username='author')
+        cls.star = User.objects.create_user(username='star')
+        cls.fan = User.objects.create_user(username='fan')
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def tearDown(self):
+        cache.clear()
+
+    def feed(self):
+        response = self.client.get(reverse('posts:follow_index'))
+        return [post.pk for post in response.context['page_obj']]
+
+    def test_new_post_fans_out(self):
+        """Пост автора попадает в ленты его подписчиков."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        post = Post.objects.create(author=self.author, text='Новый пост')
+        self.assertTrue(
+            TimelineEntry.objects.filter(user=self.reader, post=post).exists()
+        )
+        self.assertEqual(self.feed(), [post.pk])
+
+    def test_follow_backfills_and_unfollow_prunes(self):
+        """Подписка достраивает ленту, отписка её очищает."""
+        post = Post.objects.create(author=self.author, text='Старый пост')
+        self.client.get(
+            reverse('posts:profile_follow', kwargs={'username': 'author'})
+        )
+        self.assertEqual(self.feed(), [post.pk])
+        self.client.get(
+            reverse('posts:profile_unfollow', kwargs={'username': 'author'})
+        )
+        self.assertFalse(TimelineEntry.objects.filter(user=self.reader))
+        self.assertEqual(self.feed(), [])
+
+    @override_settings(TIMELINE_FANOUT_LIMIT=1)
+    def test_celebrity_posts_read_on_request(self):
+        """Посты знаменитостей не раскладываются, но видны в ленте."""
+        Follow.objects.create(user=self.reader, author=self.star)
+        Follow.objects.create(user=self.fan, author=self.star)
+        Follow.objects.create(user=self.reader, author=self.author)
+        cache.clear()
+        star_post = Post.objects.create(author=self.star, text='Звезда')
+        post = Post.objects.create(author=self.author, text='Автор')
+        self.assertFalse(TimelineEntry.objects.filter(post=star_post))
+        self.assertEqual(self.feed(), [post.pk, star_post.pk])
+
+    @override_settings(TIMELINE_FANOUT_LIMIT=1)
+    def test_celebrity_status_survives_cache_loss(self):
+        """Знаменитость хранится в базе и не теряется вместе с кешем;
+        снимает её команда, достраивая ленты."""
+        Follow.objects.create(user=self.reader, author=self.star)
+        Follow.objects.create(user=self.fan, author=self.star)
+        cache.clear()
+        star_post = Post.objects.create(author=self.star, text='Звезда')
+        self.assertFalse(TimelineEntry.objects.filter(post=star_post))
+        Follow.objects.filter(user=self.fan).delete()
+        cache.clear()
+        self.assertTrue(User.objects.get(pk=self.star.pk).profile.is_celebrity)
+        call_command('update_celebrities', stdout=StringIO())
+        self.assertFalse(
+            User.objects.get(pk=self.star.pk).profile.is_celebrity
+        )
+        self.assertTrue(
+            TimelineEntry.objects.filter(user=self.reader, post=star_post)
+        )
+        post = Post.objects.create(author=self.star, text='Снова автор')
+        self.assertTrue(TimelineEntry.objects.filter(post=post))
+        self.assertEqual(self.feed(), [post.pk, star_post.pk])
@@ -0,0 +1,97 @@
+import hashlib
+import shutil
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from ..models import Post
+from ..storage import post_image_storage
+
+User = get_user_model()
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ImageMetadataTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def assert_metadata(self, post):
+        self.assertEqual((post.image_width, post.image_height), (2, 1))
+        self.assertEqual(post.image_size, len(SMALL_GIF))
+        self.assertEqual(
+            post.image_sha256, hashlib.sha256(SMALL_GIF).hexdigest()
+        )
+
+    def test_upload_stores_metadata(self):
+        """Размеры, вес и хеш картинки сохраняются при загрузке."""
+        self.authorized_client.post(
+            reverse('posts:post_create'),
+            data={
+                'text': 'Пост с картинкой',
+                'image': SimpleUploadedFile(
+                    'small.gif', SMALL_GIF, content_type='image/gif'
+                ),
+            },
+        )
+        self.assert_metadata(Post.objects.get(text='Пост с картинкой'))
+
+    def test_loading_post_does_not_open_image(self):
+        """Пост с сохранёнными размерами загружается без чтения файла."""
+        self.authorized_client.post(
+            reverse('posts:post_create'),
+            data={
+                'text': 'Пост с картинкой',
+                'image': SimpleUploadedFile(
+                    'small.gif', SMALL_GIF, content_type='image/gif'
+                ),
+            },
+        )
+        with mock.patch.object(
+            post_image_storage, 'open', side_effect=AssertionError
+        ):
+            self.assert_metadata(Post.objects.get(text='Пост с картинкой'))
+
+    def test_backfill_command(self):
+        """Команда заполняет метаданные постов, загруженных раньше."""
+        name = post_image_storage.save(
+            'posts/old.gif', ContentFile(SMALL_GIF)
+        )
+        Post.objects.create(author=self.user, text='Старый пост', image=name)
+        out = StringIO()
+        with mock.patch.object(
+            default_storage, 'open', side_effect=AssertionError
+        ):
+            call_command('backfill_image_metadata', stdout=out)
+        self.assertIn('Обновлено постов: 1', out.getvalue())
+        self.assert_metadata(Post.objects.get(text='Старый пост'))
@@ -0,0 +1,84 @@
+import shutil
+import tempfile
+from io import BytesIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from ..models import Post
+
+User = get_user_model()
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+ORIENTATION = 0x0112
+
+
+def image_file(name, image_format, size, mode='RGB', **save_options):
+    output = BytesIO()
+    Image.new(mode, size, 'red').save(output, image_format, **save_options)
+    return SimpleUploadedFile(name, output.getvalue())
+
+
+@override_settings(
+    MEDIA_ROOT=TEMP_MEDIA_ROOT,
+    POST_IMAGE_MAX_SIDE=100,
+    POST_IMAGE_FORMAT='JPEG',
+)
+class ImageNormalizationTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def upload(self, image):
+        return self.authorized_client.post(
+            reverse('posts:post_create'),
+            data={'text': 'Пост с картинкой', 'image': image},
+        )
+
+    def stored_image(self):
+        post = Post.objects.get(text='Пост с картинкой')
+        with post.image.open() as file:
+            image = Image.open(BytesIO(file.read()))
+        return post, image
+
+    def test_large_image_is_downscaled_to_jpeg(self):
+        """Большая картинка уменьшается и перекодируется в JPEG."""
+        self.upload(image_file('big.png', 'PNG', (300, 150), 'RGBA'))
+        post, image = self.stored_image()
+        self.assertTrue(post.image.name.endswith('.jpg'))
+        self.assertEqual(image.format, 'JPEG')
+        self.assertEqual(image.size, (100, 50))
+        self.assertTrue(image.info.get('progressive'))
+        self.assertEqual((post.image_width, post.image_height), (100, 50))
+        self.assertEqual(post.image_size, post.image.size)
+
+    def test_exif_is_applied_and_stripped(self):
+        """Поворот из EXIF применяется, сами метаданные не сохраняются."""
+        exif = Image.Exif()
+        exif[ORIENTATION] = 6
+        self.upload(image_file('photo.jpg', 'JPEG', (40, 20), exif=exif))
+        _, image = self.stored_image()
+        self.assertEqual(image.size, (20, 40))
+        self.assertNotIn('exif', image.info)
+
+    @override_settings(POST_IMAGE_MAX_PIXELS=100)
+    def test_too_many_pixels_rejected(self):
+        """Картинка больше POST_IMAGE_MAX_PIXELS не принимается."""
+        response = self.upload(image_file('huge.png', 'PNG', (20, 20)))
+        self.assertFalse(Post.objects.exists())
+        self.assertTrue(response.context['form'].has_error('image'))
@@ -0,0 +1,115 @@
+import os
+import shutil
+import tempfile
+import time
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache, caches
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage, default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from sorl.thumbnail import get_thumbnail
+
+from ..models import Post
+from ..storage import TEMP_DIR, post_image_storage
+
+User = get_user_model()
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+def make_old(storage, name):
+    past = time.time() - 2 * settings.MEDIA_GC_MIN_AGE
+    os.utime(storage.path(name), (past, past))
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class MediaGarbageCollectorTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        caches['thumbnails'].clear()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+        self.post = Post.objects.create(
+            author=self.user,
+            text='Пост с картинкой',
+            image=SimpleUploadedFile('kept.gif', SMALL_GIF),
+        )
+        replaced = Post.objects.create(
+            author=self.user,
+            text='Пост, картинку которого заменят',
+            image=SimpleUploadedFile('old.gif', SMALL_GIF + b'old'),
+        )
+        self.orphan = replaced.image.name
+        self.orphan_thumbnail = get_thumbnail(replaced.image, '10x10').name
+        replaced.image = ''
+        replaced.save()
+        self.stray = default_storage.save(
+            'cache/00/00/stray.jpg', ContentFile(b'stray')
+        )
+        self.incoming = FileSystemStorage().save(
+            f'{TEMP_DIR}/upload.part', ContentFile(b'part')
+        )
+        for storage, name in (
+            (post_image_storage, self.post.image.name),
+            (post_image_storage, self.orphan),
+            (default_storage, self.orphan_thumbnail),
+            (default_storage, self.stray),
+            (post_image_storage, self.incoming),
+        ):
+            make_old(storage, name)
+
+    def collect(self, *args):
+        out = StringIO()
+        call_command('collect_media', *args, rate=0, stdout=out)
+        return out.getvalue()
+
+    def test_dry_run_reports_without_deleting(self):
+        """--dry-run перечисляет мусор и ничего не удаляет."""
+        report = self.collect('--dry-run')
+        for name in (self.orphan, self.stray):
+            self.assertIn(name, report)
+        self.assertNotIn(self.post.image.name, report)
+        self.assertTrue(post_image_storage.exists(self.orphan))
+        self.assertTrue(default_storage.exists(self.stray))
+
+    def test_collects_orphans_and_stale_thumbnails(self):
+        """Удаляются картинки без постов, их миниатюры и брошенные файлы."""
+        self.collect()
+        self.assertTrue(post_image_storage.exists(self.post.image.name))
+        for storage, name in (
+            (post_image_storage, self.orphan),
+            (default_storage, self.orphan_thumbnail),
+            (default_storage, self.stray),
+            (post_image_storage, self.incoming),
+        ):
+            with self.subTest(name=name):
+                self.assertFalse(storage.exists(name))
+
+    def test_fresh_files_are_kept(self):
+        """Файлы моложе MEDIA_GC_MIN_AGE не трогаются."""
+        os.utime(post_image_storage.path(self.orphan))
+        self.collect()
+        self.assertTrue(post_image_storage.exists(self.orphan))
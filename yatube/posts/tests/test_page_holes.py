@@ -0,0 +1,82 @@
+import re
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Comment, Follow, Post
+
+User = get_user_model()
+
+
+class PageHolesTests(TestCase):
+    """Одна закешированная страница на всех, личное подставляется."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.post = Post.objects.create(author=cls.author, text='Пост')
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.author_client = Client()
+        self.author_client.force_login(self.author)
+        self.reader_client = Client(enforce_csrf_checks=True)
+        self.reader_client.force_login(self.reader)
+
+    def assert_cached(self, response, template):
+        self.assertTemplateNotUsed(response, template)
+        self.assertNotContains(response, '<!--hole:')
+
+    def test_header_is_personal(self):
+        """Шапка своя у каждого, тело страницы общее."""
+        url = reverse('posts:index')
+        guest = self.guest_client.get(url)
+        self.assertTemplateUsed(guest, 'posts/index.html')
+        self.assertContains(guest, 'Войти')
+        reader = self.reader_client.get(url)
+        self.assert_cached(reader, 'posts/index.html')
+        self.assertContains(reader, 'Пользователь: reader')
+        self.assertContains(reader, 'Только избранные авторы')
+        self.assertNotContains(reader, 'Войти')
+
+    def test_follow_button_is_personal(self):
+        """Кнопка подписки зависит от того, кто смотрит профиль."""
+        url = reverse('posts:profile', kwargs={'username': self.author})
+        guest = self.guest_client.get(url)
+        self.assertContains(guest, 'Подписаться')
+        reader = self.reader_client.get(url)
+        self.assert_cached(reader, 'posts/profile.html')
+        self.assertContains(reader, 'Отписаться')
+        author = self.author_client.get(url)
+        self.assertNotContains(author, 'Подписаться')
+        self.assertNotContains(author, 'Отписаться')
+
+    def test_post_detail_holes(self):
+        """Ссылка на правку видна автору, форма несёт свой CSRF-токен."""
+        url = reverse('posts:post_detail', kwargs={'post_id': self.post.pk})
+        edit_url = reverse('posts:post_edit', kwargs={'post_id': self.post.pk})
+        guest = self.guest_client.get(url)
+        self.assertNotContains(guest, edit_url)
+        self.assertNotContains(guest, 'csrfmiddlewaretoken')
+        author = self.author_client.get(url)
+        self.assert_cached(author, 'posts/post_detail.html')
+        self.assertContains(author, edit_url)
+        reader = self.reader_client.get(url)
+        self.assert_cached(reader, 'posts/post_detail.html')
+        self.assertNotContains(reader, edit_url)
+        token = re.search(
+            r'name="csrfmiddlewaretoken" value="([^"]+)"',
+            reader.content.decode(),
+        ).group(1)
+        response = self.reader_client.post(
+            reverse('posts:add_comment', kwargs={'post_id': self.post.pk}),
+            {'text': 'Комментарий', 'csrfmiddlewaretoken': token},
+        )
+        self.assertEqual(response.status_code, 302)
+        self.assertTrue(Comment.objects.filter(text='Комментарий').exists())
@@ -2,6 +2,7 @@ from random import randrange
 
 from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.test import Client, TestCase
 from django.urls import reverse
 
@@ -33,6 +34,7 @@ class PostPaginatorsTests(TestCase):
         )
 
     def setUp(self):
+        cache.clear()
         self.guest_client = Client()
         self.authorized_client = Client()
         self.authorized_client.force_login(self.user)
@@ -62,3 +64,42 @@ class PostPaginatorsTests(TestCase):
                 self.assertEqual(
                     len(response.context['page_obj']), self.page_two
                 )
+
+    def test_cursor_pages_cover_all_posts(self):
+        """Курсоры next/previous обходят ленту без пропусков и повторов."""
+        expected = list(
+            Post.objects.order_by('-pub_date', '-pk').values_list(
+                'pk', flat=True
+            )
+        )
+        for reverse_name in self.templates_page_names:
+            with self.subTest(reverse_name=reverse_name):
+                response = self.guest_client.get(reverse_name)
+                first_page = [post.pk for post in response.context['page_obj']]
+                seen = list(first_page)
+                cursor = response.context['page_obj'].next_cursor
+                while cursor:
+                    response = self.guest_client.get(
+                        reverse_name, {'cursor': cursor}
+                    )
+                    page_obj = response.context['page_obj']
+                    seen.extend(post.pk for post in page_obj)
+                    cursor = page_obj.next_cursor
+                self.assertEqual(seen, expected)
+                response = self.guest_client.get(
+                    reverse_name, {'cursor': page_obj.previous_cursor}
+                )
+                self.assertEqual(
+                    [post.pk for post in response.context['page_obj']],
+                    first_page,
+                )
+
+    def test_broken_cursor_returns_first_page(self):
+        """Испорченный курсор открывает первую страницу."""
+        response = self.guest_client.get(
+            reverse('posts:index'), {'cursor': 'broken'}
+        )
+        self.assertEqual(
+            len(response.context['page_obj']), settings.NUMBER_OF_PAGES
+        )
+        self.assertIsNone(response.context['page_obj'].previous_cursor)
@@ -0,0 +1,155 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Comment, Follow, Group, Post
+from .query_budget import QueryBudgetMixin
+
+User = get_user_model()
+
+# Для авторизованного клиента сюда входят сессия и пользователь;
+# у post_detail к посту и комментариям добавляется запрос полей поста
+# для ETag в post_etag.
+BUDGETS = {
+    'posts:index': 3,
+    'posts:group_list': 4,
+    'posts:profile': 5,
+    'posts:post_detail': 5,
+    'posts:follow_index': 4,
+    'posts:post_create': 3,
+}
+# Запись: подписка переносит посты автора в ленту одним INSERT, а
+# комментарий дописывает основы слов в индекс, не перечитывая другие.
+WRITE_BUDGETS = {
+    'posts:post_edit': 9,
+    'posts:add_comment': 6,
+    'posts:profile_unfollow': 7,
+    'posts:profile_follow': 11,
+}
+
+
+class QueryBudgetTests(QueryBudgetMixin, TestCase):
+    """Число запросов страниц не растёт с числом постов и комментариев."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='reader')
+        cls.author = User.objects.create_user(username='auth')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        Follow.objects.create(user=cls.user, author=cls.author)
+        cls.post = Post.objects.create(
+            author=cls.author, group=cls.group, text='Тестовый пост'
+        )
+        Comment.objects.create(
+            post=cls.post, author=cls.user, text='Комментарий'
+        )
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+        self.urls = {
+            'posts:index': reverse('posts:index'),
+            'posts:group_list': reverse(
+                'posts:group_list', kwargs={'slug': self.group.slug}
+            ),
+            'posts:profile': reverse(
+                'posts:profile', kwargs={'username': self.author}
+            ),
+            'posts:post_detail': reverse(
+                'posts:post_detail', kwargs={'post_id': self.post.pk}
+            ),
+            'posts:follow_index': reverse('posts:follow_index'),
+            'posts:post_create': reverse('posts:post_create'),
+        }
+
+    def fill_pages(self):
+        commenters = [
+            User.objects.create_user(username=f'commenter{n}')
+            for n in range(settings.NUMBER_OF_PAGES)
+        ]
+        for n, commenter in enumerate(commenters):
+            Post.objects.create(
+                author=self.author, group=self.group, text=f'Пост {n}'
+            )
+            Comment.objects.create(
+                post=self.post, author=commenter, text=f'Комментарий {n}'
+            )
+
+    def test_views_stay_within_budget(self):
+        """Страница с одним и с полной страницей постов в бюджете."""
+        single = {
+            name: self.assert_query_budget(
+                self.authorized_client, url, BUDGETS[name]
+            )
+            for name, url in self.urls.items()
+        }
+        self.fill_pages()
+        for name, url in self.urls.items():
+            with self.subTest(view=name):
+                self.assertEqual(
+                    self.assert_query_budget(
+                        self.authorized_client, url, BUDGETS[name]
+                    ),
+                    single[name],
+                )
+
+    def test_writes_stay_within_budget(self):
+        """Запись в бюджете и не зависит от числа постов автора."""
+        own_post = Post.objects.create(
+            author=self.user, group=self.group, text='Свой пост'
+        )
+        writes = {
+            'posts:post_edit': (
+                reverse('posts:post_edit', kwargs={'post_id': own_post.pk}),
+                'post',
+                {'text': 'Исправленный пост', 'group': self.group.pk},
+            ),
+            'posts:add_comment': (
+                reverse('posts:add_comment', kwargs={'post_id': self.post.pk}),
+                'post',
+                {'text': 'Новый комментарий'},
+            ),
+            # Сначала отписка: подписка после неё снова создаёт запись.
+            'posts:profile_unfollow': (
+                reverse(
+                    'posts:profile_unfollow', kwargs={'username': self.author}
+                ),
+                'get',
+                None,
+            ),
+            'posts:profile_follow': (
+                reverse(
+                    'posts:profile_follow', kwargs={'username': self.author}
+                ),
+                'get',
+                None,
+            ),
+        }
+
+        def run():
+            return {
+                name: self.assert_query_budget(
+                    self.authorized_client,
+                    url,
+                    WRITE_BUDGETS[name],
+                    method=method,
+                    data=data,
+                )
+                for name, (url, method, data) in writes.items()
+            }
+
+        single = run()
+        self.assertEqual(Comment.objects.filter(post=self.post).count(), 2)
+        self.fill_pages()
+        for name, count in run().items():
+            with self.subTest(view=name):
+                self.assertEqual(count, single[name])
+        self.assertTrue(
+            Follow.objects.filter(user=self.user, author=self.author).exists()
+        )
@@ -0,0 +1,118 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Comment, Follow, Group, Post
+from ..utils import FORWARD, encode_cursor
+
+User = get_user_model()
+
+FEED_TABLES = (
+    'posts_post',
+    'posts_comment',
+    'posts_follow',
+    'posts_timelineentry',
+)
+
+
+def explain(sql):
+    """Возвращает строки EXPLAIN QUERY PLAN для запроса SQLite."""
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+        return [row[-1] for row in cursor.fetchall()]
+
+
+class QueryPlanTests(TestCase):
+    """Каждый запрос к лентам должен идти по индексу, а не полным SCAN."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='reader')
+        cls.author = User.objects.create_user(username='auth')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.post = Post.objects.create(
+            author=cls.author,
+            group=cls.group,
+            text='Тестовый пост',
+        )
+        Comment.objects.create(
+            post=cls.post, author=cls.user, text='Комментарий'
+        )
+        Follow.objects.create(user=cls.user, author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+        self.urls = (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': self.group.slug}),
+            reverse('posts:profile', kwargs={'username': self.author}),
+            reverse('posts:post_detail', kwargs={'post_id': self.post.id}),
+        )
+
+    def assert_uses_indexes(self, url):
+        with CaptureQueriesContext(connection) as context:
+            self.authorized_client.get(url)
+        for query in context.captured_queries:
+            sql = query['sql']
+            if not sql.startswith('SELECT') or not any(
+                table in sql for table in FEED_TABLES
+            ):
+                continue
+            for step in explain(sql):
+                with self.subTest(url=url, sql=sql, step=step):
+                    self.assertFalse(
+                        step.startswith('SCAN') and 'USING' not in step,
+                        'Полный просмотр таблицы вместо индекса',
+                    )
+                    self.assertNotIn(
+                        'TEMP B-TREE', step, 'Сортировка мимо индекса'
+                    )
+
+    def test_feed_queries_use_indexes(self):
+        """Запросы index, group_list, profile, post_detail идут по индексу."""
+        for url in self.urls:
+            self.assert_uses_indexes(url)
+
+    def test_follow_feed_uses_indexes(self):
+        """Лента подписок читается диапазоном по своей ленте."""
+        self.assert_uses_indexes(reverse('posts:follow_index'))
+
+    def test_deep_page_is_range_scan(self):
+        """Страница по курсору читает индекс диапазоном от курсора.
+
+        Не все версии SQLite выводят границу из OR сами, поэтому
+        проверяется и явное условие на дату в запросе.
+        """
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': self.group.slug}),
+        )
+        cursor = encode_cursor(self.post, FORWARD)
+        for url in urls:
+            with CaptureQueriesContext(connection) as context:
+                self.authorized_client.get(url, {'cursor': cursor})
+            feed = [
+                query['sql']
+                for query in context.captured_queries
+                if query['sql'].startswith('SELECT')
+                and 'FROM "posts_post"' in query['sql']
+                and 'ORDER BY' in query['sql']
+            ]
+            self.assertTrue(feed, url)
+            for sql in feed:
+                with self.subTest(url=url, sql=sql):
+                    self.assertIn('"posts_post"."pub_date" <=', sql)
+                    self.assertTrue(
+                        any('pub_date<?' in step for step in explain(sql)),
+                        explain(sql),
+                    )
@@ -0,0 +1,169 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache, caches
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Comment, Post
+from ..search import SearchPaginator, rebuild_index
+from ..stemmer import stem, stem_text
+
+User = get_user_model()
+
+
+class StemmerTests(TestCase):
+    def test_word_forms_share_stem(self):
+        """Формы одного слова сводятся к одной основе."""
+        for forms in (
+            ('кошка', 'кошки', 'кошками', 'кошкой'),
+            ('красивая', 'красивого', 'красивые'),
+            ('программирование', 'программирования'),
+            ('ёлка', 'елки'),
+        ):
+            with self.subTest(forms=forms):
+                self.assertEqual(len({stem(form) for form in forms}), 1)
+
+    def test_stem_text(self):
+        self.assertEqual(stem_text('Важнейшие НОВОСТИ!'), 'важн новост')
+
+
+class SearchTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.cats = Post.objects.create(
+            author=cls.user, text='Мои кошки любят спать на солнце'
+        )
+        cls.dogs = Post.objects.create(
+            author=cls.user, text='Собаки гуляют во дворе'
+        )
+        Comment.objects.create(
+            post=cls.dogs, author=cls.user, text='А кошку вы не видели?'
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+
+    def search(self, query, **params):
+        return self.client.get(reverse('posts:search'), {'q': query, **params})
+
+    def found(self, query):
+        return list(self.search(query).context['page_obj'])
+
+    def test_results_are_not_page_cached(self):
+        """Поиск не оставляет страниц в кеше и собирается каждый раз."""
+        for _ in range(2):
+            self.assertEqual(self.found('кошка'), [self.cats, self.dogs])
+        self.assertFalse(
+            [key for key in caches['shared']._cache if 'feed:v' in key]
+        )
+
+    def test_new_comment_changes_etag(self):
+        """Слово из нового комментария не прячется за ответом 304."""
+        response = self.search('двор')
+        Comment.objects.create(
+            post=self.cats, author=self.user, text='Кошки во дворе'
+        )
+        revalidated = self.client.get(
+            reverse('posts:search'),
+            {'q': 'двор'},
+            HTTP_IF_NONE_MATCH=response['ETag'],
+        )
+        self.assertEqual(revalidated.status_code, 200)
+        self.assertEqual(
+            list(revalidated.context['page_obj']), [self.dogs, self.cats]
+        )
+
+    def test_finds_word_forms_in_posts_and_comments(self):
+        """Пост с совпадением в тексте выше поста с совпадением в комменте."""
+        self.assertEqual(self.found('кошкой'), [self.cats, self.dogs])
+        self.assertEqual(self.found('собака'), [self.dogs])
+        self.assertEqual(self.found('кошка двор'), [self.dogs])
+        self.assertEqual(self.found('жираф'), [])
+
+    def test_index_follows_changes(self):
+        cats = Post.objects.get(pk=self.cats.pk)
+        cats.text = 'Теперь здесь про жирафов'
+        cats.save()
+        comment = Comment.objects.create(
+            post=cats, author=self.user, text='Жирафы высокие'
+        )
+        self.assertEqual(self.found('жираф'), [self.cats])
+        self.assertEqual(self.found('солнце'), [])
+        comment.delete()
+        self.assertEqual(self.found('высокий'), [])
+        Post.objects.get(pk=self.dogs.pk).delete()
+        self.assertEqual(self.found('собака'), [])
+
+    def test_new_comment_does_not_reread_comments(self):
+        """Новый комментарий дописывается в индекс без чтения старых."""
+        with CaptureQueriesContext(connection) as context:
+            comment = Comment.objects.create(
+                post=self.dogs, author=self.user, text='Жирафы высокие'
+            )
+        self.assertFalse(
+            [
+                query['sql']
+                for query in context.captured_queries
+                if query['sql'].startswith('SELECT')
+                and 'posts_comment' in query['sql']
+            ]
+        )
+        self.assertEqual(self.found('жираф'), [self.dogs])
+        self.assertEqual(self.found('кошка'), [self.cats, self.dogs])
+        comment.text = 'Слоны'
+        comment.save()
+        self.assertEqual(self.found('жираф'), [])
+        self.assertEqual(self.found('слон'), [self.dogs])
+
+    def test_query_syntax_is_not_interpreted(self):
+        for query in ('"', 'кошки OR NOT', '*', 'NEAR(', ''):
+            with self.subTest(query=query):
+                self.assertEqual(self.search(query).status_code, 200)
+
+    @override_settings(NUMBER_OF_PAGES=2)
+    def test_keyset_pages(self):
+        posts = [
+            Post.objects.create(author=self.user, text=f'Про котов {number}')
+            for number in range(3)
+        ]
+        found = []
+        response = self.search('кот')
+        while True:
+            page = response.context['page_obj']
+            found.extend(page)
+            if not page.next_cursor:
+                break
+            response = self.search('кот', cursor=page.next_cursor)
+        self.assertCountEqual(found, posts)
+        previous = self.search(
+            'кот', cursor=page.previous_cursor
+        ).context['page_obj']
+        self.assertEqual(len(previous), 2)
+        self.assertContains(response, '?q=%D0%BA%D0%BE%D1%82&cursor=')
+
+    def test_page_costs_two_queries(self):
+        with CaptureQueriesContext(connection) as context:
+            SearchPaginator('кошки', 10).get_cursor_page()
+        self.assertEqual(len(context.captured_queries), 2)
+
+    def test_rebuild_index(self):
+        with connection.cursor() as cursor:
+            cursor.execute('DELETE FROM posts_search')
+        self.assertEqual(rebuild_index(batch_size=1), 2)
+        self.assertEqual(self.found('кошка'), [self.cats, self.dogs])
+
+    def test_admin_search_uses_index(self):
+        admin = User.objects.create_superuser('admin', 'a@a.ru', 'pass')
+        self.client.force_login(admin)
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(
+                reverse('admin:posts_post_changelist'), {'q': 'собаками'}
+            )
+        self.assertEqual(list(response.context['cl'].result_list), [self.dogs])
+        self.assertFalse(
+            any('LIKE' in query['sql'] for query in context.captured_queries)
+        )
@@ -0,0 +1,117 @@
+import random
+import shutil
+import tempfile
+from collections import Counter
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from ..models import Comment, Follow, Post, StoredImage, TimelineEntry
+from ..search import SearchPaginator
+from ..seed import Population, Seeder
+
+User = get_user_model()
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+END = timezone.make_aware(datetime(2022, 1, 1))
+
+
+class Rollback(Exception):
+    pass
+
+
+class PopulationTests(TestCase):
+    def test_ranks_follow_power_law(self):
+        """Первый ранг выпадает чаще десятого, все pk — из диапазона."""
+        population = Population(random.Random(1), 100, 50, 1.1)
+        counts = Counter(population.popular() for _ in range(20_000))
+        self.assertLessEqual(set(counts), set(range(100, 150)))
+        top = [pk for pk, _ in counts.most_common()]
+        self.assertEqual(top[0], population.pk(0))
+        self.assertGreater(
+            counts[population.pk(0)], 5 * counts[population.pk(9)]
+        )
+
+    def test_permutation_covers_every_pk(self):
+        population = Population(random.Random(2), 1, 12, 1)
+        self.assertEqual(
+            sorted(population.pk(rank) for rank in range(12)),
+            list(range(1, 13)),
+        )
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class SeederTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def tearDown(self):
+        cache.clear()
+
+    def seed(self, seed=1):
+        return Seeder(END, seed=seed, days=30, batch_size=7).run(
+            users=20,
+            groups=3,
+            posts=60,
+            comments=80,
+            follows=40,
+            images=2,
+            image_ratio=0.5,
+        )
+
+    def snapshot(self):
+        return (
+            list(User.objects.values_list('username', 'first_name')),
+            list(
+                Post.objects.values_list(
+                    'pk', 'author', 'group', 'text', 'pub_date', 'image'
+                )
+            ),
+            list(Comment.objects.values_list('post', 'author', 'created')),
+            list(Follow.objects.values_list('user', 'author')),
+        )
+
+    def test_same_seed_same_data(self):
+        """Одно зерно — те же строки, другое зерно — другие."""
+        snapshots = []
+        for seed in (1, 1, 2):
+            try:
+                with transaction.atomic():
+                    self.seed(seed)
+                    snapshots.append(self.snapshot())
+                    raise Rollback
+            except Rollback:
+                pass
+        self.assertEqual(snapshots[0], snapshots[1])
+        self.assertNotEqual(snapshots[0], snapshots[2])
+
+    def test_seeded_data_is_consistent(self):
+        """Счётчики, профили, ленты и поиск сходятся с данными."""
+        created = self.seed()
+        self.assertEqual(created['posts'], Post.objects.count())
+        self.assertEqual(created['comments'], 80)
+        self.assertEqual(created['timeline'], TimelineEntry.objects.count())
+        self.assertEqual(
+            created['timeline'],
+            Follow.objects.filter(author__posts__isnull=False).count(),
+        )
+        post = Post.objects.order_by('-comments_count').first()
+        self.assertEqual(post.comments_count, post.comments.count())
+        self.assertFalse(User.objects.filter(profile__isnull=True))
+        self.assertTrue(Post.objects.exclude(image=''))
+        self.assertEqual(StoredImage.objects.count(), 2)
+        self.assertFalse(
+            Post.objects.exclude(
+                pub_date__range=(END - timedelta(days=30), END)
+            )
+        )
+        word = post.text.split()[0]
+        page = SearchPaginator(word, 100).get_cursor_page()
+        self.assertIn(post, page.object_list)
@@ -80,13 +80,13 @@ class PostFormTests(TestCase):
             self.assertEqual(first_object.text, self.post.text)
             self.assertEqual(first_object.author, self.post.author)
             self.assertEqual(first_object.id, self.post.id)
-            self.assertEqual(image_object, 'posts/small.gif')
+            self.assertEqual(image_object, self.post.image.name)
             self.assertEqual(first_object.image.size, form_data['image'].size)
             self.assertTrue(
                 Post.objects.filter(
                     text='Тестовый пост',
                     group=self.group,
-                    image='posts/small.gif',
+                    image=self.post.image.name,
                 ).exists()
             )
         # Шаблон post_detail содержит один пост отфильтрованный по id
@@ -0,0 +1,94 @@
+import hashlib
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from ..models import Post, StoredImage
+from ..storage import TEMP_DIR, content_name, post_image_storage
+
+User = get_user_model()
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+SHARDED_NAME = content_name(
+    'posts', hashlib.sha256(SMALL_GIF).hexdigest(), '.gif'
+)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ContentAddressedStorageTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def create_post(self, image):
+        return Post.objects.create(
+            author=self.user, text='Пост с картинкой', image=image
+        )
+
+    def references(self, name):
+        return (
+            StoredImage.objects.filter(name=name)
+            .values_list('references', flat=True)
+            .first()
+        )
+
+    def test_identical_uploads_share_one_file(self):
+        """Одинаковые картинки ложатся в один файл по хешу содержимого."""
+        first = self.create_post(SimpleUploadedFile('one.gif', SMALL_GIF))
+        second = self.create_post(SimpleUploadedFile('two.gif', SMALL_GIF))
+        self.assertEqual(first.image.name, SHARDED_NAME)
+        self.assertEqual(second.image.name, SHARDED_NAME)
+        self.assertTrue(post_image_storage.exists(SHARDED_NAME))
+        self.assertEqual(
+            os.listdir(post_image_storage.path(TEMP_DIR)), [],
+            'Временные файлы не удалены',
+        )
+        self.assertEqual(self.references(SHARDED_NAME), 2)
+        second.delete()
+        self.assertEqual(self.references(SHARDED_NAME), 1)
+        first.image = ''
+        first.save()
+        self.assertEqual(self.references(SHARDED_NAME), 0)
+
+    def test_shard_media_moves_flat_files(self):
+        """Команда переносит старые файлы, повторный запуск их не трогает."""
+        flat = FileSystemStorage().save(
+            'posts/old.gif', ContentFile(SMALL_GIF)
+        )
+        posts = [self.create_post(flat), self.create_post(flat)]
+        out = StringIO()
+        call_command('shard_media', batch_size=1, stdout=out)
+        self.assertIn('Перенесено файлов: 1, ошибок: 0', out.getvalue())
+        for post in posts:
+            post.refresh_from_db()
+            self.assertEqual(post.image.name, SHARDED_NAME)
+        self.assertFalse(post_image_storage.exists(flat))
+        self.assertIsNone(self.references(flat))
+        self.assertEqual(self.references(SHARDED_NAME), 2)
+        out = StringIO()
+        call_command('shard_media', stdout=out)
+        self.assertIn('Перенесено файлов: 0, ошибок: 0', out.getvalue())
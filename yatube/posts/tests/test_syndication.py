@@ -0,0 +1,105 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Comment, Group, Post
+
+User = get_user_model()
+
+
+class SyndicationFeedTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.post = Post.objects.create(
+            author=cls.user, group=cls.group, text='Тестовый пост'
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.feeds = (
+            reverse('posts:index_rss'),
+            reverse('posts:index_atom'),
+            reverse('posts:group_rss', kwargs={'slug': 'test-slug'}),
+            reverse('posts:group_atom', kwargs={'slug': 'test-slug'}),
+            reverse('posts:author_rss', kwargs={'username': 'auth'}),
+            reverse('posts:author_atom', kwargs={'username': 'auth'}),
+        )
+
+    def test_feeds_list_posts(self):
+        """Ленты отдают XML с постом и ссылкой на его страницу."""
+        link = reverse('posts:post_detail', kwargs={'post_id': self.post.pk})
+        for url in self.feeds:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertContains(response, 'Тестовый пост')
+                self.assertContains(response, link)
+                self.assertTrue(response.has_header('Last-Modified'))
+
+    @override_settings(SYNDICATION_ITEMS=2)
+    def test_feed_is_bounded(self):
+        for number in range(3):
+            Post.objects.create(author=self.user, text=f'Пост {number}')
+        response = self.client.get(reverse('posts:index_rss'))
+        self.assertEqual(response.content.count(b'<item>'), 2)
+
+    def test_unknown_group_and_author(self):
+        for url in (
+            reverse('posts:group_rss', kwargs={'slug': 'missing'}),
+            reverse('posts:author_atom', kwargs={'username': 'missing'}),
+        ):
+            with self.subTest(url=url):
+                self.assertEqual(self.client.get(url).status_code, 404)
+
+    def test_polling_unchanged_feed_is_304_without_queries(self):
+        """Повторный опрос отвечает 304 и не ходит в базу."""
+        for url in self.feeds:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                for header, value in (
+                    ('HTTP_IF_NONE_MATCH', response['ETag']),
+                    ('HTTP_IF_MODIFIED_SINCE', response['Last-Modified']),
+                ):
+                    with CaptureQueriesContext(connection) as context:
+                        polled = self.client.get(url, **{header: value})
+                    self.assertEqual(polled.status_code, 304)
+                    self.assertEqual(len(context.captured_queries), 0)
+
+    def test_comment_keeps_feed_etag(self):
+        """Комментарий не меняет ленту, и опрос по-прежнему получает 304."""
+        url = reverse('posts:index_rss')
+        etag = self.client.get(url)['ETag']
+        Comment.objects.create(post=self.post, author=self.user, text='Ок')
+        polled = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(polled.status_code, 304)
+
+    def test_post_changes_feed(self):
+        """Новый и удалённый пост сразу видны в ленте автора и группы."""
+        urls = (
+            reverse('posts:group_rss', kwargs={'slug': 'test-slug'}),
+            reverse('posts:author_atom', kwargs={'username': 'auth'}),
+        )
+        etags = {url: self.client.get(url)['ETag'] for url in urls}
+        post = Post.objects.create(
+            author=self.user, group=self.group, text='Свежий пост'
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etags[url])
+                self.assertEqual(response.status_code, 200)
+                self.assertContains(response, 'Свежий пост')
+        post.delete()
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertNotContains(self.client.get(url), 'Свежий пост')
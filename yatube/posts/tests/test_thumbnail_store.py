@@ -0,0 +1,88 @@
+import shutil
+import tempfile
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache, caches
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Post
+
+User = get_user_model()
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ThumbnailStoreTests(TestCase):
+    """Записи sorl о миниатюрах страницы читаются одним запросом."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        for number in range(settings.NUMBER_OF_PAGES):
+            Post.objects.create(
+                author=cls.user,
+                text=f'Пост {number}',
+                image=SimpleUploadedFile(
+                    f'small{number}.gif', SMALL_GIF, content_type='image/gif'
+                ),
+            )
+        Post.objects.create(author=cls.user, text='Пост без картинки')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        caches['thumbnails'].clear()
+        self.client = Client()
+        # Первый рендеринг создаёт миниатюры и записи sorl в базе.
+        self.client.get(reverse('posts:index'))
+
+    def kvstore_queries(self):
+        cache.clear()
+        caches['thumbnails'].clear()
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(reverse('posts:index'))
+        self.assertNotIn('data:image', response.content.decode())
+        return [
+            query['sql']
+            for query in context.captured_queries
+            if 'thumbnail_kvstore' in query['sql']
+        ]
+
+    def test_page_costs_one_lookup(self):
+        """Без кеша записи страницы читаются из базы одним запросом."""
+        self.assertEqual(len(self.kvstore_queries()), 1)
+
+    def test_near_cache_serves_page(self):
+        """Повторная страница берёт записи из LRU, не трогая общий кеш."""
+        self.kvstore_queries()
+        cache.clear()
+        thumbnails = caches['thumbnails']
+        # Синхронизация с очищенным общим кешем сбросила бы LRU, если бы
+        # секундный интервал истёк посреди теста.
+        with mock.patch.object(thumbnails, '_sync_interval', float('inf')):
+            before = thumbnails.stats()
+            self.client.get(reverse('posts:index'))
+            after = thumbnails.stats()
+        self.assertEqual(after['shared_hits'], before['shared_hits'])
+        self.assertEqual(after['misses'], before['misses'])
@@ -0,0 +1,119 @@
+import shutil
+import tempfile
+import threading
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client, TransactionTestCase, override_settings
+from django.urls import reverse
+
+from .. import thumbnails
+from ..caching import feed_generation
+from ..models import Post
+
+User = get_user_model()
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, THUMBNAIL_WORKERS=1)
+class AsyncThumbnailTests(TransactionTestCase):
+    """Миниатюры создаются в фоне, до этого показывается заглушка."""
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='auth')
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def tearDown(self):
+        cache.clear()
+
+    def wait_for_workers(self):
+        thumbnails.get_executor().submit(lambda: None).result()
+
+    def test_placeholder_until_thumbnail_ready(self):
+        """Первый просмотр получает заглушку, следующий — миниатюру."""
+        # bulk_create не шлёт сигналов: миниатюры заранее не создаются.
+        image = default_storage.save('posts/small.gif', ContentFile(SMALL_GIF))
+        Post.objects.bulk_create(
+            [Post(author=self.user, text='Пост с картинкой', image=image)]
+        )
+        url = reverse('posts:profile', kwargs={'username': self.user})
+        response = self.client.get(url)
+        self.assertContains(response, 'data:image/svg+xml')
+        self.wait_for_workers()
+        response = self.client.get(url)
+        self.assertNotContains(response, 'data:image/svg+xml')
+        self.assertContains(response, f'{settings.MEDIA_URL}cache/')
+
+    def test_existing_thumbnail_does_not_invalidate_pages(self):
+        """Повторная задача на готовую миниатюру ничего не сбрасывает."""
+        image = default_storage.save('posts/small.gif', ContentFile(SMALL_GIF))
+        post = Post.objects.create(
+            author=self.user, text='Пост с картинкой', image=image
+        )
+        self.wait_for_workers()
+        generation = feed_generation()
+        geometry, options = thumbnails.POST_THUMBNAILS[0]
+        thumbnails.generate(post.image.name, geometry, dict(options))
+        self.assertEqual(feed_generation(), generation)
+
+    def test_concurrent_schedule_submits_once(self):
+        """Одну миниатюру из разных потоков ставят в очередь один раз."""
+        geometry, options = thumbnails.POST_THUMBNAILS[0]
+        start = threading.Barrier(8)
+
+        def schedule():
+            start.wait()
+            thumbnails.schedule('posts/small.gif', geometry, options)
+
+        executor = mock.Mock()
+        with mock.patch.object(
+            thumbnails, 'get_executor', return_value=executor
+        ):
+            workers = [threading.Thread(target=schedule) for _ in range(8)]
+            for worker in workers:
+                worker.start()
+            for worker in workers:
+                worker.join()
+        thumbnails._pending.clear()
+        executor.submit.assert_called_once()
+
+    def test_post_create_pregenerates_thumbnails(self):
+        """post_create ставит миниатюры в очередь после коммита."""
+        self.client.post(
+            reverse('posts:post_create'),
+            {
+                'text': 'Новый пост',
+                'image': SimpleUploadedFile(
+                    name='new.gif',
+                    content=SMALL_GIF,
+                    content_type='image/gif',
+                ),
+            },
+        )
+        self.wait_for_workers()
+        response = self.client.get(
+            reverse('posts:profile', kwargs={'username': self.user})
+        )
+        self.assertNotContains(response, 'data:image/svg+xml')
+        self.assertContains(response, f'{settings.MEDIA_URL}cache/')
@@ -0,0 +1,182 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connections, transaction
+from sorl.thumbnail import default
+from sorl.thumbnail.base import ThumbnailBackend
+from sorl.thumbnail.conf import defaults as default_settings
+from sorl.thumbnail.conf import settings as thumbnail_settings
+from sorl.thumbnail.images import DummyImageFile, ImageFile
+from sorl.thumbnail.kvstores.base import add_prefix
+from sorl.thumbnail.kvstores.cached_db_kvstore import EMPTY_VALUE
+from sorl.thumbnail.kvstores.cached_db_kvstore import KVStore as CachedDBStore
+from sorl.thumbnail.models import KVStore as KVStoreModel
+
+from core.timing import timed
+
+from .caching import (bump_feed_generation, group_scope,
+                      invalidate_post_cards)
+from .models import Post
+from .storage import post_image_storage
+
+logger = logging.getLogger(__name__)
+
+# Размеры из шаблонов includes/ul.html и posts/post_detail.html.
+POST_THUMBNAILS = (('960x339', {'crop': 'center', 'upscale': True}),)
+
+_executor = None
+_executor_lock = threading.Lock()
+_pending = set()
+_pending_lock = threading.Lock()
+
+
+def get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.THUMBNAIL_WORKERS,
+                thread_name_prefix='thumbnails',
+            )
+        return _executor
+
+
+def generate(name, geometry, options):
+    """Создаёт миниатюру в фоновом потоке.
+
+    Закешированные карточки и страницы с заглушкой сбрасываются, чтобы
+    следующий запрос показал готовую миниатюру. Если миниатюра уже
+    есть, сбрасывать нечего.
+    """
+    try:
+        source = ImageFile(name, post_image_storage)
+        thumbnail = default.backend.get_thumbnail_file(
+            source, geometry, dict(options)
+        )
+        if default.kvstore.get(thumbnail):
+            return
+        ThumbnailBackend.get_thumbnail(
+            default.backend, source, geometry, **options
+        )
+        posts = list(
+            Post.objects.filter(image=name).select_related('author', 'group')
+        )
+        invalidate_post_cards(posts)
+        bump_feed_generation(
+            *{group_scope(post.group.slug) for post in posts if post.group}
+        )
+    except Exception:
+        logger.exception('Не удалось создать миниатюру %s %s', name, geometry)
+    finally:
+        with _pending_lock:
+            _pending.discard((name, geometry, repr(sorted(options.items()))))
+        connections.close_all()
+
+
+def schedule(name, geometry, options):
+    """Ставит миниатюру в очередь, если она ещё не ждёт там."""
+    task = (name, geometry, repr(sorted(options.items())))
+    with _pending_lock:
+        if task in _pending:
+            return None
+        _pending.add(task)
+    return get_executor().submit(generate, name, geometry, options)
+
+
+def pregenerate(image):
+    """После коммита ставит в очередь все миниатюры картинки поста."""
+    if not image or not settings.THUMBNAIL_WORKERS:
+        return
+    name = image.name
+    transaction.on_commit(
+        lambda: [
+            schedule(name, geometry, dict(options))
+            for geometry, options in POST_THUMBNAILS
+        ]
+    )
+
+
+class AsyncThumbnailBackend(ThumbnailBackend):
+    """Бэкенд sorl, который не режет картинки во время рендеринга.
+
+    Если миниатюры ещё нет в хранилище ключей sorl, она ставится в очередь
+    фоновых потоков, а шаблон получает заглушку нужного размера.
+    При THUMBNAIL_WORKERS = 0 миниатюры создаются синхронно, как в sorl.
+    """
+
+    def get_thumbnail_file(self, file_, geometry_string, options):
+        """ImageFile миниатюры так, как его ищет sorl; файл не читается."""
+        source = ImageFile(file_)
+        if thumbnail_settings.THUMBNAIL_PRESERVE_FORMAT:
+            options.setdefault('format', self._get_format(source))
+        for key, value in self.default_options.items():
+            options.setdefault(key, value)
+        for key, attr in self.extra_options:
+            value = getattr(thumbnail_settings, attr)
+            if value != getattr(default_settings, attr):
+                options.setdefault(key, value)
+        name = self._get_thumbnail_filename(source, geometry_string, options)
+        return ImageFile(name, default.storage)
+
+    def get_thumbnail(self, file_, geometry_string, **options):
+        with timed('thumbnail'):
+            return self._get_thumbnail(file_, geometry_string, options)
+
+    def _get_thumbnail(self, file_, geometry_string, options):
+        if not settings.THUMBNAIL_WORKERS:
+            return super().get_thumbnail(file_, geometry_string, **options)
+        if not file_:
+            raise ValueError('falsey file_ argument in get_thumbnail()')
+        requested = dict(options)
+        thumbnail = self.get_thumbnail_file(file_, geometry_string, options)
+        cached = default.kvstore.get(thumbnail)
+        if cached:
+            return cached
+        schedule(file_.name, geometry_string, requested)
+        return DummyImageFile(geometry_string)
+
+
+class PrefetchKVStore(CachedDBStore):
+    """Хранилище sorl, которое умеет загрузить записи страницы разом.
+
+    Записи живут в кеше THUMBNAIL_CACHE с процессным LRU; отсутствие
+    записи кешируется так же, как в cached_db, чтобы не ходить в базу
+    за миниатюрами, которых ещё нет.
+    """
+
+    def prefetch(self, image_files):
+        """Кладёт записи в LRU: один запрос к кешу и не больше одного к БД."""
+        keys = {add_prefix(image_file.key) for image_file in image_files}
+        if not keys:
+            return
+        missed = keys - set(self.cache.get_many(keys))
+        if not missed:
+            return
+        found = dict(
+            KVStoreModel.objects.filter(key__in=missed).values_list(
+                'key', 'value'
+            )
+        )
+        self.cache.set_many(
+            {key: found.get(key, EMPTY_VALUE) for key in missed},
+            thumbnail_settings.THUMBNAIL_CACHE_TIMEOUT,
+        )
+
+
+def prefetch_thumbnails(posts):
+    """Загружает записи sorl о миниатюрах постов до рендеринга карточек."""
+    backend = default.backend
+    kvstore = default.kvstore
+    if not isinstance(backend, AsyncThumbnailBackend) or not isinstance(
+        kvstore, PrefetchKVStore
+    ):
+        return
+    with timed('thumbnail'):
+        kvstore.prefetch(
+            backend.get_thumbnail_file(post.image, geometry, dict(options))
+            for post in posts
+            if post.image
+            for geometry, options in POST_THUMBNAILS
+        )
@@ -0,0 +1,187 @@
+from operator import attrgetter
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from users.models import Profile
+
+from .models import Follow, Post, TimelineEntry
+from .utils import CursorPaginator
+
+CELEBRITIES_KEY = 'timeline:celebrities'
+
+
+def celebrity_ids():
+    """Авторы, чьи посты не раскладываются по лентам подписчиков.
+
+    Признак хранится в Profile.is_celebrity, набор кешируется на
+    TIMELINE_CELEBRITY_TIMEOUT секунд и сбрасывается при его смене.
+    """
+    celebrities = cache.get(CELEBRITIES_KEY)
+    if celebrities is None:
+        celebrities = frozenset(
+            Profile.objects.filter(is_celebrity=True).values_list(
+                'user_id', flat=True
+            )
+        )
+        cache.set(
+            CELEBRITIES_KEY, celebrities, settings.TIMELINE_CELEBRITY_TIMEOUT
+        )
+    return celebrities
+
+
+def promote(author_ids=None):
+    """Отмечает знаменитостями авторов, у которых подписчиков больше
+    TIMELINE_FANOUT_LIMIT; без author_ids — всех таких авторов.
+
+    Это один UPDATE, поэтому его делает сама подписка. Ленты не
+    трогаются: старые записи автора просто перестают читаться.
+    """
+    profiles = Profile.objects.filter(
+        is_celebrity=False, followers_count__gt=settings.TIMELINE_FANOUT_LIMIT
+    )
+    if author_ids is not None:
+        profiles = profiles.filter(user_id__in=author_ids)
+    promoted = profiles.update(is_celebrity=True)
+    if promoted:
+        cache.delete(CELEBRITIES_KEY)
+    return promoted
+
+
+def demote():
+    """Снимает признак с авторов, у которых подписчиков стало не больше
+    TIMELINE_FANOUT_LIMIT, и достраивает ленты их подписчиков.
+
+    Достройка долгая, поэтому её делает команда update_celebrities, а не
+    запрос. Пока признак стоит, посты автора подмешиваются при чтении, и
+    ленты верны. Ленты достраиваются до снятия признака, а посты,
+    вышедшие за это время без раскладки, — ещё раз после него.
+    """
+    authors = list(
+        Profile.objects.filter(
+            is_celebrity=True,
+            followers_count__lte=settings.TIMELINE_FANOUT_LIMIT,
+        ).values_list('user_id', flat=True)
+    )
+    for author_id in authors:
+        started = timezone.now()
+        followers = list(
+            Follow.objects.filter(author_id=author_id).values_list(
+                'user', flat=True
+            )
+        )
+        for user_id in followers:
+            add_entries(user_id, author_id)
+        Profile.objects.filter(user_id=author_id).update(is_celebrity=False)
+        cache.delete(CELEBRITIES_KEY)
+        for user_id in followers:
+            add_entries(user_id, author_id, since=started)
+    return authors
+
+
+def fan_out(post):
+    """Раскладывает новый пост по лентам подписчиков автора."""
+    if post.author_id in celebrity_ids():
+        return
+    TimelineEntry.objects.bulk_create(
+        (
+            TimelineEntry(
+                user_id=user_id,
+                post_id=post.pk,
+                author_id=post.author_id,
+                pub_date=post.pub_date,
+            )
+            for user_id in Follow.objects.filter(
+                author_id=post.author_id
+            ).values_list('user', flat=True)
+        ),
+        batch_size=settings.TIMELINE_BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+
+
+def add_entries(user_id, author_id, since=None):
+    """Добавляет в ленту пользователя посты автора, с since — не старше."""
+    posts = Post.objects.filter(author_id=author_id)
+    if since is not None:
+        posts = posts.filter(pub_date__gte=since)
+    TimelineEntry.objects.bulk_create(
+        (
+            TimelineEntry(
+                user_id=user_id,
+                post_id=post_id,
+                author_id=author_id,
+                pub_date=pub_date,
+            )
+            for post_id, pub_date in posts.values_list('pk', 'pub_date')
+        ),
+        batch_size=settings.TIMELINE_BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+
+
+def backfill(user_id, author_id):
+    """Добавляет в ленту пользователя все посты автора."""
+    if author_id not in celebrity_ids():
+        add_entries(user_id, author_id)
+
+
+def prune(user_id, author_id):
+    """Убирает посты автора из ленты пользователя."""
+    TimelineEntry.objects.filter(
+        user_id=user_id, author_id=author_id
+    ).delete()
+
+
+class FollowFeedPaginator(CursorPaginator):
+    """Лента подписок: материализованная лента плюс посты знаменитостей.
+
+    object_list — обычный запрос через JOIN с Follow, он нужен только для
+    страниц по номеру (?page=). Страницы по курсору собираются из строк
+    TimelineEntry пользователя и из постов знаменитостей, на которых он
+    подписан: их посты не раскладываются и читаются при запросе, так что
+    страница стоит не больше двух запросов. related и fields задают
+    select_related и only() для постов.
+    """
+
+    def __init__(
+        self,
+        object_list,
+        per_page,
+        user=None,
+        related=('author', 'group'),
+        fields=None,
+        **kwargs,
+    ):
+        super().__init__(object_list, per_page, **kwargs)
+        self.user = user
+        self.related = related
+        self.fields = fields
+
+    def get_sources(self):
+        entries = TimelineEntry.objects.filter(user=self.user).select_related(
+            'post', *(f'post__{name}' for name in self.related)
+        )
+        if self.fields:
+            entries = entries.only(
+                'pub_date', 'post', *(f'post__{name}' for name in self.fields)
+            )
+        celebrities = celebrity_ids()
+        if not celebrities:
+            return ((entries, 'post_id', attrgetter('post')),)
+        posts = Post.objects.filter(
+            author_id__in=celebrities, author__following__user=self.user
+        )
+        if self.related:
+            posts = posts.select_related(*self.related)
+        if self.fields:
+            posts = posts.only(*self.fields)
+        return (
+            (
+                entries.exclude(author_id__in=celebrities),
+                'post_id',
+                attrgetter('post'),
+            ),
+            (posts, 'pk', None),
+        )
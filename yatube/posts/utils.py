@@ -1,7 +1,115 @@
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from binascii import Error as BinasciiError
+
 from django.conf import settings
 from django.core.paginator import Paginator
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+FORWARD = 'n'
+BACKWARD = 'p'
+
+
+def encode_cursor(post, direction, date_field='pub_date'):
+    """Упаковывает ключ (дата, id) записи в непрозрачную строку."""
+    raw = f'{direction}|{getattr(post, date_field).isoformat()}|{post.pk}'
+    return urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Распаковывает курсор; для испорченного курсора возвращает None."""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        direction, pub_date, pk = (
+            urlsafe_b64decode(padded.encode()).decode().split('|')
+        )
+        pub_date = parse_datetime(pub_date)
+        pk = int(pk)
+    except (BinasciiError, UnicodeDecodeError, ValueError):
+        return None
+    if direction not in (FORWARD, BACKWARD) or pub_date is None:
+        return None
+    return direction, pub_date, pk
+
+
+class CursorPaginator(Paginator):
+    """Пагинатор по ключу (pub_date, id) вместо OFFSET.
+
+    Страница выбирается условием по ключу последнего показанного поста,
+    поэтому любая страница стоит столько же, сколько первая, а COUNT(*)
+    выполняется только при обращении к count/num_pages. date_field
+    задаёт поле даты ключа у наследников, например для комментариев.
+    """
+
+    date_field = 'pub_date'
+
+    def get_sources(self):
+        """Источники ленты: тройки (queryset, поле id, строка -> пост).
+
+        Все источники упорядочены по (pub_date, id) одинаково, поэтому
+        один курсор подходит к каждому из них.
+        """
+        return ((self.object_list, 'pk', None),)
+
+    def fetch(self, queryset, id_field, decoded):
+        """Выбирает per_page + 1 строк после курсора в его направлении."""
+        date = self.date_field
+        queryset = queryset.order_by(f'-{date}', f'-{id_field}')
+        if decoded is not None:
+            direction, value, pk = decoded
+            # Избыточное условие на одну дату даёт SQLite границу
+            # диапазона по индексу: без него OR читает все более новые
+            # строки, и глубокая страница дороже первой.
+            if direction == FORWARD:
+                queryset = queryset.filter(
+                    Q(**{f'{date}__lt': value})
+                    | Q(**{date: value, f'{id_field}__lt': pk}),
+                    **{f'{date}__lte': value},
+                )
+            else:
+                queryset = queryset.filter(
+                    Q(**{f'{date}__gt': value})
+                    | Q(**{date: value, f'{id_field}__gt': pk}),
+                    **{f'{date}__gte': value},
+                ).reverse()
+        return list(queryset[: self.per_page + 1])
+
+    def get_cursor_page(self, cursor=None):
+        """Возвращает Page с атрибутами next_cursor и previous_cursor."""
+        decoded = decode_cursor(cursor) if cursor else None
+        direction = decoded[0] if decoded is not None else FORWARD
+        object_list = []
+        for queryset, id_field, to_post in self.get_sources():
+            rows = self.fetch(queryset, id_field, decoded)
+            object_list.extend(map(to_post, rows) if to_post else rows)
+        object_list.sort(
+            key=lambda post: (getattr(post, self.date_field), post.pk),
+            reverse=direction == FORWARD,
+        )
+        has_more = len(object_list) > self.per_page
+        object_list = object_list[: self.per_page]
+        if direction == BACKWARD:
+            object_list.reverse()
+            has_next, has_previous = True, has_more
+        else:
+            has_next, has_previous = has_more, decoded is not None
+        page = self._get_page(object_list, None, self)
+        page.next_cursor = (
+            encode_cursor(object_list[-1], FORWARD, self.date_field)
+            if has_next and object_list
+            else None
+        )
+        page.previous_cursor = (
+            encode_cursor(object_list[0], BACKWARD, self.date_field)
+            if has_previous and object_list
+            else None
+        )
+        return page
 
 
-def get_page_obj(posts, request):
-    paginator = Paginator(posts, settings.NUMBER_OF_PAGES)
-    return paginator.get_page(request.GET.get('page'))
+def get_page_obj(posts, request, paginator_class=CursorPaginator, **kwargs):
+    paginator = paginator_class(posts, settings.NUMBER_OF_PAGES, **kwargs)
+    cursor = request.GET.get('cursor')
+    if cursor is None and 'page' in request.GET:
+        return paginator.get_page(request.GET.get('page'))
+    return paginator.get_cursor_page(cursor)
@@ -1,29 +1,46 @@
+from urllib.parse import urlencode
+
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.contrib.auth.decorators import login_required
+from django.db import transaction
 from django.shortcuts import get_object_or_404, redirect, render
-from django.views.decorators.cache import cache_page
+from django.views.decorators.http import condition
+
+from core.db import retry_on_lock
 
+from .caching import (cache_feed, group_scope, post_page_scopes,
+                      search_scopes)
 from .forms import CommentForm, PostForm
+from .freshness import feed_etag, post_etag
 from .models import Follow, Group, Post
+from .search import SearchPaginator
+from .thumbnails import prefetch_thumbnails
+from .timeline import FollowFeedPaginator
 from .utils import get_page_obj
 
 User = get_user_model()
 
 
-@cache_page(20, key_prefix="index_page")
+@condition(etag_func=feed_etag())
+@cache_feed()
 def index(request):
     posts = Post.objects.select_related('author', 'group')
     page_obj = get_page_obj(posts, request)
+    prefetch_thumbnails(page_obj)
     context = {
         'page_obj': page_obj,
     }
     return render(request, 'posts/index.html', context)
 
 
+@condition(etag_func=feed_etag(group_scope))
+@cache_feed(group_scope)
 def group_posts(request, slug):
     group = get_object_or_404(Group, slug=slug)
-    posts = Post.objects.select_related('group')
+    posts = group.posts.select_related('author', 'group')
     page_obj = get_page_obj(posts, request)
+    prefetch_thumbnails(page_obj)
     context = {
         'group': group,
         'page_obj': page_obj,
@@ -31,32 +48,61 @@ def group_posts(request, slug):
     return render(request, 'posts/group_list.html', context)
 
 
+# Кнопка подписки в дырке зависит от подписок читателя, поэтому ETag
+# учитывает его область, а сама страница в кеше общая.
+@condition(etag_func=feed_etag(per_user=True))
+@cache_feed()
 def profile(request, username):
-    author = get_object_or_404(User, username=username)
-    following = (
-        author.following.filter(user_id=request.user.id).exists()
-        and request.user.is_authenticated
+    author = get_object_or_404(
+        User.objects.select_related('profile'), username=username
     )
-    posts = author.posts.all()
+    posts = author.posts.select_related('author', 'group')
     page_obj = get_page_obj(posts, request)
+    prefetch_thumbnails(page_obj)
     context = {
         'author': author,
         'page_obj': page_obj,
-        'following': following,
-        'posts_count': author.posts.count(),
+        'posts_count': author.profile.posts_count,
     }
     return render(request, 'posts/profile.html', context)
 
 
+@condition(etag_func=feed_etag(search_scopes))
+def search(request):
+    """Посты, в тексте или комментариях которых есть слова запроса.
+
+    Страницы не кешируются: у каждого запроса свой адрес, и кеш
+    заполнился бы поисками, которые не повторятся.
+    """
+    query = request.GET.get('q', '').strip()
+    page_obj = SearchPaginator(
+        query, settings.NUMBER_OF_PAGES
+    ).get_cursor_page(request.GET.get('cursor'))
+    prefetch_thumbnails(page_obj)
+    context = {
+        'query': query,
+        'query_string': urlencode({'q': query}),
+        'page_obj': page_obj,
+    }
+    return render(request, 'posts/search.html', context)
+
+
+@condition(etag_func=post_etag)
+@cache_feed(post_page_scopes)
 def post_detail(request, post_id):
-    post = get_object_or_404(Post, id=post_id)
-    form = CommentForm(request.POST or None)
-    comments = post.comments.all()
-    context = {'post': post, 'form': form, 'comments': comments}
+    post = get_object_or_404(
+        Post.objects.select_related('author__profile', 'group'), id=post_id
+    )
+    comments = post.comments.select_related('author')
+    # Форму выводит дырка comment_form; в контексте она остаётся для
+    # тех, кто проверяет контекст страницы.
+    context = {'post': post, 'form': CommentForm(), 'comments': comments}
     return render(request, 'posts/post_detail.html', context)
 
 
 @login_required
+@retry_on_lock
+@transaction.atomic
 def post_create(request):
     form = PostForm(request.POST or None, files=request.FILES or None)
     if form.is_valid():
@@ -73,6 +119,8 @@ def post_create(request):
 
 
 @login_required
+@retry_on_lock
+@transaction.atomic
 def post_edit(request, post_id):
     post = get_object_or_404(Post, id=post_id)
     if post.author != request.user:
@@ -92,6 +140,8 @@ def post_edit(request, post_id):
 
 
 @login_required
+@retry_on_lock
+@transaction.atomic
 def add_comment(request, post_id):
     post = get_object_or_404(Post, id=post_id)
     form = CommentForm(request.POST or None)
@@ -104,17 +154,24 @@ def add_comment(request, post_id):
 
 
 @login_required
+@condition(etag_func=feed_etag(per_user=True))
+@cache_feed(per_user=True)
 def follow_index(request):
     """Посты всех авторов, на которых подписан текущий пользователь"""
     posts_list = Post.objects.filter(
         author__following__user=request.user
-    ).all()
-    page_obj = get_page_obj(posts_list, request)
+    ).select_related('author', 'group')
+    page_obj = get_page_obj(
+        posts_list, request, FollowFeedPaginator, user=request.user
+    )
+    prefetch_thumbnails(page_obj)
     context = {'posts_list': posts_list, 'page_obj': page_obj}
     return render(request, 'posts/follow.html', context)
 
 
 @login_required
+@retry_on_lock
+@transaction.atomic
 def profile_follow(request, username):
     author = get_object_or_404(User, username=username)
     user = request.user
@@ -124,6 +181,8 @@ def profile_follow(request, username):
 
 
 @login_required
+@retry_on_lock
+@transaction.atomic
 def profile_unfollow(request, username):
     user = request.user
     Follow.objects.filter(user=user, author__username=username).delete()
@@ -0,0 +1,21 @@
+from django.conf import settings
+from django.contrib import admin
+
+from .models import Profile
+
+
+class ProfileAdmin(admin.ModelAdmin):
+    list_display = (
+        'pk',
+        'user',
+        'posts_count',
+        'followers_count',
+        'following_count',
+        'is_celebrity',
+    )
+    list_filter = ('is_celebrity',)
+    search_fields = ('user__username',)
+    empty_value_display = settings.EMPTY_VALUE
+
+
+admin.site.register(Profile, ProfileAdmin)
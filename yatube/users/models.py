@@ -0,0 +1,40 @@
+from django.contrib.auth import get_user_model
+from django.db import models
+
+User = get_user_model()
+
+
+class Profile(models.Model):
+    """Счётчики пользователя, поддерживаемые сигналами через F()."""
+
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        related_name='profile',
+        verbose_name='Пользователь',
+    )
+    posts_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Постов',
+    )
+    followers_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Подписчиков',
+    )
+    following_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Подписок',
+    )
+    is_celebrity = models.BooleanField(
+        default=False,
+        db_index=True,
+        verbose_name='Знаменитость',
+        help_text='Посты не раскладываются по лентам подписчиков',
+    )
+
+    class Meta:
+        verbose_name = 'профиль'
+        verbose_name_plural = 'Профили'
+
+    def __str__(self):
+        return str(self.user)
@@ -29,6 +29,26 @@ LOGIN_REDIRECT_URL = 'posts:index'
 NUMBER_OF_PAGES = 10
 LEN_TEXT_STR = 15
 
+# Посты авторов с большим числом подписчиков не раскладываются по лентам,
+# а подмешиваются в ленту подписок при чтении. Знаменитостью автор
+# становится при подписке, а перестаёт — командой update_celebrities.
+TIMELINE_FANOUT_LIMIT = 1000
+TIMELINE_CELEBRITY_TIMEOUT = 300
+TIMELINE_BATCH_SIZE = 500
+
+# Карточки постов includes/ul.html кешируются под версией из полей поста,
+# автора и группы (posts.caching.post_card_version); готовая миниатюра
+# сбрасывает их явно.
+POST_CARD_TIMEOUT = 60 * 60 * 24
+POST_CARD_INVALIDATE_BATCH = 500
+
+# Страницы лент живут до смены поколения контента, но не дольше таймаута.
+FEED_CACHE_TIMEOUT = 60 * 60
+FEED_CACHE_LOCK_TIMEOUT = 10
+
+# RSS/Atom отдают только последние посты.
+SYNDICATION_ITEMS = 20
+
 INSTALLED_APPS = [
     'django.contrib.admin',
     'django.contrib.auth',
@@ -45,7 +65,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.timing.ServerTimingMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'core.replicas.ReplicaPinMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -60,7 +82,7 @@ TEMPLATES_DIR = os.path.join(BASE_DIR, 'templates')
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'core.timing.DjangoTemplates',
         'DIRS': [TEMPLATES_DIR],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -82,8 +104,40 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
-    }
+        # Соединение живёт между запросами: прагмы ставятся один раз.
+        'CONN_MAX_AGE': 60,
+    },
+    # Копия основной базы только для чтения. Локально её держит в
+    # актуальном состоянии manage.py replicate_sqlite.
+    'replica': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.path.join(BASE_DIR, 'db.replica.sqlite3'),
+        'CONN_MAX_AGE': 60,
+        'TEST': {'MIRROR': 'default'},
+    },
+}
+DATABASE_ROUTERS = ['core.replicas.PrimaryReplicaRouter']
+# Алиасы баз, с которых читают запросы, см. core.replicas. Пустой
+# список — всё читается с основной базы.
+DATABASE_REPLICAS = []
+# Сколько секунд после своей записи пользователь читает основную базу.
+REPLICA_PIN_SECONDS = 10
+# На сколько секунд реплика может отставать от основной базы.
+REPLICA_MAX_LAG = 5
+
+# Прагмы для каждого соединения с SQLite, см. core.db.configure_sqlite.
+# WAL позволяет читать во время записи, busy_timeout ждёт чужую запись
+# вместо мгновенного «database is locked».
+SQLITE_PRAGMAS = {
+    'journal_mode': 'wal',
+    'synchronous': 'normal',
+    'busy_timeout': 5000,
+    'cache_size': -64000,
+    'mmap_size': 256 * 1024 * 1024,
+    'temp_store': 'memory',
 }
+SQLITE_LOCK_RETRIES = 3
+SQLITE_LOCK_RETRY_DELAY = 0.05
 
 
 AUTH_PASSWORD_VALIDATORS = [
@@ -123,12 +177,89 @@ MEDIA_URL = '/media/'
 
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Общий для всех процессов кеш за процессным LRU (core.cache.TwoTierCache).
+# FileBasedCache годится только для одного сервера: add и incr у него не
+# атомарны. Если серверов несколько, shared нужно перенести в memcached.
+# Тесты подменяют его в yatube/test_settings.py.
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-    }
+        'BACKEND': 'core.cache.TwoTierCache',
+        'LOCATION': 'near',
+        'OPTIONS': {
+            'SHARED': 'shared',
+            'NEAR_MAX_ENTRIES': 1000,
+            'NEAR_TIMEOUT': 60,
+            'SYNC_INTERVAL': 1,
+        },
+    },
+    # Записи sorl о миниатюрах: свой LRU, чтобы их не вытесняли страницы.
+    'thumbnails': {
+        'BACKEND': 'core.cache.TwoTierCache',
+        'LOCATION': 'thumbnails',
+        'OPTIONS': {
+            'SHARED': 'shared',
+            'NEAR_MAX_ENTRIES': 10000,
+            'NEAR_TIMEOUT': 600,
+            'SYNC_INTERVAL': 1,
+        },
+    },
+    'shared': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.path.join(BASE_DIR, 'cache'),
+        'OPTIONS': {
+            'MAX_ENTRIES': 100000,
+        },
+    },
 }
 
+# Миниатюры создаются фоновыми потоками (posts.thumbnails), пока их нет,
+# шаблоны показывают заглушку. 0 потоков — синхронно, как в самом sorl.
+THUMBNAIL_BACKEND = 'posts.thumbnails.AsyncThumbnailBackend'
+THUMBNAIL_KVSTORE = 'posts.thumbnails.PrefetchKVStore'
+THUMBNAIL_CACHE = 'thumbnails'
+THUMBNAIL_WORKERS = 2
+# Загруженные картинки постов приводятся к этому виду (posts.images).
+POST_IMAGE_MAX_PIXELS = 50_000_000
+POST_IMAGE_MAX_SIDE = 2048
+POST_IMAGE_FORMAT = 'JPEG'
+POST_IMAGE_QUALITY = 85
+
+# Сборщик осиротевших картинок и миниатюр (posts.media_gc): файлы моложе
+# MEDIA_GC_MIN_AGE секунд не трогаются, RATE — удалений в секунду.
+# Запускается по cron командой manage.py collect_media.
+MEDIA_GC_MIN_AGE = 3600
+MEDIA_GC_CHUNK_SIZE = 500
+MEDIA_GC_RATE = 50
+
+THUMBNAIL_DUMMY_SOURCE = (
+    "data:image/svg+xml,<svg xmlns='http://www.w3.org/2000/svg' "
+    "width='%(width)s' height='%(height)s'>"
+    "<rect width='%(width)s' height='%(height)s' fill='%%23e9ecef'/>"
+    "</svg>"
+)
+
 INTERNAL_IPS = [
     '127.0.0.1',
 ]
+
+# Заголовок Server-Timing для сотрудников и INTERNAL_IPS (core.timing). Доля
+# запросов SERVER_TIMING_SAMPLE_RATE пишется в журнал core.timing
+# целиком, с SERVER_TIMING_SLOW_QUERIES самыми медленными SQL.
+SERVER_TIMING = True
+SERVER_TIMING_SAMPLE_RATE = 0.01
+SERVER_TIMING_SLOW_QUERIES = 10
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'core.timing': {
+            'handlers': ['console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+    },
+}
@@ -0,0 +1,20 @@
+"""Настройки тестов: manage.py test и pytest берут их вместо settings.
+
+Кеш, потоки миниатюр и журнал выборки запросов не должны переживать
+прогон и зависеть от порядка тестов.
+"""
+from .settings import *  # noqa: F401,F403
+from .settings import CACHES
+
+# Общее хранилище в памяти процесса: файловый кеш пережил бы прогон.
+CACHES = {
+    **CACHES,
+    'shared': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'shared',
+    },
+}
+# Миниатюры создаются синхронно, как в sorl: тесты видят их сразу.
+THUMBNAIL_WORKERS = 0
+# Тесты включают выборку сами, см. core/test_timing.py.
+SERVER_TIMING_SAMPLE_RATE = 0